@@ -0,0 +1,172 @@
+import asyncio
+import random
+import time
+import zlib
+from typing import Any, AsyncIterator, Iterator, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from yt_quick_insights import tokens
+
+WORDS = (
+    "the model video learning data training system people question answer "
+    "example result important problem different process network language "
+    "information research simple practice value memory context function "
+    "performance request response summary topic speaker audience point idea"
+).split()
+
+
+def make_transcript(number_of_words: int, seed: int = 0) -> str:
+    """
+    Return a deterministic synthetic transcript.
+
+    Args:
+        number_of_words: Length of the transcript in words
+        seed: Seed of the random generator, the same seed returns the same transcript
+
+    Returns:
+        The transcript as a single line of text, like the cleaned YouTube transcripts
+    """
+    rng = random.Random(seed)
+    return " ".join(rng.choice(WORDS) for _ in range(number_of_words))
+
+
+class FakeTranscriptSource:
+    """Replacement for YoutubeTranscript._download, returns a synthetic transcript for every video"""
+
+    def __init__(self, number_of_words: int, latency: float = 0.0):
+        """
+        Args:
+            number_of_words: Length of every transcript in words
+            latency: Seconds to wait per download, simulates the YouTube requests
+        """
+        self.number_of_words = number_of_words
+        self.latency = latency
+        self.downloads = 0
+
+    def __call__(
+        self, video_id: str, video_language: str | list[str]
+    ) -> tuple[str, str]:
+        self.downloads += 1
+        time.sleep(self.latency)
+        seed = zlib.crc32(video_id.encode())
+        return f"Video {seed}", make_transcript(self.number_of_words, seed=seed)
+
+
+class FakePlaylist:
+    """Replacement for pytube.Playlist with a fixed number of videos"""
+
+    def __init__(self, number_of_videos: int):
+        self.video_urls = [
+            f"https://www.youtube.com/watch?v=VIDEO_{idx:05d}"
+            for idx in range(number_of_videos)
+        ]
+        self.length = number_of_videos
+
+    def __call__(self, playlist_url: str) -> "FakePlaylist":
+        return self
+
+    def url_generator(self) -> Iterator[str]:
+        yield from self.video_urls
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Deterministic chat model which waits like a real API:
+    a fixed latency until the first token, then completion_tokens at tokens_per_second.
+    Token usage is reported like ChatOpenAI, so the metrics and cost estimates work unchanged.
+    """
+
+    model_name: str = "gpt-4.1-mini"
+    temperature: float = 0
+    latency: float = 0.5
+    tokens_per_second: float = 100.0
+    completion_tokens: int = 300
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat-model"
+
+    def _prompt_tokens(self, messages: list[BaseMessage]) -> int:
+        return sum(
+            tokens.count_tokens(str(message.content), self.model_name)
+            for message in messages
+        )
+
+    def _completion(self, messages: list[BaseMessage]) -> list[str]:
+        """Return the response as a list of one word per token"""
+        seed = zlib.crc32(
+            "".join(str(message.content) for message in messages).encode()
+        )
+        rng = random.Random(seed)
+        return [rng.choice(WORDS) + " " for _ in range(self.completion_tokens)]
+
+    def _usage(self, messages: list[BaseMessage]) -> dict:
+        prompt_tokens = self._prompt_tokens(messages)
+        return {
+            "input_tokens": prompt_tokens,
+            "output_tokens": self.completion_tokens,
+            "total_tokens": prompt_tokens + self.completion_tokens,
+        }
+
+    def _duration(self) -> float:
+        return self.latency + self.completion_tokens / self.tokens_per_second
+
+    def _result(self, messages: list[BaseMessage]) -> ChatResult:
+        message = AIMessage(
+            content="".join(self._completion(messages)),
+            usage_metadata=self._usage(messages),
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        time.sleep(self._duration())
+        return self._result(messages)
+
+    async def _agenerate(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        await asyncio.sleep(self._duration())
+        return self._result(messages)
+
+    def _stream(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        time.sleep(self.latency)
+        for word in self._completion(messages):
+            time.sleep(1 / self.tokens_per_second)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word))
+        yield ChatGenerationChunk(
+            message=AIMessageChunk(content="", usage_metadata=self._usage(messages))
+        )
+
+    async def _astream(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        await asyncio.sleep(self.latency)
+        for word in self._completion(messages):
+            await asyncio.sleep(1 / self.tokens_per_second)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=word))
+        yield ChatGenerationChunk(
+            message=AIMessageChunk(content="", usage_metadata=self._usage(messages))
+        )
@@ -0,0 +1,265 @@
+"""
+Benchmark the extraction pipelines offline with a fake chat model and synthetic transcripts.
+No network access or API key is needed, all requests are answered by benchmarks.fakes.FakeChatModel.
+
+Examples (run from the repository root):
+    python -m benchmarks.run video --words 20000 --max-tokens 5000
+    python -m benchmarks.run playlist --videos 30 --concurrency 8 --repeat 3
+    python -m benchmarks.run playlist --videos 30 --mode async --cache
+"""
+
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+import tracemalloc
+from contextlib import ExitStack
+from dataclasses import dataclass
+from pathlib import Path
+from unittest.mock import patch
+
+from rich.console import Console
+from rich.table import Table
+
+from benchmarks.fakes import FakeChatModel, FakePlaylist, FakeTranscriptSource
+from yt_quick_insights import PlaylistInsights, aget_quick_insights, get_quick_insights
+from yt_quick_insights import metrics
+from yt_quick_insights.config import settings
+from yt_quick_insights.task import ExtractionMethods
+
+VIDEO_URL = "https://www.youtube.com/watch?v=BENCHMARK"
+PLAYLIST_URL = "https://www.youtube.com/playlist?list=BENCHMARK"
+
+
+@dataclass
+class Measurement:
+    """Result of a single benchmark run"""
+
+    wall_clock: float
+    peak_memory: int  # bytes
+    videos: int
+    run: metrics.RunMetrics
+
+    @property
+    def requests(self) -> int:
+        """LLM requests sent to the model, cached responses are not counted"""
+        return sum(
+            stage.stage != "transcript" and not stage.cache_hit
+            for stage in self.run.stages
+        )
+
+    @property
+    def tokens_per_second(self) -> float:
+        return self.run.total_tokens / self.wall_clock
+
+    @property
+    def videos_per_second(self) -> float:
+        return self.videos / self.wall_clock
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("scenario", choices=["video", "playlist"])
+    parser.add_argument("--mode", choices=["sync", "async"], default="sync")
+    parser.add_argument("--repeat", type=int, default=1, help="Number of runs.")
+    parser.add_argument(
+        "--words", type=int, default=5_000, help="Words per transcript."
+    )
+    parser.add_argument("--videos", type=int, default=10, help="Videos per playlist.")
+    parser.add_argument(
+        "--latency", type=float, default=0.5, help="Seconds until the first token."
+    )
+    parser.add_argument("--tokens-per-second", type=float, default=200.0)
+    parser.add_argument("--completion-tokens", type=int, default=300)
+    parser.add_argument(
+        "--transcript-latency",
+        type=float,
+        default=0.2,
+        help="Seconds per transcript download.",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=settings.MAX_CONCURRENCY,
+        help="Parallel LLM requests.",
+    )
+    parser.add_argument(
+        "--fetch-concurrency",
+        type=int,
+        default=settings.TRANSCRIPT_FETCH_CONCURRENCY,
+        help="Parallel transcript downloads of a playlist.",
+    )
+    parser.add_argument(
+        "--prefetch",
+        type=int,
+        default=settings.TRANSCRIPT_PREFETCH,
+        help="Downloaded transcripts waiting for the LLM.",
+    )
+    parser.add_argument(
+        "--max-tokens", type=int, default=settings.MAX_TOKENS, help="Chunk size."
+    )
+    parser.add_argument("--group-size", type=int, default=settings.PLAYLIST_GROUP_SIZE)
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="Keep the transcript, playlist, summary and LLM caches between runs (in a temporary directory).",
+    )
+    return parser.parse_args()
+
+
+def run_video(mode: str) -> int:
+    """Extract insights from a single video, returns the number of videos"""
+    if mode == "async":
+
+        async def extract() -> str:
+            quick_insights = await aget_quick_insights(
+                url=VIDEO_URL,
+                task_details=ExtractionMethods.general_summary,
+                video_language=settings.DEFAULT_LANGUAGES,
+            )
+            return await quick_insights.aextract(model_name="fake", api_key="fake")
+
+        asyncio.run(extract())
+    else:
+        get_quick_insights(
+            url=VIDEO_URL,
+            task_details=ExtractionMethods.general_summary,
+            video_language=settings.DEFAULT_LANGUAGES,
+        ).extract(model_name="fake", api_key="fake")
+    return 1
+
+
+def run_playlist(mode: str, number_of_videos: int) -> int:
+    """Extract insights from a playlist, returns the number of videos"""
+    playlist = PlaylistInsights(
+        playlist_url=PLAYLIST_URL,
+        model_name="fake",
+        api_key="fake",
+        extraction_method=ExtractionMethods.general_summary,
+    )
+    instructions = "No additional instructions"
+    if mode == "async":
+        asyncio.run(playlist.aextract(instructions))
+    else:
+        playlist.extract(instructions)
+    return number_of_videos
+
+
+def measure(args: argparse.Namespace) -> Measurement:
+    """Run the scenario once and measure it"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    with metrics.track(args.scenario) as run:
+        if args.scenario == "video":
+            videos = run_video(args.mode)
+        else:
+            videos = run_playlist(args.mode, args.videos)
+    wall_clock = time.perf_counter() - start
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return Measurement(
+        wall_clock=wall_clock, peak_memory=peak_memory, videos=videos, run=run
+    )
+
+
+def report(args: argparse.Namespace, measurements: list[Measurement]) -> None:
+    """Print one row per run and the median of all runs"""
+    table = Table(
+        title=f"{args.scenario} ({args.mode}), {args.words} words per transcript"
+    )
+    for column in (
+        "Run",
+        "Wall clock [s]",
+        "LLM requests",
+        "Cache hits",
+        "Tokens/s",
+        "Videos/s",
+        "Peak memory [MiB]",
+    ):
+        table.add_column(column, justify="right")
+
+    def add_row(name: str, values: list[Measurement]) -> None:
+        def median(attribute):
+            return statistics.median(attribute(value) for value in values)
+
+        table.add_row(
+            name,
+            f"{median(lambda m: m.wall_clock):.2f}",
+            f"{median(lambda m: m.requests):.0f}",
+            f"{median(lambda m: m.run.cache_hits):.0f}",
+            f"{median(lambda m: m.tokens_per_second):,.0f}",
+            f"{median(lambda m: m.videos_per_second):.2f}",
+            f"{median(lambda m: m.peak_memory) / 2**20:.1f}",
+        )
+
+    for idx, measurement in enumerate(measurements, start=1):
+        add_row(str(idx), [measurement])
+    if len(measurements) > 1:
+        add_row("median", measurements)
+
+    Console().print(table)
+
+
+def main() -> None:
+    args = parse_args()
+
+    llm = FakeChatModel(
+        latency=args.latency,
+        tokens_per_second=args.tokens_per_second,
+        completion_tokens=args.completion_tokens,
+    )
+    transcript_source = FakeTranscriptSource(
+        number_of_words=args.words, latency=args.transcript_latency
+    )
+
+    measurements = []
+    with ExitStack() as stack:
+        cache_dir = Path(stack.enter_context(tempfile.TemporaryDirectory()))
+        stack.enter_context(patch.object(settings, "MAX_CONCURRENCY", args.concurrency))
+        stack.enter_context(patch.object(settings, "MAX_TOKENS", args.max_tokens))
+        stack.enter_context(
+            patch.object(
+                settings, "TRANSCRIPT_FETCH_CONCURRENCY", args.fetch_concurrency
+            )
+        )
+        stack.enter_context(
+            patch.object(settings, "TRANSCRIPT_PREFETCH", args.prefetch)
+        )
+        stack.enter_context(
+            patch.object(settings, "PLAYLIST_GROUP_SIZE", args.group_size)
+        )
+        stack.enter_context(
+            patch.object(settings, "TRANSCRIPT_CACHE_ENABLED", args.cache)
+        )
+        stack.enter_context(patch.object(settings, "LLM_CACHE_ENABLED", args.cache))
+        stack.enter_context(patch.object(settings, "SUMMARY_CACHE_ENABLED", args.cache))
+        stack.enter_context(
+            patch.object(settings, "PLAYLIST_CACHE_ENABLED", args.cache)
+        )
+        stack.enter_context(patch.object(settings, "CACHE_DIR", cache_dir))
+        stack.enter_context(
+            patch("yt_quick_insights.utils.initialize_llm", return_value=llm)
+        )
+        stack.enter_context(
+            patch(
+                "yt_quick_insights.youtube_transcript.YoutubeTranscript._download",
+                side_effect=transcript_source,
+            )
+        )
+        stack.enter_context(
+            patch(
+                "yt_quick_insights.youtube_playlist.Playlist",
+                FakePlaylist(args.videos),
+            )
+        )
+
+        for _ in range(args.repeat):
+            measurements.append(measure(args))
+
+    report(args, measurements)
+
+
+if __name__ == "__main__":
+    main()
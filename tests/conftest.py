@@ -0,0 +1,10 @@
+import pytest
+
+from yt_quick_insights.config import settings
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    """Keep the persistent caches used in tests away from the user's cache directory"""
+    monkeypatch.setattr(settings, "CACHE_DIR", tmp_path / "cache")
+    return settings.CACHE_DIR
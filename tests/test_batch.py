@@ -0,0 +1,144 @@
+import json
+from unittest.mock import patch, MagicMock
+
+import pytest
+
+from yt_quick_insights.batch import BatchRunner, read_video_urls
+from yt_quick_insights.config import settings
+from yt_quick_insights.task import ExtractionMethods
+
+
+@pytest.mark.parametrize(
+    "file_name, content",
+    [
+        ("urls.txt", "# comment\nhttps://youtu.be/A\n\nhttps://youtu.be/B\n"),
+        (
+            "urls.csv",
+            "title,url\nFirst,https://youtu.be/A\nSecond,https://youtu.be/B\n",
+        ),
+        ("urls.csv", "https://youtu.be/A\nhttps://youtu.be/B\n"),
+        ("urls.jsonl", '{"url": "https://youtu.be/A"}\n"https://youtu.be/B"\n'),
+    ],
+)
+def test_read_video_urls(tmp_path, file_name, content):
+    input_file = tmp_path / file_name
+    input_file.write_text(content)
+    assert read_video_urls(input_file) == ["https://youtu.be/A", "https://youtu.be/B"]
+
+
+def test_read_video_urls_jsonl_without_url(tmp_path):
+    input_file = tmp_path / "urls.jsonl"
+    input_file.write_text(
+        '{"url": "https://youtu.be/A"}\n\n{"link": "https://youtu.be/B"}\n'
+    )
+    with pytest.raises(ValueError, match="urls.jsonl:3: missing 'url'"):
+        read_video_urls(input_file)
+
+
+def test_read_video_urls_unsupported_format(tmp_path):
+    input_file = tmp_path / "urls.xlsx"
+    input_file.write_text("")
+    with pytest.raises(ValueError, match="Unsupported file format"):
+        read_video_urls(input_file)
+
+
+@pytest.fixture
+def runner(tmp_path):
+    return BatchRunner(
+        output_file=tmp_path / "results.jsonl",
+        extraction_method=ExtractionMethods.general_summary,
+        model_name="gpt-4.1-mini",
+        api_key="API_KEY",
+    )
+
+
+def fake_quick_insights(url, **kwargs):
+    if url.endswith("broken"):
+        raise IndexError("Video does not have a transcript.")
+    quick_insights = MagicMock()
+    quick_insights.title = f"Title {url}"
+    quick_insights.extract.return_value = f"Insights {url}"
+    return quick_insights
+
+
+def read_records(runner):
+    return [json.loads(line) for line in runner.output_file.read_text().splitlines()]
+
+
+def test_run_writes_results(runner):
+    urls = ["https://youtu.be/A", "https://youtu.be/broken"]
+    with patch(
+        "yt_quick_insights.batch.get_quick_insights", side_effect=fake_quick_insights
+    ):
+        counts = runner.run(urls)
+
+    assert counts == {"skipped": 0, "ok": 1, "error": 1}
+    records = {record["url"]: record for record in read_records(runner)}
+    assert records["https://youtu.be/A"]["status"] == "ok"
+    assert records["https://youtu.be/A"]["insights"] == "Insights https://youtu.be/A"
+    assert records["https://youtu.be/broken"]["status"] == "error"
+    assert "transcript" in records["https://youtu.be/broken"]["error"]
+
+
+def test_run_resumes_from_checkpoint(runner):
+    # Output of an interrupted run: one finished video and an incomplete line
+    runner.output_file.write_text(
+        json.dumps({"url": "https://youtu.be/A", "status": "ok"}) + '\n{"url": "htt'
+    )
+    urls = ["https://youtu.be/A", "https://youtu.be/B"]
+
+    with patch(
+        "yt_quick_insights.batch.get_quick_insights", side_effect=fake_quick_insights
+    ) as mock_get_quick_insights:
+        counts = runner.run(urls)
+
+    assert counts == {"skipped": 1, "ok": 1, "error": 0}
+    mock_get_quick_insights.assert_called_once()
+    assert runner.load_checkpoint() == set(urls)
+
+
+def test_run_processes_every_video_once(runner):
+    runner.output_file.write_text(
+        json.dumps({"url": "https://youtu.be/VIDEO_ID_01", "status": "ok"}) + "\n"
+    )
+    urls = [
+        "https://www.youtube.com/watch?v=VIDEO_ID_01",
+        "https://www.youtube.com/watch?v=VIDEO_ID_02",
+        "https://youtu.be/VIDEO_ID_02?t=42",
+    ]
+
+    with patch(
+        "yt_quick_insights.batch.get_quick_insights", side_effect=fake_quick_insights
+    ) as mock_get_quick_insights:
+        counts = runner.run(urls)
+
+    assert counts == {"skipped": 2, "ok": 1, "error": 0}
+    mock_get_quick_insights.assert_called_once()
+    assert mock_get_quick_insights.call_args.kwargs["url"] == urls[1]
+
+
+def test_run_extracts_identical_transcripts_once(runner, tmp_path, monkeypatch):
+    # Videos are processed one after another, the second video finds the stored summary
+    monkeypatch.setattr(settings, "MAX_CONCURRENCY", 1)
+    quick_insights = MagicMock(title="Title", transcript="the same transcript")
+    quick_insights.extract.return_value = "Insights"
+
+    with patch(
+        "yt_quick_insights.batch.get_quick_insights", return_value=quick_insights
+    ):
+        counts = runner.run(["https://youtu.be/A", "https://youtu.be/B"])
+        # Another job finds the summary of the transcript as well
+        other_runner = BatchRunner(
+            output_file=tmp_path / "other.jsonl",
+            extraction_method=ExtractionMethods.general_summary,
+            model_name="gpt-4.1-mini",
+            api_key="API_KEY",
+        )
+        other_runner.run(["https://youtu.be/C"])
+
+    assert counts == {"skipped": 0, "ok": 2, "error": 0}
+    quick_insights.extract.assert_called_once()
+    assert [record["insights"] for record in read_records(runner)] == ["Insights"] * 2
+    assert read_records(other_runner)[0]["insights"] == "Insights"
+    # Finished extractions are not kept in memory
+    assert not runner._shared_extractions._futures
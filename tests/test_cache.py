@@ -0,0 +1,174 @@
+import sqlite3
+import time
+from unittest.mock import patch
+
+import pytest
+
+from yt_quick_insights.cache import (
+    SQLiteCache,
+    TranscriptCache,
+    ResponseCache,
+    SummaryCache,
+    PlaylistCache,
+)
+from yt_quick_insights.segments import Transcript
+
+
+@pytest.fixture
+def sqlite_cache(tmp_path):
+    return SQLiteCache(path=tmp_path / "cache.sqlite", max_size=10)
+
+
+def test_get_missing_key(sqlite_cache):
+    assert sqlite_cache.get("missing") is None
+
+
+def test_set_and_get(sqlite_cache):
+    sqlite_cache.set("key", "value")
+    assert sqlite_cache.get("key") == "value"
+
+
+def test_evicts_least_recently_used_entries(sqlite_cache):
+    sqlite_cache.set("a", "aaaa")
+    sqlite_cache.set("b", "bbbb")
+    # Access "a" so "b" becomes the least recently used entry
+    sqlite_cache.get("a")
+    sqlite_cache.set("c", "cccc")
+
+    assert sqlite_cache.get("a") == "aaaa"
+    assert sqlite_cache.get("b") is None
+    assert sqlite_cache.get("c") == "cccc"
+    assert len(sqlite_cache) == 2
+
+
+def test_expired_entries_are_ignored(tmp_path):
+    cache = SQLiteCache(path=tmp_path / "cache.sqlite", max_size=100, ttl=1)
+    cache.set("key", "value")
+    cache.ttl = -1
+    assert cache.get("key") is None
+
+
+def test_clear(sqlite_cache):
+    sqlite_cache.set("key", "value")
+    sqlite_cache.clear()
+    assert len(sqlite_cache) == 0
+
+
+def test_connections_are_closed(sqlite_cache):
+    connections = []
+    sqlite_connect = sqlite3.connect
+
+    def connect(*args, **kwargs):
+        connections.append(sqlite_connect(*args, **kwargs))
+        return connections[-1]
+
+    with patch("yt_quick_insights.cache.sqlite3.connect", side_effect=connect):
+        sqlite_cache.set("key", "value")
+        assert sqlite_cache.get("key") == "value"
+        assert len(sqlite_cache) == 1
+
+    assert len(connections) == 3
+    for conn in connections:
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
+
+
+def test_unusable_cache_is_disabled(tmp_path):
+    # The parent of the database is a file, so the cache directory cannot be created
+    (tmp_path / "file").write_text("")
+    cache = SQLiteCache(path=tmp_path / "file" / "cache.sqlite", max_size=10)
+
+    assert not cache.enabled
+    cache.set("key", "value")
+    assert cache.get("key") is None
+    assert len(cache) == 0
+
+
+def test_corrupt_cache_file_is_disabled(tmp_path):
+    path = tmp_path / "cache.sqlite"
+    path.write_bytes(b"not a database" * 100)
+    cache = SQLiteCache(path=path, max_size=10)
+
+    assert not cache.enabled
+    assert cache.get("key") is None
+
+
+def test_transcript_cache_key_normalizes_language():
+    assert TranscriptCache.make_key("VIDEO_ID", "EN") == "VIDEO_ID:en"
+    assert TranscriptCache.make_key("VIDEO_ID", ["en", "de"]) == "VIDEO_ID:en,de"
+
+
+def test_transcript_cache_persists_between_instances(tmp_path):
+    path = tmp_path / "transcripts.sqlite"
+    TranscriptCache(path=path).set_transcript("VIDEO_ID", "en", "Title", "Text")
+
+    assert TranscriptCache(path=path).get_transcript("VIDEO_ID", "en") == (
+        "Title",
+        "Text",
+    )
+    assert TranscriptCache(path=path).get_transcript("VIDEO_ID", "de") is None
+
+
+def test_response_cache_key_depends_on_all_parameters():
+    key = ResponseCache.make_key("prompt", "gpt-4.1-mini", 0)
+    assert key == ResponseCache.make_key("prompt", "gpt-4.1-mini", 0)
+    assert key != ResponseCache.make_key("other prompt", "gpt-4.1-mini", 0)
+    assert key != ResponseCache.make_key("prompt", "gpt-4.1", 0)
+    assert key != ResponseCache.make_key("prompt", "gpt-4.1-mini", 0.7)
+
+
+def test_transcript_cache_keeps_segment_start_times(tmp_path):
+    path = tmp_path / "transcripts.sqlite"
+    transcript = Transcript("first second", offsets=[0, 6], starts=[0.0, 3.5])
+    TranscriptCache(path=path).set_transcript("VIDEO_ID", "en", "Title", transcript)
+
+    _, cached = TranscriptCache(path=path).get_transcript("VIDEO_ID", "en")
+
+    assert cached == "first second"
+    assert cached.start_time(7) == 3.5
+
+
+def test_summary_cache_key_depends_on_all_parameters():
+    key = SummaryCache.make_key("VIDEO_ID", "general_summary", "gpt-4.1-mini", "text")
+    assert key == SummaryCache.make_key(
+        "VIDEO_ID", "general_summary", "gpt-4.1-mini", "text"
+    )
+    assert key != SummaryCache.make_key(
+        "OTHER_ID", "general_summary", "gpt-4.1-mini", "text"
+    )
+    assert key != SummaryCache.make_key(
+        "VIDEO_ID", "key_takeaways", "gpt-4.1-mini", "text"
+    )
+    assert key != SummaryCache.make_key(
+        "VIDEO_ID", "general_summary", "gpt-4.1", "text"
+    )
+    assert key != SummaryCache.make_key(
+        "VIDEO_ID", "general_summary", "gpt-4.1-mini", "edited text"
+    )
+
+
+def test_summary_cache_transcript_key_differs_from_video_key():
+    key = SummaryCache.make_transcript_key(
+        "HASH", "general_summary", "gpt-4.1-mini", "text"
+    )
+    assert key == SummaryCache.make_transcript_key(
+        "HASH", "general_summary", "gpt-4.1-mini", "text"
+    )
+    assert key != SummaryCache.make_transcript_key(
+        "OTHER_HASH", "general_summary", "gpt-4.1-mini", "text"
+    )
+    assert key != SummaryCache.make_key(
+        "HASH", "general_summary", "gpt-4.1-mini", "text"
+    )
+
+
+def test_playlist_cache_expires(tmp_path, monkeypatch):
+    cache = PlaylistCache(path=tmp_path / "playlists.sqlite", ttl=60)
+    cache.set_video_urls("PLAYLIST_ID", ["url_1", "url_2"])
+
+    assert cache.get_video_urls("PLAYLIST_ID") == ["url_1", "url_2"]
+    assert cache.get_video_urls("OTHER_ID") is None
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 61)
+    assert cache.get_video_urls("PLAYLIST_ID") is None
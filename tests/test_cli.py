@@ -1,7 +1,11 @@
+from unittest.mock import patch
+
 import pytest
 from typer.testing import CliRunner
 
+from yt_quick_insights import tokens
 from yt_quick_insights.cli import app
+from yt_quick_insights.config import settings
 
 runner = CliRunner()
 
@@ -11,3 +15,213 @@ runner = CliRunner()
 def test_if_cli_help_command_works():
     result = runner.invoke(app, ["--help"])
     assert result.exit_code == 0
+
+
+@pytest.fixture
+def mock_quick_insights():
+    with patch("yt_quick_insights.get_quick_insights") as mock:
+        mock.return_value.extract.return_value = "# Insights"
+        yield mock
+
+
+def test_video_command_prints_insights(mock_quick_insights):
+    result = runner.invoke(
+        app, ["video", "https://www.youtube.com/watch?v=VIDEO_ID", "--api-key", "KEY"]
+    )
+    assert result.exit_code == 0
+    assert "Insights" in result.output
+    mock_quick_insights.return_value.extract.assert_called_once_with(
+        model_name=settings.OPENAI_MODEL_NAME, api_key="KEY", use_cache=True
+    )
+
+
+def test_video_command_saves_output(mock_quick_insights, tmp_path):
+    output = tmp_path / "insights.md"
+    result = runner.invoke(
+        app,
+        [
+            "video",
+            "https://www.youtube.com/watch?v=VIDEO_ID",
+            "--api-key",
+            "KEY",
+            "--output",
+            str(output),
+            "--no-cache",
+        ],
+    )
+    assert result.exit_code == 0
+    assert output.read_text() == "# Insights"
+    assert (
+        mock_quick_insights.return_value.extract.call_args.kwargs["use_cache"] is False
+    )
+
+
+def test_video_command_invalid_url(mock_quick_insights):
+    mock_quick_insights.side_effect = ValueError("Please provide a valid YouTube URL")
+    result = runner.invoke(app, ["video", "invalid_url", "--api-key", "KEY"])
+    assert result.exit_code == 1
+    assert "Please provide a valid YouTube URL" in result.output
+
+
+def test_video_command_without_api_key(mock_quick_insights, monkeypatch):
+    monkeypatch.setattr(settings, "OPENAI_API_KEY", None)
+    result = runner.invoke(app, ["video", "https://www.youtube.com/watch?v=VIDEO_ID"])
+    assert result.exit_code == 1
+    mock_quick_insights.assert_not_called()
+
+
+def test_ask_command():
+    with (
+        patch("yt_quick_insights.YoutubeTranscript") as mock_transcript,
+        patch("yt_quick_insights.DeepDive") as mock_deep_dive,
+    ):
+        mock_transcript.return_value.download_from_url.return_value = (
+            "Title",
+            "Transcript",
+        )
+        mock_deep_dive.return_value.extract.return_value = "Answer"
+        result = runner.invoke(
+            app,
+            [
+                "ask",
+                "https://www.youtube.com/watch?v=VIDEO_ID",
+                "What is the video about?",
+                "--api-key",
+                "KEY",
+            ],
+        )
+
+    assert result.exit_code == 0
+    assert "Answer" in result.output
+    mock_deep_dive.assert_called_once_with(
+        title="Title", transcript="Transcript", user_question="What is the video about?"
+    )
+
+
+def test_playlist_command():
+    with patch("yt_quick_insights.PlaylistInsights") as mock_playlist:
+        mock_playlist.return_value.extract.return_value = "Playlist Insights"
+        result = runner.invoke(
+            app,
+            [
+                "playlist",
+                "https://www.youtube.com/playlist?list=ID",
+                "--api-key",
+                "KEY",
+            ],
+        )
+
+    assert result.exit_code == 0
+    assert "Playlist Insights" in result.output
+    assert mock_playlist.return_value.extract.call_args.kwargs["progress"]
+
+
+def test_playlist_command_invalid_url():
+    with patch("yt_quick_insights.PlaylistInsights") as mock_playlist:
+        result = runner.invoke(
+            app, ["playlist", "https://www.youtube.com/playlist", "--api-key", "KEY"]
+        )
+
+    assert result.exit_code == 1
+    assert "Could not determine the playlist ID" in result.output
+    mock_playlist.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    "error, message",
+    [
+        (KeyError("list"), "valid YouTube playlist URL"),
+        (RuntimeError("No video of the playlist could be summarized."), "No video"),
+    ],
+)
+def test_playlist_command_handles_errors(error, message):
+    with patch("yt_quick_insights.PlaylistInsights") as mock_playlist:
+        mock_playlist.return_value.extract.side_effect = error
+        mock_playlist.return_value.failed_videos = {"VIDEO_URL": "Request timed out"}
+        result = runner.invoke(
+            app,
+            [
+                "playlist",
+                "https://www.youtube.com/playlist?list=ID",
+                "--api-key",
+                "KEY",
+            ],
+        )
+
+    assert result.exit_code == 1
+    assert message in result.output
+    assert "Traceback" not in result.output
+
+
+def test_video_command_streams_insights(mock_quick_insights):
+    mock_quick_insights.return_value.stream.return_value = iter(
+        ["Streamed ", "Insights"]
+    )
+    result = runner.invoke(
+        app,
+        [
+            "video",
+            "https://www.youtube.com/watch?v=VIDEO_ID",
+            "--api-key",
+            "KEY",
+            "--stream",
+        ],
+    )
+    assert result.exit_code == 0
+    assert "Streamed Insights" in result.output
+    mock_quick_insights.return_value.extract.assert_not_called()
+
+
+def test_ask_command_with_multiple_questions():
+    with (
+        patch("yt_quick_insights.YoutubeTranscript") as mock_transcript,
+        patch("yt_quick_insights.DeepDive") as mock_deep_dive,
+    ):
+        mock_transcript.return_value.download_from_url.return_value = (
+            "Title",
+            "Transcript",
+        )
+        mock_deep_dive.return_value.extract.return_value = "Answers"
+        result = runner.invoke(
+            app,
+            [
+                "ask",
+                "https://www.youtube.com/watch?v=VIDEO_ID",
+                "First question?",
+                "Second question?",
+                "--api-key",
+                "KEY",
+            ],
+        )
+
+    assert result.exit_code == 0
+    assert mock_deep_dive.call_args.kwargs["user_question"] == [
+        "First question?",
+        "Second question?",
+    ]
+
+
+def test_video_command_estimate_does_not_call_the_model(
+    mock_quick_insights, monkeypatch
+):
+    monkeypatch.setattr(settings, "OPENAI_API_KEY", None)
+    mock_quick_insights.return_value.estimate.return_value = tokens.Estimate(
+        model_name="gpt-4.1-mini", prompt_tokens=1234, completion_tokens=1000
+    )
+    result = runner.invoke(
+        app, ["video", "https://www.youtube.com/watch?v=VIDEO_ID", "--estimate"]
+    )
+    assert result.exit_code == 0
+    assert "1234" in result.output
+    mock_quick_insights.return_value.extract.assert_not_called()
+
+
+def test_video_command_exits_when_budget_is_exceeded(mock_quick_insights):
+    mock_quick_insights.return_value.extract.side_effect = tokens.BudgetExceededError(
+        "Budget exceeded"
+    )
+    result = runner.invoke(
+        app, ["video", "https://www.youtube.com/watch?v=VIDEO_ID", "--api-key", "KEY"]
+    )
+    assert result.exit_code == 1
+    assert "Budget exceeded" in result.output
@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from yt_quick_insights import utils
+from yt_quick_insights.clients import LLMClientRegistry
+from yt_quick_insights.config import settings
+
+
+@pytest.fixture
+def registry():
+    registry = LLMClientRegistry()
+    yield registry
+    registry.clear()
+
+
+def test_registry_reuses_llm_instances(registry):
+    first = registry.get("gpt-4.1-mini", "API_KEY", temperature=0)
+    second = registry.get("gpt-4.1-mini", "API_KEY", temperature=0)
+
+    assert first is second
+
+
+def test_registry_shares_http_client_between_models(registry, monkeypatch):
+    monkeypatch.setattr(settings, "LLM_CONNECT_TIMEOUT", 3.0)
+    mini = registry.get("gpt-4.1-mini", "API_KEY", temperature=0)
+    other = registry.get("gpt-4.1", "API_KEY", temperature=0)
+    other_key = registry.get("gpt-4.1-mini", "OTHER_KEY", temperature=0)
+
+    assert len({id(mini), id(other), id(other_key)}) == 3
+    assert mini.root_client._client is other.root_client._client
+    assert mini.root_client._client is other_key.root_client._client
+    assert mini.root_client._client.timeout.connect == 3.0
+
+
+def test_registry_keeps_async_clients_per_event_loop(registry):
+    async def get_llm():
+        return registry.get("gpt-4.1-mini", "API_KEY"), registry.get(
+            "gpt-4.1-mini", "API_KEY"
+        )
+
+    first, same_loop = asyncio.run(get_llm())
+    second, _ = asyncio.run(get_llm())
+
+    assert first is same_loop
+    assert first is not second
+    assert first.root_async_client._client is not second.root_async_client._client
+    assert first.root_client._client is second.root_client._client
+
+
+def test_initialize_llm_uses_registry():
+    assert utils.initialize_llm("gpt-4.1-mini", "API_KEY") is utils.initialize_llm(
+        "gpt-4.1-mini", "API_KEY"
+    )
+
+
+def test_registry_closes_async_clients_after_last_session(registry):
+    async def extract():
+        async with registry.session():
+            await asyncio.sleep(0)
+            return registry.get("gpt-4.1-mini", "API_KEY")
+
+    async def run():
+        async with registry.session():
+            first, second = await asyncio.gather(extract(), extract())
+            # Nested sessions keep the clients of the outer session open
+            open_after_nested = not first.http_async_client.is_closed
+        return first, second, open_after_nested, registry.get("gpt-4.1-mini", "API_KEY")
+
+    first, second, open_after_nested, after_session = asyncio.run(run())
+
+    assert first is second
+    assert open_after_nested
+    assert first.http_async_client.is_closed
+    assert after_session is not first
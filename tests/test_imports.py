@@ -0,0 +1,75 @@
+import json
+import subprocess
+import sys
+
+# Modules which must only be imported when an extraction starts, not at startup
+HEAVY_MODULES = [
+    "langchain_community",
+    "langchain_core",
+    "langchain_openai",
+    "openai",
+    "httpx",
+    "pytube",
+    "youtube_transcript_api",
+    "streamlit",
+    "tiktoken",
+    "rich.progress",
+]
+
+# Time spent executing the modules of this package while the CLI starts (excluding typer, pydantic and rich).
+# Measured at about 15 ms, the budget leaves room for slow machines.
+OWN_IMPORT_TIME_BUDGET_MS = 50
+
+
+def run_python(code: str, *options: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *options, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def imported_modules(module: str) -> set[str]:
+    result = run_python(
+        f"import json, sys; import {module}; print(json.dumps(sorted(sys.modules)))"
+    )
+    return set(json.loads(result.stdout))
+
+
+def is_loaded(name: str, modules: set[str]) -> bool:
+    return name in modules or any(module.startswith(f"{name}.") for module in modules)
+
+
+def test_package_import_is_lazy():
+    modules = imported_modules("yt_quick_insights")
+
+    assert {m for m in modules if m.startswith("yt_quick_insights")} == {
+        "yt_quick_insights"
+    }
+
+
+def test_lazy_attributes_are_resolved_on_access():
+    result = run_python(
+        "import yt_quick_insights; print(yt_quick_insights.QuickInsights.__module__)"
+    )
+
+    assert result.stdout.strip() == "yt_quick_insights.quick_insights"
+
+
+def test_cli_does_not_import_heavy_modules():
+    modules = imported_modules("yt_quick_insights.cli")
+
+    assert [name for name in HEAVY_MODULES if is_loaded(name, modules)] == []
+
+
+def test_cli_import_time_budget():
+    # -X importtime writes "import time: self [us] | cumulative | module" lines to stderr
+    result = run_python("import yt_quick_insights.cli", "-X", "importtime")
+    own_time_us = 0
+    for line in result.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip().startswith("yt_quick_insights"):
+            own_time_us += int(parts[0].split(":")[1])
+
+    assert 0 < own_time_us / 1000 < OWN_IMPORT_TIME_BUDGET_MS
@@ -0,0 +1,97 @@
+import json
+from unittest.mock import MagicMock
+
+import pytest
+
+from yt_quick_insights import metrics, utils
+
+
+@pytest.fixture
+def mock_llm():
+    llm = MagicMock()
+    llm.model_name = "gpt-4o-mini"
+    llm.temperature = 0
+    llm.invoke.return_value = MagicMock(
+        content="LLM Response",
+        usage_metadata={"input_tokens": 1000, "output_tokens": 100},
+    )
+    return llm
+
+
+def test_invoke_llm_records_tokens_cost_and_cache_hits(mock_llm):
+    with metrics.track("test") as run:
+        utils.invoke_llm(mock_llm, "prompt", stage="extract")
+        utils.invoke_llm(mock_llm, "prompt", stage="extract")
+
+    first, second = run.stages
+    assert first.stage == "extract"
+    assert first.model == "gpt-4o-mini"
+    assert (first.prompt_tokens, first.completion_tokens) == (1000, 100)
+    assert first.cost > 0
+    assert not first.cache_hit
+    assert second.cache_hit
+    assert second.prompt_tokens == 0
+
+    assert run.total_tokens == 1100
+    assert run.cache_hits == 1
+    assert run.by_stage()["extract"]["calls"] == 2
+
+
+def test_stages_outside_of_a_tracked_run_are_not_recorded(mock_llm):
+    utils.invoke_llm(mock_llm, "prompt")
+
+    with metrics.track() as run:
+        pass
+
+    assert run.stages == []
+
+
+def test_nested_runs_and_worker_threads(mock_llm):
+    with metrics.track("outer") as outer:
+        with metrics.track("inner") as inner:
+            utils.map_concurrently(
+                lambda prompt: utils.invoke_llm(mock_llm, prompt, stage="chunk"),
+                ["a", "b", "c"],
+                max_workers=3,
+            )
+        utils.invoke_llm(mock_llm, "combine", stage="combine")
+
+    assert len(inner.stages) == 3
+    assert [stage.stage for stage in outer.stages].count("chunk") == 3
+    assert len(outer.stages) == 4
+
+
+def test_unknown_model_has_no_cost(mock_llm):
+    mock_llm.model_name = "unknown-model"
+
+    with metrics.track() as run:
+        utils.invoke_llm(mock_llm, "prompt")
+
+    assert run.prompt_tokens == 1000
+    assert run.cost == 0
+
+
+def test_exports(tmp_path):
+    run = metrics.RunMetrics(name="video")
+    run.add(metrics.StageMetrics(stage="transcript", duration=0.5, cache_hit=True))
+    run.add(
+        metrics.StageMetrics(
+            stage="extract", duration=2, prompt_tokens=10, completion_tokens=5
+        )
+    )
+
+    output_file = tmp_path / "metrics.jsonl"
+    run.write_jsonl(output_file)
+    records = [json.loads(line) for line in output_file.read_text().splitlines()]
+    assert [record["stage"] for record in records] == ["transcript", "extract"]
+    assert records[0]["run"] == "video"
+
+    prometheus = run.to_prometheus()
+    assert "# TYPE yt_quick_insights_prompt_tokens_total counter" in prometheus
+    assert 'yt_quick_insights_prompt_tokens_total{run="video",stage="extract"} 10' in (
+        prometheus
+    )
+    assert (
+        'yt_quick_insights_stage_cache_hits_total{run="video",stage="transcript"} 1'
+        in prometheus
+    )
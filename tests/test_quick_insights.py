@@ -0,0 +1,253 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+import typer
+from openai import AuthenticationError
+
+from yt_quick_insights import DeepDive, QuickInsights, tokens
+from yt_quick_insights.config import settings
+
+
+@pytest.fixture(autouse=True)
+def no_tokenizer(monkeypatch):
+    monkeypatch.setattr(tokens, "_get_encoding", lambda model_name: None)
+
+
+@pytest.fixture
+def mock_llm():
+    llm = MagicMock()
+    llm.model_name = "gpt-4.1-mini"
+    llm.temperature = 0
+    llm.invoke.side_effect = lambda prompt: MagicMock(
+        content="Combined" if "Partial Results" in prompt else "Partial"
+    )
+    return llm
+
+
+def test_extract_short_transcript_uses_single_request(mock_llm):
+    quick_insights = QuickInsights(title="Title", transcript="short", task="Summarize")
+
+    with patch("yt_quick_insights.utils.initialize_llm", return_value=mock_llm):
+        result = quick_insights.extract(model_name="gpt-4.1-mini", api_key="API_KEY")
+
+    assert result == "Partial"
+    mock_llm.invoke.assert_called_once_with(quick_insights.get_prompt())
+
+
+def test_extract_long_transcript_uses_map_reduce(mock_llm, monkeypatch):
+    monkeypatch.setattr(settings, "MAX_TOKENS", 100)
+    transcript = " ".join(f"word{idx:03d}" for idx in range(100))
+    quick_insights = QuickInsights(
+        title="Title", transcript=transcript, task="Summarize"
+    )
+
+    with patch("yt_quick_insights.utils.initialize_llm", return_value=mock_llm):
+        result = quick_insights.extract(model_name="gpt-4.1-mini", api_key="API_KEY")
+
+    prompts = [call.args[0] for call in mock_llm.invoke.call_args_list]
+    assert result == "Combined"
+    # 200 estimated tokens -> 2 chunks + 1 combine request
+    assert len(prompts) == 3
+    assert sum("(part 1 of 2)" in prompt for prompt in prompts) == 1
+    assert sum("(part 2 of 2)" in prompt for prompt in prompts) == 1
+    assert "--- Part 2 of 2 ---" in prompts[-1]
+
+
+def test_estimate_short_transcript(monkeypatch):
+    monkeypatch.setattr(settings, "ESTIMATED_COMPLETION_TOKENS", 100)
+    quick_insights = QuickInsights(title="Title", transcript="short", task="Summarize")
+
+    estimate = quick_insights.estimate("gpt-4.1-mini")
+
+    assert estimate.requests == 1
+    assert estimate.prompt_tokens == tokens.count_tokens(
+        quick_insights.get_prompt(), "gpt-4.1-mini"
+    )
+    assert estimate.completion_tokens == 100
+
+
+def test_estimate_long_transcript_includes_combine_request(monkeypatch):
+    monkeypatch.setattr(settings, "MAX_TOKENS", 100)
+    transcript = " ".join(f"word{idx:03d}" for idx in range(100))
+    quick_insights = QuickInsights(
+        title="Title", transcript=transcript, task="Summarize"
+    )
+
+    estimate = quick_insights.estimate("gpt-4.1-mini")
+
+    assert estimate.requests == 3
+    assert estimate.prompt_tokens > tokens.count_tokens(transcript, "gpt-4.1-mini")
+
+
+def test_extract_refuses_request_above_budget(mock_llm, monkeypatch):
+    monkeypatch.setattr(settings, "MAX_COST_PER_VIDEO", 0.0000001)
+    quick_insights = QuickInsights(title="Title", transcript="short", task="Summarize")
+
+    with patch("yt_quick_insights.utils.initialize_llm", return_value=mock_llm):
+        with pytest.raises(tokens.BudgetExceededError):
+            quick_insights.extract(model_name="gpt-4.1-mini", api_key="API_KEY")
+
+    mock_llm.invoke.assert_not_called()
+
+
+def test_stream_yields_chunks(mock_llm):
+    mock_llm.stream.return_value = [
+        MagicMock(content="Part 1 "),
+        MagicMock(content="Part 2"),
+    ]
+    quick_insights = QuickInsights(title="Title", transcript="short", task="Summarize")
+
+    with patch("yt_quick_insights.utils.initialize_llm", return_value=mock_llm):
+        chunks = list(
+            quick_insights.stream(model_name="gpt-4.1-mini", api_key="API_KEY")
+        )
+
+    assert chunks == ["Part 1 ", "Part 2"]
+    mock_llm.stream.assert_called_once_with(quick_insights.get_prompt())
+
+
+def test_stream_invalid_api_key(mock_llm):
+    mock_llm.stream.side_effect = AuthenticationError(
+        "Invalid API key", response=MagicMock(), body=None
+    )
+    quick_insights = QuickInsights(title="Title", transcript="short", task="Summarize")
+
+    with patch("yt_quick_insights.utils.initialize_llm", return_value=mock_llm):
+        with pytest.raises(typer.Abort, match="Invalid API key"):
+            list(quick_insights.stream(model_name="gpt-4.1-mini", api_key="API_KEY"))
+
+
+def test_aextract_long_transcript_uses_map_reduce(mock_llm, monkeypatch):
+    monkeypatch.setattr(settings, "MAX_TOKENS", 100)
+    mock_llm.ainvoke = AsyncMock(side_effect=lambda prompt: mock_llm.invoke(prompt))
+    transcript = " ".join(f"word{idx:03d}" for idx in range(100))
+    quick_insights = QuickInsights(
+        title="Title", transcript=transcript, task="Summarize"
+    )
+
+    with patch("yt_quick_insights.utils.initialize_llm", return_value=mock_llm):
+        result = asyncio.run(
+            quick_insights.aextract(model_name="gpt-4.1-mini", api_key="API_KEY")
+        )
+
+    assert result == "Combined"
+    assert mock_llm.ainvoke.await_count == 3
+
+
+def test_deep_dive_short_transcript_uses_whole_transcript():
+    deep_dive = DeepDive(title="Title", transcript="short", user_question="Why?")
+    assert "short" in deep_dive.get_prompt()
+
+
+def test_deep_dive_long_transcript_uses_relevant_passages(monkeypatch):
+    monkeypatch.setattr(settings, "DEEP_DIVE_PASSAGE_TOKENS", 30)
+    monkeypatch.setattr(settings, "DEEP_DIVE_TOP_K", 1)
+    transcript = " ".join(
+        [f"filler sentence number {idx:02d} without meaning." for idx in range(10)]
+        + ["the secret ingredient of the recipe is smoked paprika powder."]
+    )
+    deep_dive = DeepDive(
+        title="Title",
+        transcript=transcript,
+        user_question="What is the secret ingredient?",
+    )
+
+    prompt = deep_dive.get_prompt()
+    assert "smoked paprika" in prompt
+    assert "filler sentence number 00" not in prompt
+    assert "[...]" in prompt
+
+
+def test_deep_dive_sizes_context_with_requested_model(mock_llm, monkeypatch):
+    monkeypatch.setattr(settings, "DEEP_DIVE_PASSAGE_TOKENS", 30)
+    monkeypatch.setattr(settings, "DEEP_DIVE_TOP_K", 1)
+    counted_models = set()
+    count_tokens = tokens.count_tokens
+
+    def count_and_record(text, model_name):
+        counted_models.add(model_name)
+        return count_tokens(text, model_name)
+
+    monkeypatch.setattr(tokens, "count_tokens", count_and_record)
+    mock_llm.invoke.side_effect = None
+    mock_llm.invoke.return_value.content = "Answer"
+    deep_dive = DeepDive(
+        title="Title", transcript="long transcript " * 100, user_question="Why?"
+    )
+
+    with patch("yt_quick_insights.utils.initialize_llm", return_value=mock_llm):
+        deep_dive.extract(model_name="gpt-4o", api_key="KEY")
+
+    assert counted_models == {"gpt-4o"}
+
+
+@pytest.fixture
+def questions():
+    return ["What is the topic?", "Who is the speaker?", "What is the conclusion?"]
+
+
+def test_deep_dive_batch_prompt_numbers_questions(questions):
+    deep_dive = DeepDive(title="Title", transcript="short", user_question=questions)
+    prompt = deep_dive.get_prompt()
+
+    assert "1. What is the topic?" in prompt
+    assert "3. What is the conclusion?" in prompt
+    assert "=== Answer N ===" in prompt
+
+
+def test_deep_dive_extract_answers_in_single_request(mock_llm, questions):
+    mock_llm.invoke.side_effect = None
+    mock_llm.invoke.return_value.content = (
+        "=== Answer 1 ===\n# Topic\n- Cooking\n\n"
+        "=== Answer 3 ===\n# Conclusion\n- Use fresh ingredients\n"
+    )
+    deep_dive = DeepDive(title="Title", transcript="short", user_question=questions)
+
+    with patch("yt_quick_insights.utils.initialize_llm", return_value=mock_llm):
+        answers = deep_dive.extract_answers(model_name="gpt-4.1-mini", api_key="KEY")
+
+    mock_llm.invoke.assert_called_once()
+    assert answers == [
+        "# Topic\n- Cooking",
+        DeepDive.MISSING_ANSWER,
+        "# Conclusion\n- Use fresh ingredients",
+    ]
+
+
+@pytest.mark.parametrize(
+    "marker",
+    ["=== Answer {} ===", "### === Answer {} ===", "**=== Answer {} ===**"],
+)
+def test_deep_dive_parses_decorated_answer_markers(questions, marker):
+    response = "\n".join(
+        f"{marker.format(idx)}\nAnswer text {idx}" for idx in range(1, 4)
+    )
+    deep_dive = DeepDive(title="Title", transcript="short", user_question=questions)
+
+    assert deep_dive._parse_answers(response) == [
+        "Answer text 1",
+        "Answer text 2",
+        "Answer text 3",
+    ]
+
+
+def test_deep_dive_keeps_response_without_answer_markers(questions):
+    deep_dive = DeepDive(title="Title", transcript="short", user_question=questions)
+
+    assert deep_dive._parse_answers("All answers in one text.\n") == [
+        "All answers in one text."
+    ]
+
+
+def test_deep_dive_extract_joins_answers(mock_llm, questions):
+    mock_llm.invoke.side_effect = None
+    mock_llm.invoke.return_value.content = (
+        "=== Answer 1 ===\nA\n=== Answer 2 ===\nB\n=== Answer 3 ===\nC"
+    )
+    deep_dive = DeepDive(title="Title", transcript="short", user_question=questions)
+
+    with patch("yt_quick_insights.utils.initialize_llm", return_value=mock_llm):
+        result = deep_dive.extract(model_name="gpt-4.1-mini", api_key="KEY")
+
+    assert result == DeepDive.ANSWER_SEPARATOR.join(["A", "B", "C"])
@@ -0,0 +1,58 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from yt_quick_insights import retrieval, tokens
+from yt_quick_insights.config import settings
+
+
+@pytest.fixture(autouse=True)
+def small_passages(monkeypatch):
+    monkeypatch.setattr(tokens, "_get_encoding", lambda model_name: None)
+    monkeypatch.setattr(settings, "DEEP_DIVE_PASSAGE_TOKENS", 20)
+
+
+@pytest.fixture
+def transcript():
+    # Four passages of 80 characters (20 estimated tokens) each
+    return " ".join(
+        [
+            "today we talk about cooking pasta with fresh tomatoes and basil leaves",
+            "the weather in the mountains changes quickly so always bring a jacket",
+            "to cook pasta bring salted water to a boil and add the pasta noodles",
+            "thank you for watching and please subscribe to the channel for more",
+        ]
+    )
+
+
+def test_bm25_index_ranks_relevant_passages(transcript):
+    index = retrieval.BM25Index(transcript)
+
+    assert len(index.passages) == 4
+    assert index.search("How do I cook pasta?", k=2) == [0, 2]
+    assert index.search("What should I bring to the mountains?", k=1) == [1]
+
+
+def test_get_excerpt_marks_omitted_parts(transcript):
+    index = retrieval.BM25Index(transcript)
+    excerpt = index.get_excerpt("How do I cook pasta?", k=2)
+
+    assert excerpt.split("\n") == [
+        index.passages[0],
+        "[...]",
+        index.passages[2],
+        "[...]",
+    ]
+
+
+def test_embedding_index(transcript):
+    embeddings = MagicMock()
+    embeddings.embed_documents.return_value = [[1, 0], [0, 1], [1, 1], [0, 0]]
+    embeddings.embed_query.return_value = [0, 1]
+
+    index = retrieval.EmbeddingIndex(transcript, embeddings=embeddings)
+    assert index.search("question", k=2) == [1, 2]
+
+
+def test_get_bm25_index_is_cached(transcript):
+    assert retrieval.get_bm25_index(transcript) is retrieval.get_bm25_index(transcript)
@@ -0,0 +1,121 @@
+import asyncio
+from unittest.mock import MagicMock
+
+import httpx
+import pytest
+from openai import AuthenticationError, RateLimitError
+
+from yt_quick_insights import scheduler
+from yt_quick_insights.scheduler import RequestScheduler
+
+
+def make_error(error_class, status_code: int, headers: dict = None):
+    response = httpx.Response(
+        status_code,
+        request=httpx.Request("POST", "https://api.openai.com/v1/chat/completions"),
+        headers=headers or {},
+    )
+    return error_class("error", response=response, body=None)
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Record the delays instead of waiting"""
+    delays = []
+    monkeypatch.setattr(scheduler.time, "sleep", delays.append)
+    return delays
+
+
+def test_run_retries_transient_errors(sleeps):
+    func = MagicMock(side_effect=[make_error(RateLimitError, 429), "response"])
+
+    result = RequestScheduler(base_delay=0.5).run(func)
+
+    assert result == "response"
+    assert func.call_count == 2
+    assert 0 <= max(sleeps) <= 0.5
+
+
+def test_run_raises_after_max_retries(sleeps):
+    func = MagicMock(side_effect=make_error(RateLimitError, 429))
+
+    with pytest.raises(RateLimitError):
+        RequestScheduler(max_retries=2).run(func)
+
+    assert func.call_count == 3
+
+
+def test_run_does_not_retry_other_errors(sleeps):
+    func = MagicMock(side_effect=make_error(AuthenticationError, 401))
+
+    with pytest.raises(AuthenticationError):
+        RequestScheduler().run(func)
+
+    assert func.call_count == 1
+
+
+def test_backoff_honors_retry_after():
+    request_scheduler = RequestScheduler(base_delay=0.01)
+    error = make_error(RateLimitError, 429, headers={"retry-after": "2"})
+
+    assert request_scheduler._backoff(0, error) == 2
+
+
+def test_backoff_is_capped():
+    request_scheduler = RequestScheduler(base_delay=1, max_delay=3)
+    error = make_error(RateLimitError, 429)
+
+    assert all(request_scheduler._backoff(10, error) <= 3 for _ in range(100))
+
+
+def test_token_bucket_delays_requests_over_the_limit():
+    bucket = scheduler._TokenBucket(limit_per_minute=60)
+    now = bucket.updated
+
+    assert bucket.reserve(60, now) == 0
+    # One unit is refilled per second
+    assert bucket.reserve(2, now) == pytest.approx(2)
+    assert bucket.reserve(1, now + 2) == pytest.approx(1)
+
+
+def test_requests_per_minute_paces_requests(sleeps):
+    request_scheduler = RequestScheduler(requests_per_minute=2)
+
+    for _ in range(3):
+        request_scheduler.run(lambda: None)
+
+    assert sleeps[:2] == [0, 0]
+    assert sleeps[2] == pytest.approx(30, abs=0.1)
+
+
+def test_stream_retries_only_before_first_part(sleeps):
+    def failing_stream():
+        yield "first"
+        raise make_error(RateLimitError, 429)
+
+    func = MagicMock(side_effect=[make_error(RateLimitError, 429), failing_stream()])
+    parts = []
+
+    with pytest.raises(RateLimitError):
+        for part in RequestScheduler().stream(func):
+            parts.append(part)
+
+    assert parts == ["first"]
+    assert func.call_count == 2
+
+
+def test_arun_retries_transient_errors(monkeypatch):
+    async def no_sleep(delay):
+        pass
+
+    monkeypatch.setattr(scheduler.asyncio, "sleep", no_sleep)
+    attempts = []
+
+    async def func():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise make_error(RateLimitError, 429)
+        return "response"
+
+    assert asyncio.run(RequestScheduler().arun(func)) == "response"
+    assert len(attempts) == 2
@@ -0,0 +1,42 @@
+import pickle
+
+from yt_quick_insights.segments import Transcript, clean_text, normalize_segments
+
+
+def test_clean_text():
+    assert clean_text("Hello\xa0world\n[Music]  [Music] test ") == "Hello world test "
+
+
+def test_normalize_segments_without_timestamps():
+    transcript = normalize_segments(
+        [("Hello\xa0world", 0.0), ("[Music]", 1.5), (" this is\na test ", 3.0)]
+    )
+
+    assert transcript == "Hello world this is a test"
+    assert not transcript.has_timestamps
+    assert transcript.start_time(0) is None
+
+
+def test_normalize_segments_keeps_start_times():
+    segments = [
+        ("first segment", 0.0),
+        ("[Music]", 2.0),
+        ("second", 4.5),
+        ("third", 7.0),
+    ]
+    transcript = normalize_segments(segments, keep_timestamps=True)
+
+    assert transcript == "first segment second third"
+    assert list(transcript.offsets) == [0, 14, 21]
+    assert list(transcript.starts) == [0.0, 4.5, 7.0]
+    assert transcript.start_time(0) == 0.0
+    assert transcript.start_time(transcript.index("second")) == 4.5
+    assert transcript.start_time(len(transcript) - 1) == 7.0
+
+
+def test_transcript_can_be_pickled():
+    transcript = Transcript("text", offsets=[0], starts=[1.5])
+    restored = pickle.loads(pickle.dumps(transcript))
+
+    assert restored == "text"
+    assert list(restored.starts) == [1.5]
@@ -1,8 +1,12 @@
+import os
+import threading
+import time
 from enum import Enum
 from unittest.mock import patch
 
 import pytest
 
+from yt_quick_insights.config import settings
 from yt_quick_insights.task import TaskManager
 
 
@@ -59,3 +63,44 @@ def test_create_task_enum(merged_tasks):
         task_enum = tm.create_task_enum()
         assert isinstance(task_enum, type(Enum))
         assert set(task_enum.__members__.keys()) == set(merged_tasks.keys())
+
+
+def test_get_task_applies_changed_user_tasks(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "HOME_DIR", tmp_path)
+    user_file = tmp_path / ".insights" / "extraction_methods.yml"
+    user_file.parent.mkdir()
+    user_file.write_text("general_summary: First version")
+    tm = TaskManager()
+
+    assert tm.get_task("general_summary") == "First version"
+
+    user_file.write_text("general_summary: Second version")
+    os.utime(user_file, ns=(2_000_000_000, 2_000_000_000))
+
+    assert tm.get_task("general_summary") == "Second version"
+    assert tm.tasks["general_summary"] == "Second version"
+
+
+class SlowDict(dict):
+    def update(self, *args, **kwargs):
+        time.sleep(0.05)
+        super().update(*args, **kwargs)
+
+
+def test_get_task_during_reload_from_other_thread(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "HOME_DIR", tmp_path)
+    user_file = tmp_path / ".insights" / "extraction_methods.yml"
+    user_file.parent.mkdir()
+    user_file.write_text("general_summary: First version\ncustom: Custom")
+    tm = TaskManager()
+    tm.tasks = SlowDict(tm.tasks)
+
+    user_file.write_text("general_summary: Second version")
+    os.utime(user_file, ns=(2_000_000_000, 2_000_000_000))
+    reload = threading.Thread(target=tm.get_task, args=("general_summary",))
+    reload.start()
+    time.sleep(0.01)
+
+    assert tm.get_task("general_summary") == "Second version"
+    reload.join()
+    assert "custom" not in tm.tasks
@@ -0,0 +1,61 @@
+import os
+from unittest.mock import patch
+
+import pytest
+
+from yt_quick_insights import utils
+from yt_quick_insights.templates import TemplateRegistry, YamlFileCache
+
+
+def write_yaml(path, content: str, mtime_ns: int) -> None:
+    path.write_text(content)
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_registry_builds_each_template_once():
+    registry = TemplateRegistry()
+
+    with patch(
+        "yt_quick_insights.templates.utils.load_yaml_file",
+        wraps=utils.load_yaml_file,
+    ) as mock_load_yaml_file:
+        first = registry.get("prompt.yml", "prompt", ["video_title", "task"])
+        second = registry.get("prompt.yml", "prompt", ["video_title", "task"])
+        other = registry.get("deep_dive.yml", "prompt", ["question"])
+
+    assert first is second
+    assert first is not other
+    assert mock_load_yaml_file.call_count == 2
+
+
+def test_unwatched_file_is_parsed_once(tmp_path):
+    files = YamlFileCache()
+    write_yaml(tmp_path / "tasks.yml", "task: first", mtime_ns=1_000_000_000)
+    assert files.load("tasks.yml", tmp_path) == {"task": "first"}
+
+    write_yaml(tmp_path / "tasks.yml", "task: second", mtime_ns=2_000_000_000)
+
+    assert files.load("tasks.yml", tmp_path) == {"task": "first"}
+
+
+def test_watched_file_is_reloaded_after_change(tmp_path):
+    files = YamlFileCache()
+    write_yaml(tmp_path / "tasks.yml", "task: first", mtime_ns=1_000_000_000)
+    first = files.load("tasks.yml", tmp_path, watch=True)
+
+    assert files.load("tasks.yml", tmp_path, watch=True) is first
+
+    write_yaml(tmp_path / "tasks.yml", "task: second", mtime_ns=2_000_000_000)
+
+    assert files.load("tasks.yml", tmp_path, watch=True) == {"task": "second"}
+
+
+def test_missing_file_raises_until_created(tmp_path):
+    files = YamlFileCache()
+
+    with pytest.raises(FileNotFoundError):
+        files.load("tasks.yml", tmp_path, watch=True)
+
+    write_yaml(tmp_path / "tasks.yml", "task: first", mtime_ns=1_000_000_000)
+
+    assert files.load("tasks.yml", tmp_path, watch=True) == {"task": "first"}
@@ -0,0 +1,79 @@
+import re
+
+import pytest
+
+from yt_quick_insights import tokens
+
+
+@pytest.fixture(autouse=True)
+def no_tokenizer(monkeypatch):
+    """Use the character based estimate, tiktoken needs to download its encoding files"""
+    monkeypatch.setattr(tokens, "_get_encoding", lambda model_name: None)
+
+
+def test_count_tokens_estimate():
+    assert tokens.count_tokens("a" * 10, "gpt-4.1-mini") == 3
+    assert tokens.count_tokens("", "gpt-4.1-mini") == 0
+
+
+def test_split_text_short_text():
+    assert tokens.split_text("short text", 100, "gpt-4.1-mini") == ["short text"]
+
+
+def test_split_text_long_text():
+    text = " ".join(f"word{idx:03d}" for idx in range(500))
+    chunks = tokens.split_text(text, max_tokens=400, model_name="gpt-4.1-mini")
+
+    assert len(chunks) == 3
+    assert " ".join(chunks) == text
+    assert all(tokens.count_tokens(chunk, "gpt-4.1-mini") <= 400 for chunk in chunks)
+
+
+class FakeEncoding:
+    """Tokenizer with varying density: one token per word, but one token per digit"""
+
+    pattern = re.compile(r"\s?\d|\s?[^\s\d]+|\s")
+
+    def encode(self, text, disallowed_special=()):
+        return [match.start() for match in self.pattern.finditer(text)]
+
+    def decode_with_offsets(self, tokens):
+        return "", list(tokens)
+
+
+def test_split_text_respects_token_density(monkeypatch):
+    monkeypatch.setattr(tokens, "_get_encoding", lambda model_name: FakeEncoding())
+    words = " ".join("word" for _ in range(300))
+    numbers = " ".join("1234567890" for _ in range(30))
+    text = f"{words} {numbers} {words}"
+
+    chunks = tokens.split_text(text, max_tokens=200, model_name="gpt-4.1-mini")
+
+    assert " ".join(chunks) == text
+    assert len(chunks) == 5
+    assert all(tokens.count_tokens(chunk, "gpt-4.1-mini") <= 200 for chunk in chunks)
+
+
+def test_estimate_cost():
+    estimate = tokens.Estimate(
+        model_name="gpt-4o-mini", prompt_tokens=1000, completion_tokens=1000
+    )
+    assert estimate.cost > 0
+    assert tokens.Estimate("unknown-model", 1000, 1000).cost == 0
+
+
+def test_budget_refuses_estimates_above_remaining_budget():
+    estimate = tokens.Estimate("gpt-4o-mini", prompt_tokens=1000, completion_tokens=0)
+    budget = tokens.Budget(max_cost=estimate.cost * 2.5)
+
+    budget.reserve(estimate)
+    budget.reserve(estimate)
+    with pytest.raises(tokens.BudgetExceededError):
+        budget.reserve(estimate)
+    assert budget.reserved == pytest.approx(estimate.cost * 2)
+
+
+def test_unlimited_budget():
+    budget = tokens.Budget(max_cost=None)
+    budget.reserve(tokens.Estimate("gpt-4o-mini", 10**9, 10**9))
+    assert budget.reserved == 0
@@ -1,7 +1,13 @@
+import asyncio
+import threading
+import time
+from unittest.mock import AsyncMock, MagicMock
+
 import pytest
 import yaml
 
 from yt_quick_insights import utils
+from yt_quick_insights.config import settings
 
 
 @pytest.mark.parametrize(
@@ -53,3 +59,436 @@ def test_load_yaml_file_invalid_yaml(tmp_path):
     # Test loading an invalid YAML file
     with pytest.raises(yaml.YAMLError):
         utils.load_yaml_file(file_name, tmp_path)
+
+
+def test_map_concurrently_keeps_input_order():
+    def slow_square(number):
+        time.sleep(0.01 * (5 - number))
+        return number**2
+
+    progress = []
+    result = utils.map_concurrently(
+        slow_square, range(5), max_workers=5, on_done=progress.append
+    )
+    assert result == [0, 1, 4, 9, 16]
+    assert progress == [1, 2, 3, 4, 5]
+
+
+def test_map_concurrently_raises_worker_exception():
+    def fail(number):
+        raise RuntimeError(f"failed {number}")
+
+    with pytest.raises(RuntimeError, match="failed"):
+        utils.map_concurrently(fail, [1], max_workers=2)
+
+
+def test_map_pipeline_overlaps_fetch_and_process():
+    events = []
+    lock = threading.Lock()
+
+    def fetch(number):
+        with lock:
+            events.append(("fetch", number))
+        return number * 10
+
+    def process(number, fetched):
+        time.sleep(0.02)
+        with lock:
+            events.append(("process", number))
+        return fetched + number
+
+    progress = []
+    result = utils.map_pipeline(
+        fetch,
+        process,
+        range(4),
+        fetch_workers=2,
+        process_workers=1,
+        max_prefetch=2,
+        on_done=progress.append,
+    )
+    assert result == [0, 11, 22, 33]
+    assert progress == [1, 2, 3, 4]
+    # Later items are fetched while the first one is processed
+    assert events.index(("fetch", 1)) < events.index(("process", 0))
+
+
+def test_map_pipeline_bounds_items_in_flight():
+    lock = threading.Lock()
+    in_flight = 0
+    max_in_flight = 0
+
+    def fetch(number):
+        nonlocal in_flight, max_in_flight
+        with lock:
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+        return number
+
+    def process(number, value):
+        nonlocal in_flight
+        time.sleep(0.005)
+        with lock:
+            in_flight -= 1
+        return value
+
+    utils.map_pipeline(
+        fetch, process, range(10), fetch_workers=4, process_workers=1, max_prefetch=2
+    )
+    # One item being processed and at most two fetched items waiting for it
+    assert max_in_flight == 3
+
+
+def test_map_pipeline_draws_items_lazily():
+    drawn = []
+    processed = []
+
+    def items():
+        for number in range(6):
+            drawn.append(number)
+            yield number
+
+    def process(number, fetched):
+        processed.append(number)
+        # Only the item being processed and one prefetched item were drawn
+        assert len(drawn) <= number + 2
+        return fetched
+
+    result = utils.map_pipeline(
+        lambda number: number,
+        process,
+        items(),
+        fetch_workers=2,
+        process_workers=1,
+        max_prefetch=1,
+    )
+    assert result == list(range(6))
+
+
+def test_map_pipeline_raises_stage_exception():
+    def fail(number, fetched):
+        raise RuntimeError(f"failed {number}")
+
+    with pytest.raises(RuntimeError, match="failed"):
+        utils.map_pipeline(
+            lambda number: number,
+            fail,
+            [1, 2],
+            fetch_workers=1,
+            process_workers=1,
+            max_prefetch=1,
+        )
+
+
+@pytest.mark.parametrize(
+    "video_url",
+    [
+        "https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+        "https://youtube.com/watch?v=dQw4w9WgXcQ&t=42s",
+        "https://m.youtube.com/watch?list=PL123&v=dQw4w9WgXcQ",
+        "https://youtu.be/dQw4w9WgXcQ?si=abc",
+        "https://www.youtube.com/shorts/dQw4w9WgXcQ",
+        "https://www.youtube.com/embed/dQw4w9WgXcQ",
+    ],
+)
+def test_extract_video_id(video_url):
+    assert utils.extract_video_id(video_url) == "dQw4w9WgXcQ"
+
+
+def test_extract_playlist_id():
+    assert (
+        utils.extract_playlist_id("https://www.youtube.com/playlist?list=PL123_abc")
+        == "PL123_abc"
+    )
+    with pytest.raises(ValueError):
+        utils.extract_playlist_id("https://www.youtube.com/playlist")
+
+
+@pytest.mark.parametrize(
+    "video_url",
+    ["invalid_url", "https://example.com/watch?v=dQw4w9WgXcQ", "https://youtu.be/"],
+)
+def test_extract_video_id_invalid_url(video_url):
+    with pytest.raises(ValueError):
+        utils.extract_video_id(video_url)
+
+
+@pytest.mark.parametrize(
+    "video_url",
+    [
+        "https://youtu.be/dQw4w9WgXcQ?t=42",
+        "https://m.youtube.com/watch?v=dQw4w9WgXcQ&list=PL123",
+        "https://www.youtube.com/shorts/dQw4w9WgXcQ",
+    ],
+)
+def test_canonical_video_url(video_url):
+    assert (
+        utils.canonical_video_url(video_url)
+        == "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+    )
+
+
+def test_shared_calls_run_once_per_key():
+    shared = utils.SharedCalls()
+    release = threading.Event()
+    func = MagicMock(side_effect=lambda: release.wait() and "result")
+
+    threads = [
+        threading.Thread(target=lambda: results.append(shared.run("key", func)))
+        for _ in range(4)
+    ]
+    results = []
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["result"] * 4
+    func.assert_called_once()
+    assert shared.run("other key", lambda: "other") == "other"
+
+
+def test_shared_calls_share_errors_with_waiting_callers():
+    shared = utils.SharedCalls()
+    release = threading.Event()
+
+    def fail():
+        release.wait()
+        raise TimeoutError("timed out")
+
+    errors = []
+
+    def call():
+        try:
+            shared.run("key", fail)
+        except TimeoutError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(errors) == 2
+    assert errors[0] is errors[1]
+    # The failure is not replayed, later calls run again
+    assert shared.run("key", lambda: "result") == "result"
+
+
+def test_shared_calls_arun_once_per_key():
+    shared = utils.SharedCalls()
+
+    async def slow():
+        await asyncio.sleep(0.01)
+        return "result"
+
+    func = AsyncMock(side_effect=slow)
+
+    async def main():
+        return await asyncio.gather(*(shared.arun("key", func) for _ in range(4)))
+
+    assert asyncio.run(main()) == ["result"] * 4
+    func.assert_awaited_once()
+
+
+@pytest.fixture
+def mock_llm():
+    llm = MagicMock()
+    llm.model_name = "gpt-4.1-mini"
+    llm.temperature = 0
+    llm.invoke.return_value.content = "LLM Response"
+    return llm
+
+
+def test_response_cache_is_opened_once(monkeypatch, tmp_path):
+    cache = utils._get_response_cache(use_cache=True)
+    assert utils._get_response_cache(use_cache=True) is cache
+    assert utils._get_response_cache(use_cache=False) is None
+
+    monkeypatch.setattr(settings, "CACHE_DIR", tmp_path / "other")
+    assert utils._get_response_cache(use_cache=True).path.parent == tmp_path / "other"
+
+
+def test_invoke_llm_uses_response_cache(mock_llm):
+    assert utils.invoke_llm(mock_llm, "prompt") == "LLM Response"
+    assert utils.invoke_llm(mock_llm, "prompt") == "LLM Response"
+    mock_llm.invoke.assert_called_once_with("prompt")
+
+
+def test_invoke_llm_bypass_cache(mock_llm):
+    utils.invoke_llm(mock_llm, "prompt")
+    utils.invoke_llm(mock_llm, "prompt", use_cache=False)
+    assert mock_llm.invoke.call_count == 2
+
+
+def test_stream_llm_yields_chunks_and_caches_response(mock_llm):
+    mock_llm.stream.return_value = [
+        MagicMock(content="LLM "),
+        MagicMock(content="Response"),
+    ]
+
+    assert list(utils.stream_llm(mock_llm, "prompt")) == ["LLM ", "Response"]
+    # The complete response is cached and yielded at once
+    assert list(utils.stream_llm(mock_llm, "prompt")) == ["LLM Response"]
+    assert utils.invoke_llm(mock_llm, "prompt") == "LLM Response"
+    mock_llm.stream.assert_called_once_with("prompt")
+    mock_llm.invoke.assert_not_called()
+
+
+def test_amap_concurrently_keeps_input_order_and_limits_concurrency():
+    running = 0
+    max_running = 0
+
+    async def slow_square(number):
+        nonlocal running, max_running
+        running += 1
+        max_running = max(max_running, running)
+        await asyncio.sleep(0.01 * (5 - number))
+        running -= 1
+        return number**2
+
+    progress = []
+    result = asyncio.run(
+        utils.amap_concurrently(
+            slow_square, range(5), max_concurrency=2, on_done=progress.append
+        )
+    )
+    assert result == [0, 1, 4, 9, 16]
+    assert progress == [1, 2, 3, 4, 5]
+    assert max_running == 2
+
+
+def test_amap_concurrently_stops_after_failure():
+    started = []
+
+    async def fail_on_three(number):
+        started.append(number)
+        await asyncio.sleep(0.01)
+        if number == 3:
+            raise TimeoutError("timed out")
+        return number
+
+    async def main():
+        with pytest.raises(TimeoutError):
+            await utils.amap_concurrently(fail_on_three, range(20), max_concurrency=2)
+        started_at_failure = len(started)
+        await asyncio.sleep(0.1)
+        return started_at_failure
+
+    started_at_failure = asyncio.run(main())
+    assert started_at_failure < 20
+    assert len(started) == started_at_failure
+
+
+def test_ainvoke_llm_uses_response_cache(mock_llm):
+    mock_llm.ainvoke = AsyncMock(return_value=MagicMock(content="Async Response"))
+
+    assert asyncio.run(utils.ainvoke_llm(mock_llm, "prompt")) == "Async Response"
+    assert asyncio.run(utils.ainvoke_llm(mock_llm, "prompt")) == "Async Response"
+    assert utils.invoke_llm(mock_llm, "prompt") == "Async Response"
+    mock_llm.ainvoke.assert_awaited_once_with("prompt")
+
+
+def test_amap_pipeline_limits_each_stage():
+    running = {"fetch": 0, "process": 0}
+    max_running = {"fetch": 0, "process": 0}
+
+    async def run_stage(stage, delay):
+        running[stage] += 1
+        max_running[stage] = max(max_running[stage], running[stage])
+        await asyncio.sleep(delay)
+        running[stage] -= 1
+
+    async def fetch(number):
+        await run_stage("fetch", 0.005)
+        return number * 10
+
+    async def process(number, fetched):
+        await run_stage("process", 0.01 * (5 - number))
+        return fetched + number
+
+    progress = []
+    result = asyncio.run(
+        utils.amap_pipeline(
+            fetch,
+            process,
+            range(5),
+            fetch_concurrency=3,
+            process_concurrency=2,
+            max_prefetch=2,
+            on_done=progress.append,
+        )
+    )
+    assert result == [0, 11, 22, 33, 44]
+    assert progress == [1, 2, 3, 4, 5]
+    assert max_running == {"fetch": 3, "process": 2}
+
+
+def test_amap_pipeline_accepts_async_iterable():
+    async def items():
+        for number in range(3):
+            await asyncio.sleep(0)
+            yield number
+
+    async def fetch(number):
+        return number * 10
+
+    async def process(number, fetched):
+        return fetched + number
+
+    result = asyncio.run(
+        utils.amap_pipeline(
+            fetch,
+            process,
+            items(),
+            fetch_concurrency=2,
+            process_concurrency=2,
+            max_prefetch=1,
+        )
+    )
+    assert result == [0, 11, 22]
+
+
+def test_amap_pipeline_stops_after_failure():
+    pulled = []
+    fetched = []
+
+    async def items():
+        for number in range(20):
+            await asyncio.sleep(0.005)
+            pulled.append(number)
+            yield number
+
+    async def fetch(number):
+        fetched.append(number)
+        await asyncio.sleep(0.01)
+        return number
+
+    async def process(number, fetched_number):
+        if number == 2:
+            raise TimeoutError("timed out")
+        return fetched_number
+
+    async def main():
+        with pytest.raises(TimeoutError):
+            await utils.amap_pipeline(
+                fetch,
+                process,
+                items(),
+                fetch_concurrency=2,
+                process_concurrency=2,
+                max_prefetch=2,
+            )
+        state_at_failure = (len(pulled), len(fetched))
+        await asyncio.sleep(0.1)
+        return state_at_failure
+
+    pulled_at_failure, fetched_at_failure = asyncio.run(main())
+    assert pulled_at_failure < 20
+    assert len(pulled) == pulled_at_failure
+    assert len(fetched) == fetched_at_failure
@@ -0,0 +1,438 @@
+import asyncio
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from yt_quick_insights import PlaylistInsights, PlaylistProgress, QuickInsights, tokens
+from yt_quick_insights.config import settings
+from yt_quick_insights.task import ExtractionMethods
+
+
+@pytest.fixture
+def video_urls():
+    return [f"https://www.youtube.com/watch?v=VIDEO_{idx}" for idx in range(6)]
+
+
+@pytest.fixture
+def playlist_insights(video_urls):
+    with patch("yt_quick_insights.youtube_playlist.Playlist") as mock_playlist:
+        mock_playlist.return_value.length = len(video_urls)
+        mock_playlist.return_value.video_urls = video_urls
+        mock_playlist.return_value.url_generator.side_effect = lambda: iter(
+            mock_playlist.return_value.video_urls
+        )
+        yield PlaylistInsights(
+            playlist_url="https://www.youtube.com/playlist?list=PLAYLIST_ID",
+            model_name="gpt-4.1-mini",
+            api_key="API_KEY",
+            extraction_method=ExtractionMethods.general_summary,
+        )
+
+
+def test_collect_summaries_keeps_playlist_order(playlist_insights, video_urls):
+    def fake_quick_insights(url, **kwargs):
+        quick_insights = MagicMock()
+        # Later videos finish first
+        time.sleep(0.01 * (len(video_urls) - int(url[-1])))
+        quick_insights.extract.return_value = f"summary {url}"
+        return quick_insights
+
+    with patch(
+        "yt_quick_insights.youtube_playlist.get_quick_insights",
+        side_effect=fake_quick_insights,
+    ) as mock_get_quick_insights:
+        playlist_insights._collect_summaries()
+
+    assert playlist_insights.summary_collection == [
+        f"summary {url}" for url in video_urls
+    ]
+    assert mock_get_quick_insights.call_count == len(video_urls)
+
+
+def test_consolidate_small_playlist_uses_single_request(playlist_insights):
+    with patch.object(
+        PlaylistInsights, "_consolidate_group", return_value="final"
+    ) as mock_consolidate_group:
+        result = playlist_insights._consolidate(["a", "b", "c"], "instructions")
+
+    assert result == "final"
+    mock_consolidate_group.assert_called_once_with(
+        ["a", "b", "c"], "instructions", use_cache=True
+    )
+
+
+def test_consolidate_large_playlist_uses_tree_reduction(playlist_insights, monkeypatch):
+    monkeypatch.setattr(settings, "PLAYLIST_GROUP_SIZE", 3)
+    summaries = [str(idx) for idx in range(10)]
+
+    def join_group(group, additional_instructions, use_cache=True):
+        return "(" + ",".join(group) + ")"
+
+    with patch.object(
+        PlaylistInsights, "_consolidate_group", side_effect=join_group
+    ) as mock_consolidate_group:
+        result = playlist_insights._consolidate(summaries, "instructions")
+
+    # Level 1: 4 balanced groups of 3, 3, 2 and 2 summaries, level 2: 2 groups of 2, final: 1 group
+    assert result == "(((0,1,2),(3,4,5)),((6,7),(8,9)))"
+    assert mock_consolidate_group.call_count == 4 + 2 + 1
+
+
+@pytest.mark.parametrize("group_size", [2, 3, 10])
+@pytest.mark.parametrize("number_of_summaries", [2, 3, 7, 11, 25])
+def test_split_into_groups_is_balanced(monkeypatch, group_size, number_of_summaries):
+    monkeypatch.setattr(settings, "PLAYLIST_GROUP_SIZE", group_size)
+    summaries = [str(idx) for idx in range(number_of_summaries)]
+
+    groups = PlaylistInsights._split_into_groups(summaries)
+
+    sizes = [len(group) for group in groups]
+    assert [summary for group in groups for summary in group] == summaries
+    assert min(sizes) >= 2
+    assert max(sizes) - min(sizes) <= 1
+    # Only a group size of 2 needs a group of 3 for an odd number of summaries
+    assert max(sizes) <= max(group_size, 3)
+
+
+class RecordingProgress(PlaylistProgress):
+    def __init__(self):
+        self.events = []
+
+    def on_start(self, total_videos):
+        self.events.append(("start", total_videos))
+
+    def on_video_done(self, completed, total_videos):
+        self.events.append(("video_done", completed, total_videos))
+
+    def on_consolidate(self):
+        self.events.append(("consolidate",))
+
+    def on_finish(self):
+        self.events.append(("finish",))
+
+
+def test_extract_reports_progress_events(playlist_insights, video_urls):
+    progress = RecordingProgress()
+    with (
+        patch("yt_quick_insights.youtube_playlist.get_quick_insights"),
+        patch.object(PlaylistInsights, "_consolidate", return_value="final"),
+    ):
+        result = playlist_insights.extract("instructions", progress=progress)
+
+    total = len(video_urls)
+    assert result == "final"
+    assert progress.events == [
+        ("start", total),
+        *[("video_done", completed, total) for completed in range(1, total + 1)],
+        ("consolidate",),
+        ("finish",),
+    ]
+
+
+def test_extract_reports_finish_if_consolidation_fails(playlist_insights):
+    progress = RecordingProgress()
+    with (
+        patch.object(PlaylistInsights, "_collect_summaries"),
+        patch.object(
+            PlaylistInsights, "_consolidate", side_effect=TimeoutError("timed out")
+        ),
+    ):
+        with pytest.raises(TimeoutError):
+            playlist_insights.extract("instructions", progress=progress)
+
+    assert progress.events[-2:] == [("consolidate",), ("finish",)]
+
+
+def test_aextract_keeps_playlist_order(playlist_insights, video_urls):
+    async def fake_quick_insights(url, **kwargs):
+        quick_insights = MagicMock()
+        await asyncio.sleep(0.01 * (len(video_urls) - int(url[-1])))
+        quick_insights.aextract = AsyncMock(return_value=f"summary {url}")
+        return quick_insights
+
+    progress = RecordingProgress()
+    with (
+        patch(
+            "yt_quick_insights.youtube_playlist.aget_quick_insights",
+            side_effect=fake_quick_insights,
+        ),
+        patch.object(
+            PlaylistInsights, "_aconsolidate_group", AsyncMock(return_value="final")
+        ),
+    ):
+        result = asyncio.run(
+            playlist_insights.aextract("instructions", progress=progress)
+        )
+
+    assert result == "final"
+    assert playlist_insights.summary_collection == [
+        f"summary {url}" for url in video_urls
+    ]
+    assert progress.events[-2:] == [("consolidate",), ("finish",)]
+
+
+def test_playlist_budget_stops_pending_videos(playlist_insights):
+    estimate = tokens.Estimate("gpt-4o-mini", prompt_tokens=1000, completion_tokens=0)
+
+    def fake_quick_insights(url, **kwargs):
+        quick_insights = MagicMock(transcript=f"transcript {url}")
+        quick_insights.extract.side_effect = lambda budget, **kwargs: budget.reserve(
+            estimate
+        )
+        return quick_insights
+
+    max_cost = estimate.cost * 2.5
+
+    with patch(
+        "yt_quick_insights.youtube_playlist.get_quick_insights",
+        side_effect=fake_quick_insights,
+    ):
+        with pytest.raises(tokens.BudgetExceededError):
+            playlist_insights.extract("instructions", max_cost=max_cost)
+
+    assert playlist_insights.budget.max_cost == max_cost
+    assert playlist_insights.budget.reserved == pytest.approx(estimate.cost * 2)
+
+
+def test_video_above_video_budget_is_skipped(playlist_insights, monkeypatch):
+    video_urls = [f"https://www.youtube.com/watch?v=VIDEO_{idx}" for idx in range(3)]
+    playlist_insights.playlist.video_urls = video_urls
+    playlist_insights.playlist.length = len(video_urls)
+    monkeypatch.setattr(tokens, "_get_encoding", lambda model_name: None)
+
+    def fake_quick_insights(url, **kwargs):
+        words = 5000 if url == video_urls[1] else 50
+        return QuickInsights(
+            title=url, transcript=url + " word" * words, task="Summarize"
+        )
+
+    oversized = fake_quick_insights(video_urls[1]).estimate("gpt-4.1-mini")
+    monkeypatch.setattr(settings, "MAX_COST_PER_VIDEO", oversized.cost / 2)
+    llm = MagicMock()
+    llm.invoke.side_effect = lambda prompt: MagicMock(
+        content=next(f"summary {url}" for url in video_urls if url in prompt)
+    )
+
+    with (
+        patch(
+            "yt_quick_insights.youtube_playlist.get_quick_insights",
+            side_effect=fake_quick_insights,
+        ),
+        patch("yt_quick_insights.utils.initialize_llm", return_value=llm),
+    ):
+        playlist_insights._collect_summaries(use_cache=False)
+
+    assert playlist_insights.summary_collection == [
+        f"summary {video_urls[0]}",
+        f"summary {video_urls[2]}",
+    ]
+    assert list(playlist_insights.failed_videos) == [video_urls[1]]
+    assert llm.invoke.call_count == 2
+
+
+def test_failed_videos_keep_partial_results(playlist_insights, video_urls):
+    def fake_quick_insights(url, **kwargs):
+        quick_insights = MagicMock()
+        if url == video_urls[1]:
+            quick_insights.extract.side_effect = TimeoutError("Request timed out")
+        else:
+            quick_insights.extract.return_value = f"summary {url}"
+        return quick_insights
+
+    with patch(
+        "yt_quick_insights.youtube_playlist.get_quick_insights",
+        side_effect=fake_quick_insights,
+    ):
+        playlist_insights._collect_summaries()
+
+    assert playlist_insights.summary_collection == [
+        f"summary {url}" for url in video_urls if url != video_urls[1]
+    ]
+    assert playlist_insights.failed_videos == {video_urls[1]: "Request timed out"}
+
+
+def test_all_videos_failed_raises(playlist_insights):
+    quick_insights = MagicMock()
+    quick_insights.extract.side_effect = TimeoutError("Request timed out")
+
+    with patch(
+        "yt_quick_insights.youtube_playlist.get_quick_insights",
+        return_value=quick_insights,
+    ):
+        with pytest.raises(RuntimeError, match="None of the 6 videos"):
+            playlist_insights._collect_summaries()
+
+
+def test_rerun_only_summarizes_new_videos(playlist_insights, video_urls):
+    def fake_quick_insights(url, **kwargs):
+        quick_insights = MagicMock()
+        quick_insights.extract.return_value = f"summary {url}"
+        return quick_insights
+
+    with patch(
+        "yt_quick_insights.youtube_playlist.get_quick_insights",
+        side_effect=fake_quick_insights,
+    ) as mock_get_quick_insights:
+        playlist_insights._collect_summaries()
+        new_video = "https://www.youtube.com/watch?v=VIDEO_NEW"
+        playlist_insights.playlist.video_urls = video_urls + [new_video]
+        # The cached video URLs of the playlist expired
+        playlist_insights.playlist_cache.clear()
+        playlist_insights._collect_summaries()
+
+    assert mock_get_quick_insights.call_count == len(video_urls) + 1
+    assert mock_get_quick_insights.call_args.kwargs["url"] == new_video
+    assert playlist_insights.summary_collection == [
+        f"summary {url}" for url in video_urls + [new_video]
+    ]
+
+
+def test_rerun_without_cache_summarizes_all_videos(playlist_insights, video_urls):
+    quick_insights = MagicMock()
+    quick_insights.extract.return_value = "summary"
+
+    with patch(
+        "yt_quick_insights.youtube_playlist.get_quick_insights",
+        return_value=quick_insights,
+    ) as mock_get_quick_insights:
+        playlist_insights._collect_summaries()
+        playlist_insights._collect_summaries(use_cache=False)
+
+    assert mock_get_quick_insights.call_count == 2 * len(video_urls)
+
+
+def test_video_urls_are_cached_between_runs(playlist_insights, video_urls):
+    quick_insights = MagicMock()
+    quick_insights.extract.return_value = "summary"
+
+    with patch(
+        "yt_quick_insights.youtube_playlist.get_quick_insights",
+        return_value=quick_insights,
+    ):
+        playlist_insights._collect_summaries()
+        playlist_insights._collect_summaries()
+
+    assert playlist_insights.playlist.url_generator.call_count == 1
+    assert playlist_insights.playlist_length == len(video_urls)
+    assert playlist_insights.summary_collection == ["summary"]
+
+
+def test_video_urls_are_enumerated_again_without_cache(playlist_insights):
+    playlist_insights.playlist_cache.set_video_urls("PLAYLIST_ID", ["stale"])
+
+    assert list(playlist_insights._iter_video_urls(use_cache=False)) == list(
+        playlist_insights.playlist.video_urls
+    )
+    assert list(playlist_insights._iter_video_urls()) == list(
+        playlist_insights.playlist.video_urls
+    )
+
+
+def test_aextract_streams_video_urls(playlist_insights, video_urls):
+    async def fake_quick_insights(url, **kwargs):
+        quick_insights = MagicMock(transcript=f"transcript {url}")
+        quick_insights.aextract = AsyncMock(return_value=f"summary {url}")
+        return quick_insights
+
+    with patch(
+        "yt_quick_insights.youtube_playlist.aget_quick_insights",
+        side_effect=fake_quick_insights,
+    ):
+        asyncio.run(playlist_insights._acollect_summaries())
+
+    assert playlist_insights.summary_collection == [
+        f"summary {url}" for url in video_urls
+    ]
+    assert playlist_insights._get_cached_video_urls() == video_urls
+
+
+def test_duplicate_videos_are_summarized_once(playlist_insights, video_urls):
+    playlist_insights.playlist.video_urls = video_urls + [
+        video_urls[0].replace("https://www.youtube.com/watch?v=", "https://youtu.be/")
+    ]
+
+    def fake_quick_insights(url, **kwargs):
+        quick_insights = MagicMock(transcript=f"transcript {url}")
+        quick_insights.extract.return_value = f"summary {url}"
+        return quick_insights
+
+    with patch(
+        "yt_quick_insights.youtube_playlist.get_quick_insights",
+        side_effect=fake_quick_insights,
+    ) as mock_get_quick_insights:
+        playlist_insights._collect_summaries()
+
+    assert mock_get_quick_insights.call_count == len(video_urls)
+    assert playlist_insights.playlist_length == len(video_urls)
+
+
+@pytest.mark.parametrize("max_concurrency", [1, 6])
+def test_identical_transcripts_are_extracted_once(
+    playlist_insights, video_urls, monkeypatch, max_concurrency
+):
+    # One video at a time finds the stored summary, all videos at once share the running extraction
+    monkeypatch.setattr(settings, "MAX_CONCURRENCY", max_concurrency)
+    quick_insights = MagicMock(transcript="the same transcript")
+    quick_insights.extract.side_effect = lambda **kwargs: time.sleep(0.05) or "summary"
+
+    with patch(
+        "yt_quick_insights.youtube_playlist.get_quick_insights",
+        return_value=quick_insights,
+    ):
+        playlist_insights._collect_summaries()
+
+    assert quick_insights.extract.call_count == 1
+    assert playlist_insights.summary_collection == ["summary"]
+    assert not playlist_insights._shared_extractions._futures
+    # Every video stores the summary, a rerun finds all of them in the cache
+    assert all(
+        playlist_insights._get_cached_summary(
+            playlist_insights._summary_key(url), use_cache=True
+        )
+        for url in video_urls
+    )
+
+
+def test_identical_transcript_of_new_video_uses_stored_summary(
+    playlist_insights, video_urls
+):
+    def fake_quick_insights(url, **kwargs):
+        quick_insights = MagicMock(transcript="the same transcript")
+        quick_insights.extract.return_value = f"summary {url}"
+        return quick_insights
+
+    first = playlist_insights._summarize_video(
+        video_urls[0], fake_quick_insights(video_urls[0])
+    )
+    reupload = fake_quick_insights(video_urls[1])
+    second = playlist_insights._summarize_video(video_urls[1], reupload)
+
+    assert first == second == f"summary {video_urls[0]}"
+    reupload.extract.assert_not_called()
+
+
+def test_progress_total_matches_processed_videos(playlist_insights, video_urls):
+    # YouTube reports the length including the duplicate
+    playlist_insights.playlist.video_urls = video_urls + [video_urls[0]]
+    playlist_insights.playlist.length = len(video_urls) + 1
+    progress = RecordingProgress()
+
+    with patch("yt_quick_insights.youtube_playlist.get_quick_insights"):
+        playlist_insights._collect_summaries(progress=progress)
+
+    video_done = [event for event in progress.events if event[0] == "video_done"]
+    assert progress.events[0] == ("start", len(video_urls) + 1)
+    assert all(completed <= total for _, completed, total in video_done)
+    assert video_done[-1] == ("video_done", len(video_urls), len(video_urls))
+
+
+def test_progress_total_ignores_cache_without_use_cache(playlist_insights, video_urls):
+    playlist_insights.playlist_cache.set_video_urls("PLAYLIST_ID", ["stale"])
+    progress = RecordingProgress()
+
+    with patch("yt_quick_insights.youtube_playlist.get_quick_insights"):
+        playlist_insights._collect_summaries(use_cache=False, progress=progress)
+
+    assert progress.events[0] == ("start", len(video_urls))
+    assert progress.events[-1] == ("video_done", len(video_urls), len(video_urls))
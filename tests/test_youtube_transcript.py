@@ -1,6 +1,8 @@
 from unittest.mock import patch, MagicMock
 
 import pytest
+from pytube.exceptions import PytubeError
+from youtube_transcript_api import TranscriptsDisabled
 
 from yt_quick_insights import YoutubeTranscript
 
@@ -11,35 +13,54 @@ def youtube_transcript():
 
 
 @pytest.fixture
-def mock_loader():
-    with patch("yt_quick_insights.youtube_transcript.YoutubeLoader") as mock:
+def mock_transcript_api():
+    with patch("yt_quick_insights.youtube_transcript.YouTubeTranscriptApi") as mock:
+        fetched_transcript = MagicMock()
+        fetched_transcript.snippets = [
+            MagicMock(text="Test", start=0.0),
+            MagicMock(text="Content", start=1.5),
+        ]
+        transcript_list = mock.return_value.list.return_value
+        transcript_list.find_transcript.return_value.fetch.return_value = (
+            fetched_transcript
+        )
         yield mock
 
 
-def test_download_from_url_success(youtube_transcript, mock_loader):
-    mock_document = MagicMock()
-    mock_document.metadata = {"title": "Test Title"}
-    mock_document.page_content = "Test Content"
-    mock_loader.from_youtube_url.return_value.load.return_value = [mock_document]
+@pytest.fixture
+def mock_youtube():
+    with patch("yt_quick_insights.youtube_transcript.YouTube") as mock:
+        mock.return_value.title = "Test Title"
+        yield mock
+
 
+def test_download_from_url_success(
+    youtube_transcript, mock_transcript_api, mock_youtube
+):
     title, transcript = youtube_transcript.download_from_url(
         "https://www.youtube.com/watch?v=VIDEO_ID", "en"
     )
 
     assert title == "Test Title"
     assert transcript == "Test Content"
-    mock_loader.from_youtube_url.assert_called_once()
+    assert transcript.start_time(transcript.index("Content")) == 1.5
+    mock_transcript_api.return_value.list.assert_called_once_with("VIDEO_ID")
+    mock_youtube.assert_called_once_with("https://www.youtube.com/watch?v=VIDEO_ID")
 
 
-def test_download_from_url_invalid_url(youtube_transcript, mock_loader):
-    mock_loader.from_youtube_url.side_effect = ValueError
-
+def test_download_from_url_invalid_url(
+    youtube_transcript, mock_transcript_api, mock_youtube
+):
     with pytest.raises(ValueError, match="Please provide a valid YouTube URL"):
         youtube_transcript.download_from_url("invalid_url", "en")
 
+    mock_transcript_api.return_value.list.assert_not_called()
+
 
-def test_download_from_url_no_transcript(youtube_transcript, mock_loader):
-    mock_loader.from_youtube_url.return_value.load.side_effect = IndexError
+def test_download_from_url_no_transcript(
+    youtube_transcript, mock_transcript_api, mock_youtube
+):
+    mock_transcript_api.return_value.list.side_effect = TranscriptsDisabled("VIDEO_ID")
 
     with pytest.raises(IndexError, match="Video does not have a transcript"):
         youtube_transcript.download_from_url(
@@ -47,7 +68,47 @@ def test_download_from_url_no_transcript(youtube_transcript, mock_loader):
         )
 
 
+def test_download_from_url_title_failure_does_not_download_again(
+    youtube_transcript, mock_transcript_api, mock_youtube
+):
+    type(mock_youtube.return_value).title = property(MagicMock(side_effect=PytubeError))
+
+    title, transcript = youtube_transcript.download_from_url(
+        "https://www.youtube.com/watch?v=VIDEO_ID", "en"
+    )
+
+    assert title == YoutubeTranscript.TITLE_NOT_AVAILABLE
+    assert transcript == "Test Content"
+    mock_transcript_api.return_value.list.assert_called_once()
+
+
 def test_clean_text():
     text = "Hello\xa0world\n[Music] This is a test"
     cleaned_text = YoutubeTranscript._clean_text(text)
     assert cleaned_text == "Hello world This is a test"
+
+
+def test_download_from_url_uses_cache(
+    youtube_transcript, mock_transcript_api, mock_youtube
+):
+    first = youtube_transcript.download_from_url("https://youtu.be/VIDEO_ID", "en")
+    second = YoutubeTranscript().download_from_url(
+        "https://www.youtube.com/watch?v=VIDEO_ID&t=42", "en"
+    )
+
+    assert first == second == ("Test Title", "Test Content")
+    mock_transcript_api.return_value.list.assert_called_once()
+
+
+def test_download_from_url_without_cache(mock_transcript_api, mock_youtube):
+    for _ in range(2):
+        YoutubeTranscript(use_cache=False).download_from_url(
+            "https://www.youtube.com/watch?v=VIDEO_ID", "en"
+        )
+
+    assert mock_transcript_api.return_value.list.call_count == 2
+
+
+def test_transcript_cache_is_opened_once():
+    assert YoutubeTranscript().cache is YoutubeTranscript().cache
+    assert YoutubeTranscript(use_cache=False).cache is None
@@ -1,4 +1,36 @@
-from .youtube_transcript import YoutubeTranscript
-from .quick_insights import QuickInsights, DeepDive
-from .quick_insight_helper import get_quick_insights
-from .youtube_playlist import PlaylistInsights
+import importlib
+from typing import TYPE_CHECKING
+
+# The public classes are imported on first access (PEP 562), importing the package does not load
+# langchain, openai or pytube. This keeps the startup of the CLI and of scripts fast.
+_LAZY_ATTRIBUTES = {
+    "YoutubeTranscript": ".youtube_transcript",
+    "QuickInsights": ".quick_insights",
+    "DeepDive": ".quick_insights",
+    "get_quick_insights": ".quick_insight_helper",
+    "aget_quick_insights": ".quick_insight_helper",
+    "PlaylistInsights": ".youtube_playlist",
+    "PlaylistProgress": ".youtube_playlist",
+}
+
+__all__ = list(_LAZY_ATTRIBUTES)
+
+if TYPE_CHECKING:
+    from .youtube_transcript import YoutubeTranscript
+    from .quick_insights import QuickInsights, DeepDive
+    from .quick_insight_helper import get_quick_insights, aget_quick_insights
+    from .youtube_playlist import PlaylistInsights, PlaylistProgress
+
+
+def __getattr__(name: str):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    # Later accesses find the attribute without calling __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
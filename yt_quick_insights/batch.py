@@ -0,0 +1,256 @@
+import csv
+import json
+import threading
+from pathlib import Path
+from typing import Callable, Optional
+
+import typer
+
+from yt_quick_insights import QuickInsights, get_quick_insights, metrics, utils
+from yt_quick_insights.cache import SummaryCache
+from yt_quick_insights.config import settings
+from yt_quick_insights.task import ExtractionMethods, task_manager
+
+
+def read_video_urls(input_file: Path) -> list[str]:
+    """
+    Read video URLs from a text, CSV or JSONL file.
+
+    - .txt: one URL per line, empty lines and lines starting with "#" are ignored
+    - .csv: the "url" column, or the first column if there is no "url" column
+    - .jsonl: one JSON object with an "url" key (or a plain JSON string) per line
+
+    Args:
+        input_file: Path to the input file
+
+    Returns:
+        The video URLs in file order
+
+    Raises:
+        ValueError: If the file format is not supported or a JSONL line has no URL
+    """
+    suffix = input_file.suffix.lower()
+    with open(input_file, "r", encoding="utf-8", newline="") as file:
+        if suffix == ".csv":
+            rows = list(csv.reader(file))
+            if not rows:
+                return []
+            header = [column.strip().lower() for column in rows[0]]
+            if "url" in header:
+                column = header.index("url")
+                rows = rows[1:]
+            else:
+                column = 0
+            urls = [row[column] for row in rows if len(row) > column]
+        elif suffix == ".jsonl":
+            urls = []
+            for line_number, line in enumerate(file, start=1):
+                if line.strip():
+                    entry = json.loads(line)
+                    if isinstance(entry, str):
+                        urls.append(entry)
+                    elif isinstance(entry, dict) and "url" in entry:
+                        urls.append(entry["url"])
+                    else:
+                        raise ValueError(f"{input_file}:{line_number}: missing 'url'")
+        elif suffix in (".txt", ""):
+            urls = [line for line in file if not line.lstrip().startswith("#")]
+        else:
+            raise ValueError(
+                f'Unsupported file format "{suffix}", use a .txt, .csv or .jsonl file.'
+            )
+
+    return [url.strip() for url in urls if url.strip()]
+
+
+class BatchRunner:
+    """
+    This class provides functionality to extract insights from a large number of YouTube videos.
+    Videos are processed concurrently and every result is appended to a JSONL file as soon as it is available.
+    The output file doubles as checkpoint: videos with a successful result are skipped when the job is restarted,
+    so an interrupted job resumes where it stopped and failed videos are retried.
+    """
+
+    def __init__(
+        self,
+        output_file: Path,
+        extraction_method: ExtractionMethods,
+        model_name: str,
+        api_key: str,
+        use_cache: bool = True,
+    ):
+        """
+        Initialize the class with the output file, extraction method, OpenAI model name and OpenAI API key.
+
+        Args:
+            output_file: JSONL file the results are appended to
+            extraction_method: Method used to extract insights from the videos
+            model_name: OpenAI model name
+            api_key: OpenAI API key
+            use_cache: Whether to use the persistent summary and LLM response caches
+        """
+        self.output_file = output_file
+        self.extraction_method = extraction_method
+        self.model_name = model_name
+        self.api_key = api_key
+        self.use_cache = use_cache
+        self._lock = threading.Lock()
+        self._shared_extractions = utils.SharedCalls()
+        self.summary_cache = SummaryCache() if settings.SUMMARY_CACHE_ENABLED else None
+
+    @staticmethod
+    def _video_key(url: str) -> str:
+        """Return the canonical URL of a video, so that different URL forms of a video are processed once"""
+        try:
+            return utils.canonical_video_url(url)
+        except ValueError:
+            # Invalid URLs are processed as they are and fail with a useful error message
+            return url
+
+    def load_checkpoint(self) -> set[str]:
+        """
+        Return the URLs which already have a successful result in the output file.
+        Incomplete lines of an interrupted run are ignored.
+
+        Returns:
+            The finished video URLs
+        """
+        if not self.output_file.exists():
+            return set()
+
+        finished = set()
+        with open(self.output_file, "r", encoding="utf-8") as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if record.get("status") == "ok":
+                    finished.add(record["url"])
+        return finished
+
+    def _has_incomplete_last_line(self) -> bool:
+        """Check if an interrupted run left an incomplete last line in the output file"""
+        if not self.output_file.exists() or self.output_file.stat().st_size == 0:
+            return False
+        with open(self.output_file, "rb") as file:
+            file.seek(-1, 2)
+            return file.read(1) != b"\n"
+
+    def _extract(self, quick_insights: QuickInsights) -> str:
+        """
+        Extract insights from a transcript, identical transcripts (re-uploads, mirrors) are summarized once.
+        Summaries are stored by transcript, so they are also reused across jobs and playlists.
+        """
+        transcript_key = SummaryCache.make_transcript_key(
+            transcript_hash=utils.content_hash(str(quick_insights.transcript)),
+            extraction_method=self.extraction_method.value,
+            model_name=self.model_name,
+            instructions=task_manager.get_task(self.extraction_method.value) or "",
+        )
+
+        def extract() -> str:
+            if self.use_cache and self.summary_cache is not None:
+                insights = self.summary_cache.get(transcript_key)
+                if insights is not None:
+                    return insights
+            insights = quick_insights.extract(
+                model_name=self.model_name,
+                api_key=self.api_key,
+                use_cache=self.use_cache,
+            )
+            if self.summary_cache is not None and isinstance(insights, str):
+                self.summary_cache.set(transcript_key, insights)
+            return insights
+
+        # Videos with the same transcript in progress at the same time wait for the first one
+        return self._shared_extractions.run(transcript_key, extract)
+
+    def _process(self, url: str) -> dict:
+        """
+        Extract insights from a single video.
+        Video specific errors are recorded, invalid OpenAI credentials abort the whole job.
+
+        Args:
+            url: YouTube video url
+
+        Returns:
+            The result record
+        """
+        record = {
+            "url": url,
+            "extraction_method": self.extraction_method.value,
+            "model": self.model_name,
+        }
+        try:
+            with metrics.track(url) as run:
+                quick_insights = get_quick_insights(
+                    url=url,
+                    task_details=self.extraction_method,
+                    video_language=settings.DEFAULT_LANGUAGES,
+                )
+                insights = self._extract(quick_insights)
+        except typer.Abort:
+            raise
+        except Exception as e:
+            return {**record, "status": "error", "error": str(e)}
+
+        return {
+            **record,
+            "status": "ok",
+            "title": quick_insights.title,
+            "insights": insights,
+            "prompt_tokens": run.prompt_tokens,
+            "completion_tokens": run.completion_tokens,
+            "cost": run.cost,
+        }
+
+    def run(
+        self,
+        video_urls: list[str],
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+    ) -> dict[str, int]:
+        """
+        Extract insights from all videos which do not have a successful result yet.
+
+        Args:
+            video_urls: YouTube video urls
+            progress_callback: Called with the number of finished videos and the number of videos to process
+
+        Returns:
+            Number of skipped, successful and failed videos
+        """
+        finished = {self._video_key(url) for url in self.load_checkpoint()}
+        pending_videos = {}
+        for url in video_urls:
+            key = self._video_key(url)
+            if key not in finished:
+                pending_videos.setdefault(key, url)
+        pending = list(pending_videos.values())
+        counts = {"skipped": len(video_urls) - len(pending), "ok": 0, "error": 0}
+
+        self.output_file.parent.mkdir(parents=True, exist_ok=True)
+        terminate_last_line = self._has_incomplete_last_line()
+        with open(self.output_file, "a", encoding="utf-8") as output:
+            if terminate_last_line:
+                output.write("\n")
+
+            def process_and_write(url: str) -> None:
+                record = self._process(url)
+                with self._lock:
+                    output.write(json.dumps(record, ensure_ascii=False) + "\n")
+                    output.flush()
+                    counts[record["status"]] += 1
+
+            utils.map_concurrently(
+                process_and_write,
+                pending,
+                max_workers=settings.MAX_CONCURRENCY,
+                on_done=(
+                    (lambda completed: progress_callback(completed, len(pending)))
+                    if progress_callback is not None
+                    else None
+                ),
+            )
+
+        return counts
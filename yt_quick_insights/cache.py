@@ -0,0 +1,383 @@
+import hashlib
+import json
+import sqlite3
+import time
+from contextlib import closing, contextmanager
+from pathlib import Path
+from typing import Iterator, Optional, Tuple
+
+from yt_quick_insights.config import settings
+from yt_quick_insights.segments import Transcript
+
+
+class SQLiteCache:
+    """
+    This class provides a small persistent key-value store backed by SQLite.
+    Entries expire after a time to live and the least recently used entries are evicted
+    as soon as the total size of the stored values exceeds the maximum size.
+    A cache which cannot be opened (unwritable directory, corrupt file) is disabled and behaves like an empty cache.
+    """
+
+    def __init__(self, path: Path, max_size: int, ttl: Optional[int] = None):
+        """
+        Initialize the cache and create the database file if it does not exist yet.
+
+        Args:
+            path: Location of the SQLite database file
+            max_size: Maximum total size of all stored values in bytes
+            ttl: Time to live of an entry in seconds, entries never expire if None
+        """
+        self.path = path
+        self.max_size = max_size
+        self.ttl = ttl
+        try:
+            self._create_table()
+            self.enabled = True
+        except (OSError, sqlite3.Error):
+            # A broken cache must never break the extraction, every lookup is a cache miss
+            self.enabled = False
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """
+        Open a new connection for a single transaction, connections are not shared between threads.
+        The transaction is committed (or rolled back on error) and the connection is closed afterward.
+        """
+        with closing(sqlite3.connect(self.path, timeout=30)) as conn, conn:
+            yield conn
+
+    def _create_table(self) -> None:
+        """Create the cache table"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, "
+                "value TEXT NOT NULL, "
+                "size INTEGER NOT NULL, "
+                "created_at REAL NOT NULL, "
+                "last_accessed REAL NOT NULL)"
+            )
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Return the cached value and mark it as recently used.
+
+        Args:
+            key: The cache key
+
+        Returns:
+            The cached value or None if the key is missing or expired
+        """
+        if not self.enabled:
+            return None
+        now = time.time()
+        try:
+            with self._connect() as conn:
+                row = conn.execute(
+                    "SELECT value, created_at FROM cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                value, created_at = row
+                if self.ttl is not None and now - created_at > self.ttl:
+                    conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                    return None
+                conn.execute(
+                    "UPDATE cache SET last_accessed = ? WHERE key = ?", (now, key)
+                )
+                return value
+        except sqlite3.Error:
+            # A broken cache must never break the extraction, treat it as a cache miss
+            return None
+
+    def set(self, key: str, value: str) -> None:
+        """
+        Store a value and evict the least recently used entries if the cache is full.
+
+        Args:
+            key: The cache key
+            value: The value to store
+        """
+        if not self.enabled:
+            return
+        now = time.time()
+        size = len(value.encode("utf-8"))
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO cache (key, value, size, created_at, last_accessed) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, value, size, now, now),
+                )
+                self._evict(conn)
+        except sqlite3.Error:
+            pass
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        """Remove expired entries and the least recently used entries exceeding the maximum size"""
+        if self.ttl is not None:
+            conn.execute(
+                "DELETE FROM cache WHERE created_at < ?", (time.time() - self.ttl,)
+            )
+        conn.execute(
+            "DELETE FROM cache WHERE key IN ("
+            "SELECT key FROM ("
+            "SELECT key, SUM(size) OVER (ORDER BY last_accessed DESC, rowid DESC) AS total "
+            "FROM cache) WHERE total > ?)",
+            (self.max_size,),
+        )
+
+    def clear(self) -> None:
+        """Remove all entries from the cache"""
+        if not self.enabled:
+            return
+        with self._connect() as conn:
+            conn.execute("DELETE FROM cache")
+
+    def __len__(self) -> int:
+        if not self.enabled:
+            return 0
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+
+class TranscriptCache(SQLiteCache):
+    """
+    Persistent store for YouTube transcripts and titles, keyed by video ID and language.
+    It is shared between the Streamlit app and the CLI.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        max_size: Optional[int] = None,
+        ttl: Optional[int] = None,
+    ):
+        """
+        Initialize the transcript cache, unspecified values are taken from the settings.
+
+        Args:
+            path: Location of the SQLite database file
+            max_size: Maximum total size of all stored transcripts in bytes
+            ttl: Time to live of a transcript in seconds
+        """
+        super().__init__(
+            path=path or settings.CACHE_DIR / "transcripts.sqlite",
+            max_size=max_size or settings.TRANSCRIPT_CACHE_MAX_SIZE,
+            ttl=ttl or settings.TRANSCRIPT_CACHE_TTL,
+        )
+
+    @staticmethod
+    def make_key(video_id: str, video_language: str | list[str]) -> str:
+        """
+        Build the cache key from the video ID and the requested transcript language(s).
+
+        Args:
+            video_id: The YouTube video ID
+            video_language: The language of the transcript. Example: "en" or ["en", "de"]
+
+        Returns:
+            The cache key
+        """
+        languages = (
+            [video_language] if isinstance(video_language, str) else video_language
+        )
+        return f"{video_id}:{','.join(lang.lower() for lang in languages)}"
+
+    def get_transcript(
+        self, video_id: str, video_language: str | list[str]
+    ) -> Optional[Tuple[str, Transcript]]:
+        """
+        Return the cached title and transcript of a video.
+
+        Args:
+            video_id: The YouTube video ID
+            video_language: The language of the transcript. Example: "en" or ["en", "de"]
+
+        Returns:
+            The title and transcript (with segment start times, if they were stored)
+            or None if the video is not cached
+        """
+        value = self.get(self.make_key(video_id, video_language))
+        if value is None:
+            return None
+        entry = json.loads(value)
+        return entry["title"], Transcript(
+            entry["transcript"],
+            offsets=entry.get("offsets"),
+            starts=entry.get("starts"),
+        )
+
+    def set_transcript(
+        self,
+        video_id: str,
+        video_language: str | list[str],
+        title: str,
+        transcript: str,
+    ) -> None:
+        """
+        Store the title and transcript of a video.
+
+        Args:
+            video_id: The YouTube video ID
+            video_language: The language of the transcript. Example: "en" or ["en", "de"]
+            title: The title of the video
+            transcript: The transcript of the video, segment start times of a Transcript are stored as well
+        """
+        entry = {"title": title, "transcript": str(transcript)}
+        if isinstance(transcript, Transcript) and transcript.has_timestamps:
+            entry["offsets"] = transcript.offsets.tolist()
+            entry["starts"] = transcript.starts.tolist()
+
+        self.set(
+            self.make_key(video_id, video_language),
+            json.dumps(entry),
+        )
+
+
+class ResponseCache(SQLiteCache):
+    """
+    Persistent store for LLM responses, keyed by a hash of the rendered prompt, the model name and the temperature.
+    Identical requests are answered from the cache without calling the model.
+    """
+
+    def __init__(self, path: Optional[Path] = None, max_size: Optional[int] = None):
+        """
+        Initialize the response cache, unspecified values are taken from the settings.
+
+        Args:
+            path: Location of the SQLite database file
+            max_size: Maximum total size of all stored responses in bytes
+        """
+        super().__init__(
+            path=path or settings.CACHE_DIR / "responses.sqlite",
+            max_size=max_size or settings.LLM_CACHE_MAX_SIZE,
+        )
+
+    @staticmethod
+    def make_key(prompt: str, model_name: str, temperature: Optional[float]) -> str:
+        """
+        Build the cache key from everything that influences the response.
+
+        Args:
+            prompt: The rendered prompt
+            model_name: The name of the model
+            temperature: The sampling temperature of the model
+
+        Returns:
+            SHA-256 hex digest used as cache key
+        """
+        content = json.dumps([prompt, model_name, temperature], ensure_ascii=False)
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+class SummaryCache(SQLiteCache):
+    """
+    Persistent store for the summaries of individual videos, keyed by video ID, extraction method and model.
+    Re-running a playlist only summarizes the videos which were added since the last run.
+    Summaries are also stored per transcript, so re-uploads and mirrors of a video are summarized once.
+    """
+
+    def __init__(self, path: Optional[Path] = None, max_size: Optional[int] = None):
+        """
+        Initialize the summary cache, unspecified values are taken from the settings.
+
+        Args:
+            path: Location of the SQLite database file
+            max_size: Maximum total size of all stored summaries in bytes
+        """
+        super().__init__(
+            path=path or settings.CACHE_DIR / "summaries.sqlite",
+            max_size=max_size or settings.SUMMARY_CACHE_MAX_SIZE,
+        )
+
+    @staticmethod
+    def make_key(
+        video_id: str, extraction_method: str, model_name: str, instructions: str
+    ) -> str:
+        """
+        Build the cache key of a video summary.
+
+        Args:
+            video_id: The YouTube video ID
+            extraction_method: Name of the extraction method
+            model_name: The name of the model
+            instructions: Instructions of the extraction method, summaries of edited methods are not reused
+
+        Returns:
+            The cache key
+        """
+        version = hashlib.sha256(instructions.encode("utf-8")).hexdigest()[:16]
+        return f"{video_id}:{extraction_method}:{model_name}:{version}"
+
+    @staticmethod
+    def make_transcript_key(
+        transcript_hash: str, extraction_method: str, model_name: str, instructions: str
+    ) -> str:
+        """
+        Build the cache key of a summary by the content of the transcript instead of the video ID.
+
+        Args:
+            transcript_hash: Hash of the transcript, see utils.content_hash
+            extraction_method: Name of the extraction method
+            model_name: The name of the model
+            instructions: Instructions of the extraction method, summaries of edited methods are not reused
+
+        Returns:
+            The cache key
+        """
+        return SummaryCache.make_key(
+            f"transcript-{transcript_hash}", extraction_method, model_name, instructions
+        )
+
+
+class PlaylistCache(SQLiteCache):
+    """
+    Persistent store for the video URLs of playlists, keyed by playlist ID.
+    Entries expire after a short time to live, so videos added to a playlist are picked up.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        max_size: Optional[int] = None,
+        ttl: Optional[int] = None,
+    ):
+        """
+        Initialize the playlist cache, unspecified values are taken from the settings.
+
+        Args:
+            path: Location of the SQLite database file
+            max_size: Maximum total size of all stored playlists in bytes
+            ttl: Time to live of a playlist in seconds
+        """
+        super().__init__(
+            path=path or settings.CACHE_DIR / "playlists.sqlite",
+            max_size=max_size or settings.PLAYLIST_CACHE_MAX_SIZE,
+            ttl=ttl or settings.PLAYLIST_CACHE_TTL,
+        )
+
+    def get_video_urls(self, playlist_id: str) -> Optional[list[str]]:
+        """
+        Return the cached video URLs of a playlist.
+
+        Args:
+            playlist_id: The YouTube playlist ID
+
+        Returns:
+            The video URLs in playlist order or None if the playlist is not cached or expired
+        """
+        value = self.get(playlist_id)
+        return None if value is None else json.loads(value)
+
+    def set_video_urls(self, playlist_id: str, video_urls: list[str]) -> None:
+        """
+        Store the video URLs of a playlist.
+
+        Args:
+            playlist_id: The YouTube playlist ID
+            video_urls: The video URLs in playlist order
+        """
+        self.set(playlist_id, json.dumps(video_urls))
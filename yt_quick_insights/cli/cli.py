@@ -1,19 +1,361 @@
 import subprocess
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, List, Optional
+from urllib.error import HTTPError
 
 import typer
 from rich import print
 
-from yt_quick_insights import utils
+from yt_quick_insights import metrics, utils
 from yt_quick_insights.config import settings
+from yt_quick_insights.task import ExtractionMethods
+from yt_quick_insights.tokens import BudgetExceededError
+
+# The extraction classes, langchain and rich.progress are imported inside the commands,
+# so lightweight commands like env-location start quickly.
 
 app = typer.Typer(name="yt-quick-insights")
 
+# Shared options of the extraction commands
+model_option = typer.Option(
+    settings.OPENAI_MODEL_NAME, "--model", "-m", help="OpenAI model name."
+)
+api_key_option = typer.Option(
+    None,
+    "--api-key",
+    help="OpenAI API key, defaults to OPENAI_API_KEY from the .env file or the environment.",
+)
+output_option = typer.Option(
+    None,
+    "--output",
+    "-o",
+    help="Save the result to this file instead of printing it.",
+)
+no_cache_option = typer.Option(
+    False, "--no-cache", help="Do not use the cached LLM responses."
+)
+stream_option = typer.Option(
+    False,
+    "--stream",
+    "-s",
+    help="Print the result to the terminal while it is generated.",
+)
+metrics_option = typer.Option(
+    None,
+    "--metrics",
+    help="Record tokens, cost, latency and cache hits per stage. "
+    "Files ending in .prom are overwritten with Prometheus counters, "
+    "other files are appended as JSON lines.",
+)
+
+
+def _get_api_key(api_key: Optional[str]) -> str:
+    """
+    Return the given API key or the default API key from the settings.
+
+    Raises:
+        typer.Exit: If no API key is available
+    """
+    api_key = api_key or settings.OPENAI_API_KEY
+    if not api_key:
+        print("[red bold]No OpenAI API key provided![/red bold]")
+        print(utils.env_information())
+        raise typer.Exit(code=1)
+    return api_key
+
+
+def _stream_output(chunks: Iterator[str]) -> str:
+    """Print the chunks as plain text while they are generated and return the complete result"""
+    parts = []
+    for chunk in chunks:
+        typer.echo(chunk, nl=False)
+        parts.append(chunk)
+    typer.echo()
+    return "".join(parts)
+
+
+def _write_output(result: str, output: Optional[Path]) -> None:
+    """Save the result to the output file or show it as markdown in the console"""
+    if output is None:
+        utils.show_markdown_output(result)
+    else:
+        utils.save_to_file(file_name=str(output), content=result)
+        print(f"Saved result to: [green bold]{output}[/green bold]")
+
+
+@contextmanager
+def _record_metrics(name: str, metrics_file: Optional[Path]) -> Iterator[None]:
+    """Track the metrics of the with block and write them to the metrics file, if one is given"""
+    with metrics.track(name) as run:
+        yield
+
+    if metrics_file is None:
+        return
+    if metrics_file.suffix == ".prom":
+        metrics_file.write_text(run.to_prometheus(), encoding="utf-8")
+    else:
+        run.write_jsonl(metrics_file)
+    print(
+        f"Used [green bold]{run.total_tokens}[/green bold] tokens (${run.cost:.4f}), "
+        f"{run.cache_hits} cache hits. Metrics: [green bold]{metrics_file}[/green bold]"
+    )
+
+
+@contextmanager
+def _exit_on_budget_exceeded() -> Iterator[None]:
+    """Print the error and exit if the estimated cost exceeds the budget"""
+    try:
+        yield
+    except BudgetExceededError as e:
+        print(f"[red bold]{e}[/red bold]")
+        raise typer.Exit(code=1)
+
+
+def _print_failed_videos(failed_videos: dict[str, str]) -> None:
+    """Print the videos of a playlist which were skipped because of an error"""
+    for video_url, error in failed_videos.items():
+        print(f"[yellow]Skipped {video_url}: {error}[/yellow]")
+
 
 @app.command(name="run", help="Start YouTube Quick Insights app.")
 def run_youtube_quick_insights():
     subprocess.run(["streamlit", "run", str(settings.STREAMLIT_APP)])
 
 
+@app.command(name="video", help="Extract insights from a YouTube video.")
+def video_insights(
+    url: str = typer.Argument(..., help="YouTube video URL."),
+    extraction_method: ExtractionMethods = typer.Option(
+        ExtractionMethods.general_summary,
+        "--extraction-method",
+        "-e",
+        help="How to summarize or extract knowledge from the video.",
+    ),
+    model_name: str = model_option,
+    api_key: Optional[str] = api_key_option,
+    output: Optional[Path] = output_option,
+    no_cache: bool = no_cache_option,
+    stream: bool = stream_option,
+    metrics_file: Optional[Path] = metrics_option,
+    estimate: bool = typer.Option(
+        False,
+        "--estimate",
+        help="Only print the estimated tokens and cost, without calling the model.",
+    ),
+):
+    if not estimate:
+        api_key = _get_api_key(api_key)
+    from yt_quick_insights import get_quick_insights
+
+    with _record_metrics("video", metrics_file), _exit_on_budget_exceeded():
+        try:
+            quick_insights = get_quick_insights(
+                url=url,
+                task_details=extraction_method,
+                video_language=settings.DEFAULT_LANGUAGES,
+            )
+        except (ValueError, IndexError) as e:
+            print(f"[red bold]{e}[/red bold]")
+            raise typer.Exit(code=1)
+
+        if estimate:
+            expected = quick_insights.estimate(model_name)
+            print(
+                f"Estimated usage: [green bold]{expected.prompt_tokens}[/green bold] prompt tokens, "
+                f"up to {expected.completion_tokens} completion tokens in {expected.requests} request(s), "
+                f"approx. [green bold]${expected.cost:.4f}[/green bold] with {model_name}."
+            )
+            return
+
+        if stream:
+            result = _stream_output(
+                quick_insights.stream(
+                    model_name=model_name, api_key=api_key, use_cache=not no_cache
+                )
+            )
+            if output is not None:
+                _write_output(result, output)
+            return
+
+        result = quick_insights.extract(
+            model_name=model_name, api_key=api_key, use_cache=not no_cache
+        )
+        _write_output(result, output)
+
+
+@app.command(
+    name="ask",
+    help="Ask one or more questions about a YouTube video. "
+    "Multiple questions are answered in a single request.",
+)
+def ask_question(
+    url: str = typer.Argument(..., help="YouTube video URL."),
+    questions: List[str] = typer.Argument(..., help="Questions about the video."),
+    model_name: str = model_option,
+    api_key: Optional[str] = api_key_option,
+    output: Optional[Path] = output_option,
+    no_cache: bool = no_cache_option,
+    stream: bool = stream_option,
+    metrics_file: Optional[Path] = metrics_option,
+):
+    from yt_quick_insights import DeepDive, YoutubeTranscript
+
+    api_key = _get_api_key(api_key)
+    with _record_metrics("ask", metrics_file):
+        try:
+            yt_title, yt_transcript = YoutubeTranscript().download_from_url(
+                video_url=url, video_language=settings.DEFAULT_LANGUAGES
+            )
+        except (ValueError, IndexError) as e:
+            print(f"[red bold]{e}[/red bold]")
+            raise typer.Exit(code=1)
+
+        deep_dive = DeepDive(
+            title=yt_title,
+            transcript=yt_transcript,
+            user_question=questions[0] if len(questions) == 1 else questions,
+        )
+        if stream:
+            result = _stream_output(
+                deep_dive.stream(
+                    model_name=model_name, api_key=api_key, use_cache=not no_cache
+                )
+            )
+            if output is not None:
+                _write_output(result, output)
+            return
+
+        result = deep_dive.extract(
+            model_name=model_name, api_key=api_key, use_cache=not no_cache
+        )
+        _write_output(result, output)
+
+
+@app.command(name="playlist", help="Extract insights from a YouTube playlist.")
+def playlist_insights(
+    url: str = typer.Argument(..., help="YouTube playlist URL."),
+    additional_instructions: str = typer.Option(
+        "No additional instructions, focus on the instructions above",
+        "--instructions",
+        "-i",
+        help="Additional instructions for summarizing the playlist.",
+    ),
+    extraction_method: ExtractionMethods = typer.Option(
+        ExtractionMethods.general_summary,
+        "--extraction-method",
+        "-e",
+        help="Extraction method used for the individual videos.",
+    ),
+    model_name: str = model_option,
+    api_key: Optional[str] = api_key_option,
+    output: Optional[Path] = output_option,
+    no_cache: bool = no_cache_option,
+    metrics_file: Optional[Path] = metrics_option,
+    max_cost: Optional[float] = typer.Option(
+        None,
+        "--max-cost",
+        help="Stop before the estimated cost of the playlist exceeds this amount in USD.",
+    ),
+):
+    from rich.progress import Progress
+
+    from yt_quick_insights import PlaylistInsights
+    from yt_quick_insights.cli.progress import RichPlaylistProgress
+
+    try:
+        utils.extract_playlist_id(url)
+    except ValueError as e:
+        print(f"[red bold]{e}[/red bold]")
+        raise typer.Exit(code=1)
+
+    api_key = _get_api_key(api_key)
+    with _record_metrics("playlist", metrics_file), _exit_on_budget_exceeded():
+        playlist = PlaylistInsights(
+            playlist_url=url,
+            model_name=model_name,
+            api_key=api_key,
+            extraction_method=extraction_method,
+        )
+
+        try:
+            with Progress(transient=True) as progress:
+                result = playlist.extract(
+                    additional_instructions=additional_instructions,
+                    use_cache=not no_cache,
+                    progress=RichPlaylistProgress(progress),
+                    max_cost=max_cost,
+                )
+        except (KeyError, HTTPError):
+            print(
+                "[red bold]Could not load the playlist, please provide a valid YouTube playlist URL "
+                "in the form of 'https://www.youtube.com/playlist?list=PLAYLIST_ID'[/red bold]"
+            )
+            raise typer.Exit(code=1)
+        except RuntimeError as e:
+            # No video of the playlist could be summarized
+            _print_failed_videos(playlist.failed_videos)
+            print(f"[red bold]{e}[/red bold]")
+            raise typer.Exit(code=1)
+        _print_failed_videos(playlist.failed_videos)
+        _write_output(result, output)
+
+
+@app.command(
+    name="batch",
+    help="Extract insights from all video URLs of a .txt, .csv or .jsonl file. "
+    "Interrupted jobs resume where they stopped.",
+)
+def batch_insights(
+    input_file: Path = typer.Argument(..., help="File with one video URL per entry."),
+    output_file: Path = typer.Argument(..., help="JSONL file for the results."),
+    extraction_method: ExtractionMethods = typer.Option(
+        ExtractionMethods.general_summary,
+        "--extraction-method",
+        "-e",
+        help="How to summarize or extract knowledge from the videos.",
+    ),
+    model_name: str = model_option,
+    api_key: Optional[str] = api_key_option,
+    no_cache: bool = no_cache_option,
+    metrics_file: Optional[Path] = metrics_option,
+):
+    from rich.progress import Progress
+
+    from yt_quick_insights.batch import BatchRunner, read_video_urls
+
+    api_key = _get_api_key(api_key)
+    with _record_metrics("batch", metrics_file):
+        try:
+            video_urls = read_video_urls(input_file)
+        except (OSError, ValueError) as e:
+            print(f"[red bold]{e}[/red bold]")
+            raise typer.Exit(code=1)
+
+        runner = BatchRunner(
+            output_file=output_file,
+            extraction_method=extraction_method,
+            model_name=model_name,
+            api_key=api_key,
+            use_cache=not no_cache,
+        )
+
+        with Progress(transient=True) as progress:
+            task = progress.add_task("Extracting insights from videos", total=None)
+            counts = runner.run(
+                video_urls,
+                progress_callback=lambda completed, total: progress.update(
+                    task, completed=completed, total=total
+                ),
+            )
+
+        print(
+            f"Finished: [green bold]{counts['ok']}[/green bold] successful, "
+            f"[red bold]{counts['error']}[/red bold] failed, "
+            f"{counts['skipped']} already done. Results: [green bold]{output_file}[/green bold]"
+        )
+
+
 @app.command(name="env-location", help="Display the location of the .env file.")
 def env_location():
     print(utils.env_information())
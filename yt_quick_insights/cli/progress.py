@@ -0,0 +1,22 @@
+from rich.progress import Progress
+
+from yt_quick_insights import PlaylistProgress
+
+
+class RichPlaylistProgress(PlaylistProgress):
+    """Display the progress of a playlist run with a rich progress bar."""
+
+    def __init__(self, progress: Progress):
+        self.progress = progress
+        self.task = progress.add_task("Extracting insights from videos", total=None)
+
+    def on_start(self, total_videos: int) -> None:
+        self.progress.update(self.task, total=total_videos)
+
+    def on_video_done(self, completed: int, total_videos: int) -> None:
+        self.progress.update(self.task, completed=completed)
+
+    def on_consolidate(self) -> None:
+        self.progress.update(
+            self.task, description="Consolidating insights from all videos"
+        )
@@ -0,0 +1,151 @@
+import asyncio
+import threading
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, Any, AsyncIterator, Optional
+from weakref import WeakKeyDictionary
+
+from yt_quick_insights.config import settings
+
+# httpx and langchain_openai are imported when the first client is created
+if TYPE_CHECKING:
+    import httpx
+    from langchain_openai import ChatOpenAI
+
+
+def _running_loop() -> Optional[asyncio.AbstractEventLoop]:
+    """Return the event loop running in the current thread, if there is one"""
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
+
+class LLMClientRegistry:
+    """
+    Reuse ChatOpenAI instances and their HTTP connection pools across requests,
+    keyed by model name, API key and model parameters.
+
+    All sync requests share one httpx.Client, so keep-alive connections (and their TLS handshakes) are reused
+    by every video of a playlist. Async connections are bound to the event loop that opened them,
+    therefore clients created inside a running event loop get an async connection pool of that loop.
+    The async pools are closed when the last session of their loop ends, see session.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._http_client: Optional["httpx.Client"] = None
+        self._llms: dict[tuple, "ChatOpenAI"] = {}
+        self._loop_llms: WeakKeyDictionary[
+            asyncio.AbstractEventLoop, dict[tuple, "ChatOpenAI"]
+        ] = WeakKeyDictionary()
+        self._loop_sessions: WeakKeyDictionary[asyncio.AbstractEventLoop, int] = (
+            WeakKeyDictionary()
+        )
+
+    @staticmethod
+    def _limits() -> "httpx.Limits":
+        import httpx
+
+        return httpx.Limits(
+            max_connections=settings.LLM_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.LLM_MAX_KEEPALIVE_CONNECTIONS,
+        )
+
+    @staticmethod
+    def _timeout() -> tuple[float, float, float, float]:
+        """Return the (connect, read, write, pool) timeouts, as hashable tuple as required by ChatOpenAI"""
+        return (
+            settings.LLM_CONNECT_TIMEOUT,
+            settings.LLM_TIMEOUT,
+            settings.LLM_TIMEOUT,
+            settings.LLM_TIMEOUT,
+        )
+
+    def _get_http_client(self) -> "httpx.Client":
+        """Return the shared sync HTTP client, must be called with the lock held"""
+        import httpx
+
+        if self._http_client is None:
+            self._http_client = httpx.Client(
+                limits=self._limits(), timeout=httpx.Timeout(self._timeout())
+            )
+        return self._http_client
+
+    def get(self, model_name: str, api_key: str, **params: Any) -> "ChatOpenAI":
+        """
+        Return the LLM instance for the model, API key and parameters, it is created on first use.
+
+        Args:
+            model_name: The name of the model to use
+            api_key: The API key to use
+            **params: Further ChatOpenAI parameters, e.g. temperature
+
+        Returns:
+            LLM instance
+        """
+        import httpx
+        from langchain_openai import ChatOpenAI
+
+        key = (model_name, api_key, tuple(sorted(params.items())))
+        loop = _running_loop()
+
+        with self._lock:
+            llms = self._llms if loop is None else self._loop_llms.setdefault(loop, {})
+            llm = llms.get(key)
+            if llm is None:
+                llm = ChatOpenAI(
+                    model_name=model_name,
+                    api_key=api_key,
+                    timeout=self._timeout(),
+                    http_client=self._get_http_client(),
+                    http_async_client=(
+                        httpx.AsyncClient(
+                            limits=self._limits(),
+                            timeout=httpx.Timeout(self._timeout()),
+                        )
+                        if loop is not None
+                        else None
+                    ),
+                    **params,
+                )
+                llms[key] = llm
+            return llm
+
+    @asynccontextmanager
+    async def session(self) -> AsyncIterator[None]:
+        """
+        Keep the async clients of the running event loop open while the block runs.
+        Sessions can be nested or run concurrently, the clients are closed when the last session of the loop ends.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._loop_sessions[loop] = self._loop_sessions.get(loop, 0) + 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._loop_sessions[loop] -= 1
+                last_session = self._loop_sessions[loop] == 0
+                if last_session:
+                    del self._loop_sessions[loop]
+            if last_session:
+                await self.aclose()
+
+    async def aclose(self) -> None:
+        """Close the async connections of the running event loop, new clients are created on next use"""
+        with self._lock:
+            llms = self._loop_llms.pop(asyncio.get_running_loop(), {})
+        for llm in llms.values():
+            await llm.http_async_client.aclose()
+
+    def clear(self) -> None:
+        """Forget all LLM instances and close the shared connections"""
+        with self._lock:
+            if self._http_client is not None:
+                self._http_client.close()
+            self._http_client = None
+            self._llms.clear()
+            self._loop_llms.clear()
+
+
+registry = LLMClientRegistry()
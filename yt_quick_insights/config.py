@@ -19,8 +19,56 @@ class Settings(BaseSettings):
     STREAMLIT_APP: Path = PROJECT_DIR / "frontend" / "streamlit_app.py"
     STYLES_CSS: Path = PROJECT_DIR / "frontend" / "static" / "styles.css"
 
+    # Maximum number of transcript tokens sent to the LLM in one request,
+    # longer transcripts are split into chunks and summarized with map-reduce
     MAX_TOKENS: int = 25_000
 
+    # HTTP connection pool and timeouts (seconds) of the OpenAI clients, shared by all requests
+    LLM_MAX_CONNECTIONS: int = 20
+    LLM_MAX_KEEPALIVE_CONNECTIONS: int = 10
+    LLM_TIMEOUT: float = 120.0
+    LLM_CONNECT_TIMEOUT: float = 10.0
+
+    # Pacing and retries of all LLM requests, set the limits of your OpenAI account (None disables the limit)
+    LLM_REQUESTS_PER_MINUTE: Optional[int] = None
+    LLM_TOKENS_PER_MINUTE: Optional[int] = None
+    LLM_MAX_RETRIES: int = 5
+    LLM_RETRY_BASE_DELAY: float = 1.0  # seconds
+    LLM_RETRY_MAX_DELAY: float = 60.0  # seconds
+
+    # Maximum number of videos processed in parallel
+    MAX_CONCURRENCY: int = 4
+    # Transcript downloads of a playlist run ahead of the LLM requests:
+    # parallel downloads and number of downloaded transcripts waiting for the LLM
+    TRANSCRIPT_FETCH_CONCURRENCY: int = 8
+    TRANSCRIPT_PREFETCH: int = 8
+
+    # Number of summaries consolidated per request, larger playlists are consolidated level by level
+    PLAYLIST_GROUP_SIZE: int = 10
+
+    # Deep Dive: long transcripts are split into passages, only the most relevant passages are sent to the LLM
+    DEEP_DIVE_PASSAGE_TOKENS: int = 500
+    DEEP_DIVE_TOP_K: int = 8
+
+    # Budgets in USD, checked with a local estimate before any request is sent (None disables the check)
+    MAX_COST_PER_VIDEO: Optional[float] = None
+    MAX_COST_PER_PLAYLIST: Optional[float] = None
+    # Completion tokens assumed per LLM request when estimating the cost
+    ESTIMATED_COMPLETION_TOKENS: int = 1_000
+
+    # Persistent caches
+    CACHE_DIR: Path = LOCAL_CONFIG_DIR / "cache"
+    TRANSCRIPT_CACHE_ENABLED: bool = True
+    TRANSCRIPT_CACHE_MAX_SIZE: int = 200 * 1024 * 1024  # bytes
+    TRANSCRIPT_CACHE_TTL: int = 30 * 24 * 60 * 60  # seconds
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_MAX_SIZE: int = 100 * 1024 * 1024  # bytes
+    SUMMARY_CACHE_ENABLED: bool = True
+    SUMMARY_CACHE_MAX_SIZE: int = 50 * 1024 * 1024  # bytes
+    PLAYLIST_CACHE_ENABLED: bool = True
+    PLAYLIST_CACHE_MAX_SIZE: int = 10 * 1024 * 1024  # bytes
+    PLAYLIST_CACHE_TTL: int = 60 * 60  # seconds
+
     DEFAULT_LANGUAGES: List[str] = [
         "en",
         "es",
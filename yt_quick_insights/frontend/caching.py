@@ -1,3 +1,5 @@
+from typing import Iterator
+
 import streamlit as st
 
 from yt_quick_insights import (
@@ -5,20 +7,31 @@ from yt_quick_insights import (
     PlaylistInsights,
     DeepDive,
     YoutubeTranscript,
+    utils,
 )
 from yt_quick_insights.config import settings
+from yt_quick_insights.frontend.views.components import StreamlitPlaylistProgress
 from yt_quick_insights.task import ExtractionMethods
 
 
-@st.cache_data
-def extract_insights(
+def _cache_key_url(video_url: str) -> str:
+    """Return the canonical URL of a video, so that all URL forms of a video share the Streamlit cache entry"""
+    try:
+        return utils.canonical_video_url(video_url)
+    except ValueError:
+        # Invalid URLs fail with a useful error message when the transcript is downloaded
+        return video_url
+
+
+def stream_insights(
     video_url: str,
     task: ExtractionMethods,
     model_name: str,
     api_key: str,
-) -> str:
+) -> Iterator[str]:
     """
-    Extract insights from YouTube transcript
+    Extract insights from YouTube transcript and yield them while they are generated.
+    Not cached by Streamlit, transcripts and complete responses are stored in the persistent caches.
 
     Args:
         video_url: YouTube video url, e.g. "https://www.youtube.com/watch?v=VIDEO_ID"
@@ -26,31 +39,30 @@ def extract_insights(
         model_name: OpenAI model name
         api_key: OpenAI API key
 
-    Returns:
-        The summary of the transcript
+    Yields:
+        Consecutive parts of the summary
     """
     quick_insights = get_quick_insights(
         url=video_url,
         task_details=task,
         video_language=settings.DEFAULT_LANGUAGES,
     )
-    return quick_insights.extract(
-        model_name=model_name,
-        api_key=api_key,
-    )
+    yield from quick_insights.stream(model_name=model_name, api_key=api_key)
 
 
-@st.cache_data(show_spinner=False)
 def extract_playlist_insights(
     playlist_url: str,
     additional_instructions: str,
     extraction_method: ExtractionMethods,
     model_name: str,
     api_key: str,
-) -> str:
+) -> tuple[str, dict[str, str]]:
     """
     Extract insights from YouTube playlist by summarizing all summaries
     from individual videos in the playlist.
+    Not cached by Streamlit, the cached result would miss videos added to the playlist.
+    Summaries of individual videos and the consolidation are stored in the persistent caches instead,
+    so a re-run only summarizes the new videos.
 
     Args:
         playlist_url: YouTube playlist url, e.g. "https://www.youtube.com/playlist?list=PLAYLIST_ID"
@@ -60,7 +72,7 @@ def extract_playlist_insights(
         api_key: OpenAI API key
 
     Returns:
-        Condensed insights from all videos in the playlist
+        Condensed insights from all videos in the playlist and the error message of every skipped video
     """
     playlist_insights = PlaylistInsights(
         playlist_url=playlist_url,
@@ -68,30 +80,42 @@ def extract_playlist_insights(
         api_key=api_key,
         extraction_method=extraction_method,
     )
-    return playlist_insights.extract(
+    result = playlist_insights.extract(
         additional_instructions=additional_instructions,
+        progress=StreamlitPlaylistProgress(),
     )
+    return result, playlist_insights.failed_videos
 
 
-@st.cache_data
 def answer_question(
     video_url: str,
-    question: str,
+    question: str | list[str],
     model_name: str,
     api_key: str,
 ) -> str:
     """
     Answer a user question about a YouTube video transcript.
+    Multiple questions are answered in a single request.
 
     Args:
         video_url: YouTube video url, e.g. "https://www.youtube.com/watch?v=VIDEO_ID"
-        question: User question
+        question: User question or a list of questions
         model_name: OpenAI model name
         api_key: OpenAI API key
 
     Returns:
-        Answer to the user question
+        Answer to the user question, multiple answers are separated by a horizontal rule
     """
+    return _answer_question(_cache_key_url(video_url), question, model_name, api_key)
+
+
+@st.cache_data
+def _answer_question(
+    video_url: str,
+    question: str | list[str],
+    model_name: str,
+    api_key: str,
+) -> str:
     # Get title and transcript
     yt_title, yt_transcript = YoutubeTranscript().download_from_url(
         video_url=video_url, video_language=settings.DEFAULT_LANGUAGES
@@ -103,3 +127,35 @@ def answer_question(
         user_question=question,
     )
     return deep_dive.extract(model_name=model_name, api_key=api_key)
+
+
+def stream_answer(
+    video_url: str,
+    question: str,
+    model_name: str,
+    api_key: str,
+) -> Iterator[str]:
+    """
+    Answer a user question about a YouTube video transcript and yield the answer while it is generated.
+    Not cached by Streamlit, transcripts and complete responses are stored in the persistent caches.
+
+    Args:
+        video_url: YouTube video url, e.g. "https://www.youtube.com/watch?v=VIDEO_ID"
+        question: User question
+        model_name: OpenAI model name
+        api_key: OpenAI API key
+
+    Yields:
+        Consecutive parts of the answer
+    """
+    # Get title and transcript
+    yt_title, yt_transcript = YoutubeTranscript().download_from_url(
+        video_url=video_url, video_language=settings.DEFAULT_LANGUAGES
+    )
+    # Initialize DeepDive object and stream answer
+    deep_dive = DeepDive(
+        title=yt_title,
+        transcript=yt_transcript,
+        user_question=question,
+    )
+    yield from deep_dive.stream(model_name=model_name, api_key=api_key)
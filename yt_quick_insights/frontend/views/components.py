@@ -3,6 +3,7 @@ from langchain_community.callbacks import OpenAICallbackHandler
 
 from yt_quick_insights.config import settings
 from yt_quick_insights.task import ExtractionMethods
+from yt_quick_insights.youtube_playlist import PlaylistProgress
 
 # Constants
 default_task = ExtractionMethods.general_summary
@@ -135,6 +136,33 @@ def download_summary_btn(summary: str, unique_key: str):
     )
 
 
+class StreamlitPlaylistProgress(PlaylistProgress):
+    """Display the progress of a playlist run with Streamlit elements."""
+
+    def __init__(self):
+        self.info = st.empty()
+        self.progress_bar = st.empty()
+
+    def on_start(self, total_videos: int) -> None:
+        self.info.info(f"{total_videos} videos were found in the playlist.")
+        self.progress_bar.progress(0, text="Downloading Videos")
+
+    def on_video_done(self, completed: int, total_videos: int) -> None:
+        self.progress_bar.progress(
+            int(completed * 100 / total_videos),
+            text=f"Extracted Insights from {completed} of {total_videos} Videos",
+        )
+
+    def on_consolidate(self) -> None:
+        self.progress_bar.empty()
+        self.info.info("Consolidate insights from all videos ...")
+
+    def on_finish(self) -> None:
+        # Also called if the run failed, so no progress element is left on the page
+        self.info.empty()
+        self.progress_bar.empty()
+
+
 def load_css(file_path):
     with open(file_path) as f:
         st.markdown(f"<style>{f.read()}</style>", unsafe_allow_html=True)
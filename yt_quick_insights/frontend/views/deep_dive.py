@@ -1,3 +1,5 @@
+import re
+
 import streamlit as st
 import typer
 from langchain_community.callbacks import get_openai_callback
@@ -12,7 +14,8 @@ def display_usage_guide():
         st.markdown(
             f"""
             1. {components.video_url_info}
-            2. **Question**: Ask detailed questions about the video to learn specific insights. 
+            2. **Question**: Ask detailed questions about the video to learn specific insights.
+               Separate questions with a blank line to ask several questions at once.
             3. {components.model_info}
             4. **OpenAI API Key**: Provide your API key in one of the following ways:
                - Enter it directly in the provided field.
@@ -34,7 +37,7 @@ def user_input_form():
 
         query = st.text_area(
             "Question",
-            placeholder="Ask your question ...",
+            placeholder="Ask your question ... (separate several questions with a blank line)",
         )
         col1, col2 = st.columns(2)
 
@@ -56,23 +59,47 @@ def process_user_inputs():
         if not model_name:
             model_name = settings.OPENAI_MODEL_NAME
 
+        # Render the answer while it is generated, display_results shows the final answer
+        # A question may span several lines, only blank lines separate questions
+        questions = [
+            question.strip()
+            for question in re.split(r"\n\s*\n", query)
+            if question.strip()
+        ]
+        stream_placeholder = st.empty()
         try:
             with get_openai_callback() as cb:
-                st.session_state.deep_dive = caching.answer_question(
-                    video_url=url,
-                    question=query,
-                    api_key=api_key,
-                    model_name=model_name,
-                )
+                if len(questions) > 1:
+                    # Several questions are answered together in one request
+                    st.session_state.deep_dive = caching.answer_question(
+                        video_url=url,
+                        question=questions,
+                        api_key=api_key,
+                        model_name=model_name,
+                    )
+                else:
+                    st.session_state.deep_dive = stream_placeholder.container(
+                        border=True
+                    ).write_stream(
+                        caching.stream_answer(
+                            video_url=url,
+                            question=query,
+                            api_key=api_key,
+                            model_name=model_name,
+                        )
+                    )
+            stream_placeholder.empty()
             if not hide_openai_info:
                 components.show_cost_and_token_usage(cb)
             st.session_state.submitted_deep_dive = True
         except ValueError:
+            stream_placeholder.empty()
             st.error(
                 "Please provide a valid YouTube URL in the form of 'https://www.youtube.com/watch?v=VIDEO_ID'"
             )
             st.session_state.submitted_deep_dive = False
         except typer.Abort as e:
+            stream_placeholder.empty()
             components.display_openai_errors(e, model_name)
             st.session_state.submitted_deep_dive = False
 
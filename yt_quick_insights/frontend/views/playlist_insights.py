@@ -7,6 +7,7 @@ from langchain_community.callbacks import get_openai_callback
 from yt_quick_insights.config import settings
 from yt_quick_insights.frontend import caching
 from yt_quick_insights.frontend import components
+from yt_quick_insights.tokens import BudgetExceededError
 
 
 def initialize_session_state():
@@ -15,6 +16,8 @@ def initialize_session_state():
         st.session_state.submitted_playlist = False
     if "playlist_insights" not in st.session_state:
         st.session_state.playlist_insights = ""
+    if "playlist_failed_videos" not in st.session_state:
+        st.session_state.playlist_failed_videos = {}
 
 
 def display_title_and_description():
@@ -71,7 +74,10 @@ def process_user_inputs():
 
         try:
             with get_openai_callback() as cb:
-                st.session_state.playlist_insights = caching.extract_playlist_insights(
+                (
+                    st.session_state.playlist_insights,
+                    st.session_state.playlist_failed_videos,
+                ) = caching.extract_playlist_insights(
                     playlist_url=playlist_url,
                     additional_instructions=additional_instructions,
                     extraction_method=extraction_method,
@@ -89,10 +95,16 @@ def process_user_inputs():
         except typer.Abort as e:
             components.display_openai_errors(e, model_name)
             st.session_state.submitted_playlist = False
+        except (BudgetExceededError, RuntimeError) as e:
+            st.error(str(e))
+            st.session_state.submitted_playlist = False
 
 
 def display_results():
     if st.session_state.submitted_playlist:
+        for video_url, error in st.session_state.playlist_failed_videos.items():
+            st.warning(f"Skipped {video_url}: {error}")
+
         result_container = st.container(border=True)
         result_container.markdown(st.session_state.playlist_insights)
 
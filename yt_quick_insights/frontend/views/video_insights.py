@@ -6,6 +6,7 @@ from yt_quick_insights.config import settings
 from yt_quick_insights.frontend import caching
 from yt_quick_insights.frontend.views import components
 from yt_quick_insights.frontend.views import deep_dive as dd
+from yt_quick_insights.tokens import BudgetExceededError
 
 
 # Set session states
@@ -61,28 +62,42 @@ def process_user_inputs():
         if not model_name:
             model_name = settings.OPENAI_MODEL_NAME
 
+        # Render the insights while they are generated, display_results shows the final result
+        stream_placeholder = st.empty()
         try:
             with get_openai_callback() as cb:
-                st.session_state.video_insights = caching.extract_insights(
-                    video_url=video_url,
-                    task=extraction_method,
-                    model_name=model_name,
-                    api_key=api_key,
+                st.session_state.video_insights = stream_placeholder.container(
+                    border=True
+                ).write_stream(
+                    caching.stream_insights(
+                        video_url=video_url,
+                        task=extraction_method,
+                        model_name=model_name,
+                        api_key=api_key,
+                    )
                 )
+            stream_placeholder.empty()
             if not hide_openai_info:
                 components.show_cost_and_token_usage(cb)
             st.session_state.url = video_url
             st.session_state.submitted = True
         except ValueError:
+            stream_placeholder.empty()
             st.error(
                 "Please provide a valid YouTube URL in the form of 'https://www.youtube.com/watch?v=VIDEO_ID'"
             )
             st.session_state.submitted = False
             st.session_state.url = None
         except typer.Abort as e:
+            stream_placeholder.empty()
             components.display_openai_errors(e, model_name)
             st.session_state.submitted = False
             st.session_state.url = None
+        except BudgetExceededError as e:
+            stream_placeholder.empty()
+            st.error(str(e))
+            st.session_state.submitted = False
+            st.session_state.url = None
 
 
 # Display insights
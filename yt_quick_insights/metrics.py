@@ -0,0 +1,254 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Iterator, Optional
+
+
+@dataclass
+class StageMetrics:
+    """Metrics of a single stage, e.g. a transcript download or a LLM request"""
+
+    stage: str
+    duration: float = 0.0
+    model: Optional[str] = None
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cost: float = 0.0
+    cache_hit: bool = False
+
+    def add_usage(self, usage_metadata: Optional[dict]) -> None:
+        """
+        Add the token usage reported by LangChain (AIMessage.usage_metadata) and the resulting cost.
+
+        Args:
+            usage_metadata: Dictionary with "input_tokens" and "output_tokens", may be None
+        """
+        if not usage_metadata:
+            return
+
+        prompt_tokens = usage_metadata.get("input_tokens", 0)
+        completion_tokens = usage_metadata.get("output_tokens", 0)
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+        self.cost += get_cost(self.model, prompt_tokens, completion_tokens)
+
+
+def get_cost(
+    model_name: Optional[str], prompt_tokens: int, completion_tokens: int
+) -> float:
+    """
+    Return the cost of the tokens based on LangChain's OpenAI price table.
+
+    Args:
+        model_name: OpenAI model name
+        prompt_tokens: Number of prompt tokens
+        completion_tokens: Number of completion tokens
+
+    Returns:
+        The cost in USD, 0 for models without a known price
+    """
+    if model_name is None:
+        return 0.0
+
+    # langchain_community is slow to import, it is only needed once costs are calculated
+    from langchain_community.callbacks.openai_info import (
+        TokenType,
+        get_openai_token_cost_for_model,
+    )
+
+    try:
+        return get_openai_token_cost_for_model(
+            model_name, prompt_tokens, token_type=TokenType.PROMPT
+        ) + get_openai_token_cost_for_model(
+            model_name, completion_tokens, token_type=TokenType.COMPLETION
+        )
+    except ValueError:
+        return 0.0
+
+
+@dataclass
+class RunMetrics:
+    """
+    Metrics of all stages recorded while tracking a run, see track().
+    Stages can be added from multiple threads.
+    """
+
+    name: str = "run"
+    stages: list[StageMetrics] = field(default_factory=list)
+    _lock: threading.Lock = field(
+        default_factory=threading.Lock, init=False, repr=False, compare=False
+    )
+
+    def add(self, stage: StageMetrics) -> None:
+        """Add the metrics of a finished stage"""
+        with self._lock:
+            self.stages.append(stage)
+
+    @property
+    def prompt_tokens(self) -> int:
+        return sum(stage.prompt_tokens for stage in self.stages)
+
+    @property
+    def completion_tokens(self) -> int:
+        return sum(stage.completion_tokens for stage in self.stages)
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    @property
+    def cost(self) -> float:
+        return sum(stage.cost for stage in self.stages)
+
+    @property
+    def cache_hits(self) -> int:
+        return sum(stage.cache_hit for stage in self.stages)
+
+    def by_stage(self) -> dict[str, dict[str, float]]:
+        """
+        Aggregate the metrics per stage name
+
+        Returns:
+            Mapping of stage name to the number of calls, cache hits, tokens, cost and the summed duration
+        """
+        totals: dict[str, dict[str, float]] = {}
+        for stage in self.stages:
+            total = totals.setdefault(
+                stage.stage,
+                {
+                    "calls": 0,
+                    "cache_hits": 0,
+                    "duration": 0.0,
+                    "prompt_tokens": 0,
+                    "completion_tokens": 0,
+                    "cost": 0.0,
+                },
+            )
+            total["calls"] += 1
+            total["cache_hits"] += stage.cache_hit
+            total["duration"] += stage.duration
+            total["prompt_tokens"] += stage.prompt_tokens
+            total["completion_tokens"] += stage.completion_tokens
+            total["cost"] += stage.cost
+        return totals
+
+    def to_dict(self) -> dict:
+        """Return the run, its totals and all stages as a JSON serializable dictionary"""
+        return {
+            "name": self.name,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cost": self.cost,
+            "cache_hits": self.cache_hits,
+            "stages": [asdict(stage) for stage in self.stages],
+        }
+
+    def write_jsonl(self, path: str | Path) -> None:
+        """
+        Append one JSON line per stage to a file
+
+        Args:
+            path: The JSON lines file
+        """
+        with open(path, "a", encoding="utf-8") as file:
+            for stage in self.stages:
+                file.write(json.dumps({"run": self.name, **asdict(stage)}) + "\n")
+
+    def to_prometheus(self, prefix: str = "yt_quick_insights") -> str:
+        """
+        Return the metrics per stage as counters in the Prometheus text exposition format
+
+        Args:
+            prefix: Prefix of the metric names
+
+        Returns:
+            The counters, one sample per stage
+        """
+        counters = {
+            "calls": ("stage_calls_total", "Number of recorded stages"),
+            "cache_hits": (
+                "stage_cache_hits_total",
+                "Number of stages served from a cache",
+            ),
+            "duration": (
+                "stage_duration_seconds_total",
+                "Wall clock time spent in the stages",
+            ),
+            "prompt_tokens": ("prompt_tokens_total", "Prompt tokens sent to the LLM"),
+            "completion_tokens": (
+                "completion_tokens_total",
+                "Completion tokens generated by the LLM",
+            ),
+            "cost": ("cost_usd_total", "Cost of the LLM requests in USD"),
+        }
+        totals = self.by_stage()
+
+        lines = []
+        for key, (name, description) in counters.items():
+            metric = f"{prefix}_{name}"
+            lines.append(f"# HELP {metric} {description}")
+            lines.append(f"# TYPE {metric} counter")
+            for stage, total in totals.items():
+                lines.append(
+                    f'{metric}{{run="{self.name}",stage="{stage}"}} {total[key]:g}'
+                )
+        return "\n".join(lines) + "\n"
+
+
+# All runs tracked in the current context, nested runs are appended at the end
+_active_runs: ContextVar[tuple[RunMetrics, ...]] = ContextVar(
+    "yt_quick_insights_active_runs", default=()
+)
+
+
+@contextmanager
+def track(name: str = "run") -> Iterator[RunMetrics]:
+    """
+    Record the metrics of all stages executed inside the with block, including worker threads
+    started with utils.map_concurrently and tasks of utils.amap_concurrently.
+    Runs can be nested, the stages of the inner run are recorded in the outer run as well.
+
+    Example:
+        with metrics.track("summary") as run:
+            QuickInsights(...).extract(model_name, api_key)
+        print(run.cost, run.by_stage())
+
+    Args:
+        name: Name of the run, used as label in the exports
+
+    Yields:
+        The metrics of the run, filled while the block executes
+    """
+    run = RunMetrics(name=name)
+    token = _active_runs.set(_active_runs.get() + (run,))
+    try:
+        yield run
+    finally:
+        _active_runs.reset(token)
+
+
+@contextmanager
+def measure(stage: str, model: Optional[str] = None) -> Iterator[StageMetrics]:
+    """
+    Measure the duration of a stage and add it to the tracked runs, if there are any.
+    The yielded metrics can be completed inside the with block, e.g. with the token usage.
+    Stages that raise an exception are not recorded.
+
+    Args:
+        stage: Name of the stage
+        model: Name of the LLM used in the stage
+
+    Yields:
+        The metrics of the stage
+    """
+    stage_metrics = StageMetrics(stage=stage, model=model)
+    start = time.perf_counter()
+    yield stage_metrics
+    stage_metrics.duration = time.perf_counter() - start
+
+    for run in _active_runs.get():
+        run.add(stage_metrics)
@@ -1,5 +1,5 @@
 from yt_quick_insights import QuickInsights, YoutubeTranscript
-from yt_quick_insights.task import ExtractionMethods, available_extraction_methods
+from yt_quick_insights.task import ExtractionMethods, task_manager
 
 
 def get_quick_insights(
@@ -23,7 +23,37 @@ def get_quick_insights(
         video_url=url, video_language=video_language
     )
     # Get extraction method
-    extraction_methods = available_extraction_methods.get(task_details.value)
+    extraction_methods = task_manager.get_task(task_details.value)
+    # Initialize QuickInsights object
+    return QuickInsights(
+        title=yt_title,
+        transcript=yt_transcript,
+        task=extraction_methods,
+    )
+
+
+async def aget_quick_insights(
+    url: str,
+    task_details: ExtractionMethods,
+    video_language: str | list[str],
+) -> QuickInsights:
+    """
+    Async version of get_quick_insights, the transcript download does not block the event loop
+
+    Args:
+        url: YouTube video url, e.g. "https://www.youtube.com/watch?v=VIDEO_ID"
+        task_details: How to summarize or extract knowledge from th YouTube transcript.
+        video_language: The language of the video.
+
+    Returns:
+        QuickInsights object
+    """
+    # Get title and transcript
+    yt_title, yt_transcript = await YoutubeTranscript().adownload_from_url(
+        video_url=url, video_language=video_language
+    )
+    # Get extraction method
+    extraction_methods = task_manager.get_task(task_details.value)
     # Initialize QuickInsights object
     return QuickInsights(
         title=yt_title,
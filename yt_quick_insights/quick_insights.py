@@ -1,4 +1,6 @@
-from typing import Union
+import re
+from contextlib import contextmanager
+from typing import Iterator, Optional, Union
 
 import typer
 from langchain_community.chat_models import ChatOpenAI
@@ -9,10 +11,44 @@ from langchain_core.runnables import RunnableSerializable
 from openai import AuthenticationError, NotFoundError
 from rich import print
 
-from yt_quick_insights import utils
+from yt_quick_insights import clients, retrieval, templates, tokens, utils
 from yt_quick_insights.config import settings
 
 
+@contextmanager
+def _abort_on_openai_errors(
+    model_name: str, show_message: bool = True
+) -> Iterator[None]:
+    """
+    Convert OpenAI authentication and model errors into typer.Abort, which is displayed by the CLI and the app.
+
+    Args:
+        model_name: OpenAI model name used in the request
+        show_message: Whether to print instructions on how to fix the error
+
+    Raises:
+        typer.Abort: If OpenAI API key is invalid or the model does not exist, or you do not have access to it
+    """
+    try:
+        yield
+    except AuthenticationError:
+        if show_message:
+            print(
+                "Incorrect API key provided!\n"
+                "You can find your API key at: https://platform.openai.com/account/api-keys.\n"
+                "Please update the value in your .env file."
+            )
+        raise typer.Abort("Invalid API key")
+    except NotFoundError:
+        if show_message:
+            print(
+                f'The model "{model_name}" does not exist or you do not have access to it.\n'
+                f"You can find all available models at: https://platform.openai.com/docs/models.\n"
+                f"Please update the value in your .env file."
+            )
+        raise typer.Abort("Invalid model name")
+
+
 class QuickInsights:
     """
     This class provides functionality to extract knowledge from a
@@ -37,20 +73,31 @@ class QuickInsights:
         self.transcript = transcript
         self.task = task
         self.prompt_template = self._load_prompt_template()
+        self.combine_template = self._load_combine_template()
 
     @staticmethod
     def _load_prompt_template() -> PromptTemplate:
-        """Load template from YAML file and convert into PromptTemplate"""
-        template = utils.load_yaml_file(
-            file_name="prompt.yml", directory=settings.PROJECT_DIR / "data"
+        """Return the shared template of the prompt from prompt.yml"""
+        return templates.registry.get(
+            file_name="prompt.yml",
+            prompt_name="prompt",
+            input_variables=[
+                "video_title",
+                "task",
+                "youtube_transcript",
+            ],
         )
 
-        return PromptTemplate(
-            template=template.get("prompt"),
+    @staticmethod
+    def _load_combine_template() -> PromptTemplate:
+        """Return the shared template to combine the results of transcript chunks from combine_prompt.yml"""
+        return templates.registry.get(
+            file_name="combine_prompt.yml",
+            prompt_name="combine_prompt",
             input_variables=[
                 "video_title",
                 "task",
-                "youtube_transcript",
+                "partial_results",
             ],
         )
 
@@ -83,99 +130,520 @@ class QuickInsights:
         """
         return self._invoke(self.prompt_template).text
 
-    def _extract_knowledge(self, llm: ChatOpenAI) -> str:
+    def _split_transcript(self, model_name: str) -> list[str]:
+        """Split the transcript into chunks of at most settings.MAX_TOKENS tokens"""
+        return tokens.split_text(
+            self.transcript, max_tokens=settings.MAX_TOKENS, model_name=model_name
+        )
+
+    def _get_chunk_prompts(self, chunks: list[str]) -> list[str]:
         """
-        Build and invoke LLM chain to extract knowledge from transcript
+        Return the prompts to extract knowledge from the individual transcript chunks
+
+        Args:
+            chunks: Consecutive parts of the transcript
+
+        Returns
+            One prompt per chunk
+        """
+        number_of_chunks = len(chunks)
+        return [
+            self.prompt_template.invoke(
+                {
+                    "video_title": f"{self.title} (part {idx} of {number_of_chunks})",
+                    "task": self.task.rstrip(),
+                    "youtube_transcript": chunk,
+                }
+            ).text
+            for idx, chunk in enumerate(chunks, start=1)
+        ]
+
+    def _get_combine_prompt(self, partial_results: list[str]) -> str:
+        """
+        Return the prompt to combine the partial results of the transcript chunks
+
+        Args:
+            partial_results: Results of the transcript chunks in transcript order
+
+        Returns
+            The prompt to combine the partial results
+        """
+        number_of_chunks = len(partial_results)
+        return self.combine_template.invoke(
+            {
+                "video_title": self.title,
+                "task": self.task.rstrip(),
+                "partial_results": "\n\n".join(
+                    f"--- Part {idx} of {number_of_chunks} ---\n\n{result}"
+                    for idx, result in enumerate(partial_results, start=1)
+                ),
+            }
+        ).text
+
+    def estimate(self, model_name: str) -> tokens.Estimate:
+        """
+        Estimate the tokens and cost of extract without sending any request.
+        Prompt tokens are counted locally, every request is assumed to generate
+        settings.ESTIMATED_COMPLETION_TOKENS completion tokens.
+
+        Args:
+            model_name: OpenAI model name to use
+
+        Returns:
+            The estimate of all requests, including the chunk and combine requests of long transcripts
+        """
+        chunks = self._split_transcript(model_name)
+        if len(chunks) == 1:
+            prompts = [self.get_prompt()]
+        else:
+            prompts = self._get_chunk_prompts(chunks)
+            # The partial results are not known yet, their size is added below
+            prompts.append(self._get_combine_prompt([""] * len(chunks)))
+
+        requests = len(prompts)
+        prompt_tokens = sum(
+            tokens.count_tokens(prompt, model_name) for prompt in prompts
+        )
+        if len(chunks) > 1:
+            prompt_tokens += len(chunks) * settings.ESTIMATED_COMPLETION_TOKENS
+
+        return tokens.Estimate(
+            model_name=model_name,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=requests * settings.ESTIMATED_COMPLETION_TOKENS,
+            requests=requests,
+        )
+
+    def _check_budget(
+        self, model_name: str, budget: Optional[tokens.Budget] = None
+    ) -> None:
+        """
+        Refuse to extract knowledge if the estimated cost exceeds settings.MAX_COST_PER_VIDEO
+        or the remaining shared budget.
+
+        Args:
+            model_name: OpenAI model name to use
+            budget: Budget shared with other videos, e.g. of a playlist
+
+        Raises:
+            tokens.VideoBudgetExceededError: If the estimated cost exceeds settings.MAX_COST_PER_VIDEO
+            tokens.BudgetExceededError: If the estimated cost exceeds the remaining shared budget
+        """
+        if settings.MAX_COST_PER_VIDEO is None and budget is None:
+            return
+
+        estimate = self.estimate(model_name)
+        try:
+            tokens.Budget(settings.MAX_COST_PER_VIDEO).reserve(estimate)
+        except tokens.BudgetExceededError as e:
+            raise tokens.VideoBudgetExceededError(str(e)) from None
+        if budget is not None:
+            budget.reserve(estimate)
+
+    def _get_final_prompt(
+        self, llm: ChatOpenAI, chunks: list[str], use_cache: bool = True
+    ) -> str:
+        """
+        Return the prompt of the final request. For a transcript split into multiple chunks,
+        knowledge is extracted from every chunk in parallel first and the prompt combines the partial results.
 
         Args:
             llm: LLM model to use
+            chunks: Consecutive parts of the transcript
+            use_cache: Whether to use the persistent LLM response cache
+
+        Returns
+            The prompt of the final request
+        """
+        if len(chunks) == 1:
+            return self.get_prompt()
+
+        partial_results = utils.map_concurrently(
+            lambda prompt: utils.invoke_llm(
+                llm, prompt, use_cache=use_cache, stage="chunk"
+            ),
+            self._get_chunk_prompts(chunks),
+            max_workers=settings.MAX_CONCURRENCY,
+        )
+        return self._get_combine_prompt(partial_results)
+
+    async def _aget_final_prompt(
+        self, llm: ChatOpenAI, chunks: list[str], use_cache: bool = True
+    ) -> str:
+        """Async version of _get_final_prompt"""
+        if len(chunks) == 1:
+            return self.get_prompt()
+
+        partial_results = await utils.amap_concurrently(
+            lambda prompt: utils.ainvoke_llm(
+                llm, prompt, use_cache=use_cache, stage="chunk"
+            ),
+            self._get_chunk_prompts(chunks),
+            max_concurrency=settings.MAX_CONCURRENCY,
+        )
+        return self._get_combine_prompt(partial_results)
+
+    def _extract_knowledge(self, llm: ChatOpenAI, use_cache: bool = True) -> str:
+        """
+        Render the prompt and invoke the LLM to extract knowledge from transcript.
+        Transcripts longer than settings.MAX_TOKENS are split into chunks, which are processed
+        in parallel and combined afterwards (map-reduce).
+
+        Args:
+            llm: LLM model to use
+            use_cache: Whether to use the persistent LLM response cache
 
         Returns
             The summary of the transcript
 
         Raises:
-            AuthenticationError: If OpenAI API key is invalid
-            NotFoundError: If the model does not exist, or you do not have access to it
+            typer.Abort: If OpenAI API key is invalid or the model does not exist, or you do not have access to it
         """
-        chain = self.prompt_template | llm
+        chunks = self._split_transcript(llm.model_name)
 
-        try:
-            return self._invoke(chain).content
-        except AuthenticationError:
-            print(
-                "Incorrect API key provided!\n"
-                "You can find your API key at: https://platform.openai.com/account/api-keys.\n"
-                "Please update the value in your .env file."
-            )
-            raise typer.Abort("Invalid API key")
-        except NotFoundError:
-            print(
-                f'The model "{llm.model_name}" does not exist or you do not have access to it.\n'
-                f"You can find all available models at: https://platform.openai.com/docs/models.\n"
-                f"Please update the value in your .env file."
-            )
-            raise typer.Abort("Invalid model name")
+        with _abort_on_openai_errors(llm.model_name):
+            prompt = self._get_final_prompt(llm, chunks, use_cache=use_cache)
+            return utils.invoke_llm(llm, prompt, use_cache=use_cache, stage="extract")
 
-    def extract(self, model_name: str, api_key: str) -> str:
+    def extract(
+        self,
+        model_name: str,
+        api_key: str,
+        use_cache: bool = True,
+        budget: Optional[tokens.Budget] = None,
+    ) -> str:
         """
         Use LLM to extract knowledge from transcript
 
         Args:
             model_name: OpenAI model name to use
             api_key: OpenAI API key
+            use_cache: Whether to use the persistent LLM response cache
+            budget: Budget shared with other videos, checked in addition to settings.MAX_COST_PER_VIDEO
 
         Returns:
             The summary of the transcript
+
+        Raises:
+            tokens.BudgetExceededError: If the estimated cost exceeds the budget, no request is sent
         """
+        self._check_budget(model_name, budget)
         llm = utils.initialize_llm(
             model_name=model_name,
             api_key=api_key,
         )
 
-        return self._extract_knowledge(llm=llm)
+        return self._extract_knowledge(llm=llm, use_cache=use_cache)
+
+    async def aextract(
+        self,
+        model_name: str,
+        api_key: str,
+        use_cache: bool = True,
+        budget: Optional[tokens.Budget] = None,
+    ) -> str:
+        """
+        Async version of extract, the LLM requests do not block the event loop
+
+        Args:
+            model_name: OpenAI model name to use
+            api_key: OpenAI API key
+            use_cache: Whether to use the persistent LLM response cache
+            budget: Budget shared with other videos, checked in addition to settings.MAX_COST_PER_VIDEO
+
+        Returns:
+            The summary of the transcript
+
+        Raises:
+            tokens.BudgetExceededError: If the estimated cost exceeds the budget, no request is sent
+        """
+        self._check_budget(model_name, budget)
+        async with clients.registry.session():
+            llm = utils.initialize_llm(model_name=model_name, api_key=api_key)
+            chunks = self._split_transcript(llm.model_name)
+
+            with _abort_on_openai_errors(llm.model_name):
+                prompt = await self._aget_final_prompt(llm, chunks, use_cache=use_cache)
+                return await utils.ainvoke_llm(
+                    llm, prompt, use_cache=use_cache, stage="extract"
+                )
+
+    def stream(
+        self, model_name: str, api_key: str, use_cache: bool = True
+    ) -> Iterator[str]:
+        """
+        Use LLM to extract knowledge from transcript and yield the summary in chunks while it is generated.
+        For transcripts longer than settings.MAX_TOKENS only the final combine request is streamed.
+
+        Args:
+            model_name: OpenAI model name to use
+            api_key: OpenAI API key
+            use_cache: Whether to use the persistent LLM response cache
+
+        Yields:
+            Consecutive parts of the summary
+
+        Raises:
+            tokens.BudgetExceededError: If the estimated cost exceeds settings.MAX_COST_PER_VIDEO
+        """
+        self._check_budget(model_name)
+        llm = utils.initialize_llm(model_name=model_name, api_key=api_key)
+        chunks = self._split_transcript(llm.model_name)
+
+        with _abort_on_openai_errors(llm.model_name):
+            prompt = self._get_final_prompt(llm, chunks, use_cache=use_cache)
+            yield from utils.stream_llm(
+                llm, prompt, use_cache=use_cache, stage="extract"
+            )
 
 
 class DeepDive:
     """
     Answer a user's question about a YouTube video.
-    Using the video transcript and a LLM
+    Using the video transcript and a LLM.
+    Multiple questions are answered together in a single request, so the transcript is only sent once.
     """
 
-    def __init__(self, title: str, transcript: str, user_question: str):
+    # Models like to decorate the markers as heading or bold text, e.g. "### === Answer 1 ===" or "**=== Answer 1 ===**"
+    ANSWER_PATTERN = re.compile(
+        r"^[\s#*]*=+\s*Answer\s+(\d+)\s*=+[\s#*]*$", re.MULTILINE | re.IGNORECASE
+    )
+    ANSWER_SEPARATOR = "\n\n---\n\n"
+    MISSING_ANSWER = "No answer was generated for this question."
+
+    def __init__(
+        self,
+        title: str,
+        transcript: str,
+        user_question: str | list[str],
+        passage_index: Optional[retrieval.PassageIndex] = None,
+    ):
+        """
+        Initialize the class with the video title, transcript and user question(s).
+
+        Args:
+            title: The title of the YouTube video.
+            transcript: The transcript of the YouTube video.
+            user_question: The question about the video or a list of questions.
+            passage_index: Index used to find the relevant passages of long transcripts,
+                defaults to a cached BM25 index of the transcript
+        """
         self.title = title
         self.transcript = transcript
         self.user_question = user_question
+        self.questions = (
+            [user_question] if isinstance(user_question, str) else list(user_question)
+        )
+        self.passage_index = passage_index
         self.prompt_template = self._load_prompt_template()
-
-    @staticmethod
-    def _load_prompt_template() -> PromptTemplate:
-        """Load template from YAML file and convert into PromptTemplate"""
-        template = utils.load_yaml_file(
-            file_name="deep_dive.yml", directory=settings.PROJECT_DIR / "data"
+        self.batch_template = self._load_prompt_template(
+            prompt_name="batch_prompt", question_variable="questions"
         )
 
-        return PromptTemplate(
-            template=template.get("prompt"),
+    @staticmethod
+    def _load_prompt_template(
+        prompt_name: str = "prompt", question_variable: str = "question"
+    ) -> PromptTemplate:
+        """Return the shared template of the prompt from deep_dive.yml"""
+        return templates.registry.get(
+            file_name="deep_dive.yml",
+            prompt_name=prompt_name,
             input_variables=[
                 "video_title",
-                "question",
+                question_variable,
                 "youtube_transcript",
             ],
         )
 
-    def extract(self, model_name: str, api_key: str) -> str:
-        llm = utils.initialize_llm(model_name=model_name, api_key=api_key)
-        chain = self.prompt_template | llm
+    def _get_transcript_context(self, model_name: Optional[str] = None) -> str:
+        """
+        Return the whole transcript if it fits into the passage budget
+        (settings.DEEP_DIVE_TOP_K * settings.DEEP_DIVE_PASSAGE_TOKENS),
+        otherwise only the passages most relevant for the questions.
 
-        try:
-            return chain.invoke(
+        Args:
+            model_name: OpenAI model name whose tokenizer counts the tokens, defaults to settings.OPENAI_MODEL_NAME
+
+        Returns:
+            The transcript or the transcript excerpt
+        """
+        model_name = model_name or settings.OPENAI_MODEL_NAME
+        budget = settings.DEEP_DIVE_TOP_K * settings.DEEP_DIVE_PASSAGE_TOKENS
+        if tokens.count_tokens(self.transcript, model_name) <= budget:
+            return self.transcript
+
+        index = self.passage_index or retrieval.get_bm25_index(
+            self.transcript, model_name
+        )
+        return index.get_excerpt(self.questions, k=settings.DEEP_DIVE_TOP_K)
+
+    def get_prompt(self, model_name: Optional[str] = None) -> str:
+        """
+        Return the final prompt including the question(s) and the transcript as a string
+
+        Args:
+            model_name: OpenAI model name the prompt is sent to, defaults to settings.OPENAI_MODEL_NAME
+
+        Returns:
+            The final prompt
+        """
+        if len(self.questions) == 1:
+            return self.prompt_template.invoke(
                 {
                     "video_title": self.title,
-                    "question": self.user_question,
-                    "youtube_transcript": self.transcript,
+                    "question": self.questions[0],
+                    "youtube_transcript": self._get_transcript_context(model_name),
                 }
-            ).content
-        except AuthenticationError:
-            raise typer.Abort("Invalid API key")
-        except NotFoundError:
-            raise typer.Abort("Invalid model name")
+            ).text
+
+        return self.batch_template.invoke(
+            {
+                "video_title": self.title,
+                "questions": "\n".join(
+                    f"{idx}. {question}"
+                    for idx, question in enumerate(self.questions, start=1)
+                ),
+                "youtube_transcript": self._get_transcript_context(model_name),
+            }
+        ).text
+
+    def _parse_answers(self, response: str) -> list[str]:
+        """
+        Split the response into the answers of the individual questions.
+
+        Args:
+            response: The LLM response
+
+        Returns:
+            One answer per question in question order,
+            the whole response as single entry if the LLM ignored the answer format
+        """
+        if len(self.questions) == 1:
+            return [response]
+
+        matches = list(self.ANSWER_PATTERN.finditer(response))
+        if not matches:
+            # The answers cannot be assigned to the questions, keep the response as it is
+            return [response.strip()]
+
+        answers = {}
+        ends = [match.start() for match in matches[1:]] + [len(response)]
+        for match, end in zip(matches, ends):
+            start = match.end()
+            answers[int(match.group(1))] = response[start:end].strip()
+
+        return [
+            answers.get(idx) or self.MISSING_ANSWER
+            for idx in range(1, len(self.questions) + 1)
+        ]
+
+    def extract_answers(
+        self, model_name: str, api_key: str, use_cache: bool = True
+    ) -> list[str]:
+        """
+        Use LLM to answer all user questions in a single request
+
+        Args:
+            model_name: OpenAI model name to use
+            api_key: OpenAI API key
+            use_cache: Whether to use the persistent LLM response cache
+
+        Returns:
+            One answer per question in question order,
+            the whole response as single entry if the LLM ignored the answer format
+        """
+        llm = utils.initialize_llm(model_name=model_name, api_key=api_key)
+
+        with _abort_on_openai_errors(model_name, show_message=False):
+            response = utils.invoke_llm(
+                llm,
+                self.get_prompt(model_name),
+                use_cache=use_cache,
+                stage="deep_dive",
+            )
+        return self._parse_answers(response)
+
+    async def aextract_answers(
+        self, model_name: str, api_key: str, use_cache: bool = True
+    ) -> list[str]:
+        """Async version of extract_answers"""
+        async with clients.registry.session():
+            llm = utils.initialize_llm(model_name=model_name, api_key=api_key)
+
+            with _abort_on_openai_errors(model_name, show_message=False):
+                response = await utils.ainvoke_llm(
+                    llm,
+                    self.get_prompt(model_name),
+                    use_cache=use_cache,
+                    stage="deep_dive",
+                )
+        return self._parse_answers(response)
+
+    def extract(self, model_name: str, api_key: str, use_cache: bool = True) -> str:
+        """
+        Use LLM to answer the user question(s)
+
+        Args:
+            model_name: OpenAI model name to use
+            api_key: OpenAI API key
+            use_cache: Whether to use the persistent LLM response cache
+
+        Returns:
+            The answer to the user question, multiple answers are separated by a horizontal rule
+        """
+        return self.ANSWER_SEPARATOR.join(
+            self.extract_answers(
+                model_name=model_name, api_key=api_key, use_cache=use_cache
+            )
+        )
+
+    async def aextract(
+        self, model_name: str, api_key: str, use_cache: bool = True
+    ) -> str:
+        """
+        Async version of extract, the LLM request does not block the event loop
+
+        Args:
+            model_name: OpenAI model name to use
+            api_key: OpenAI API key
+            use_cache: Whether to use the persistent LLM response cache
+
+        Returns:
+            The answer to the user question, multiple answers are separated by a horizontal rule
+        """
+        return self.ANSWER_SEPARATOR.join(
+            await self.aextract_answers(
+                model_name=model_name, api_key=api_key, use_cache=use_cache
+            )
+        )
+
+    def stream(
+        self, model_name: str, api_key: str, use_cache: bool = True
+    ) -> Iterator[str]:
+        """
+        Use LLM to answer the user question and yield the answer in chunks while it is generated.
+        Multiple questions are answered at once, because the answers have to be parsed first.
+
+        Args:
+            model_name: OpenAI model name to use
+            api_key: OpenAI API key
+            use_cache: Whether to use the persistent LLM response cache
+
+        Yields:
+            Consecutive parts of the answer
+        """
+        if len(self.questions) > 1:
+            yield self.extract(
+                model_name=model_name, api_key=api_key, use_cache=use_cache
+            )
+            return
+
+        llm = utils.initialize_llm(model_name=model_name, api_key=api_key)
+
+        with _abort_on_openai_errors(model_name, show_message=False):
+            yield from utils.stream_llm(
+                llm,
+                self.get_prompt(model_name),
+                use_cache=use_cache,
+                stage="deep_dive",
+            )
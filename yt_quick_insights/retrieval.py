@@ -0,0 +1,198 @@
+import math
+import re
+from abc import ABC, abstractmethod
+from collections import Counter
+from functools import lru_cache
+from typing import TYPE_CHECKING, Optional
+
+from yt_quick_insights import tokens
+from yt_quick_insights.config import settings
+
+if TYPE_CHECKING:
+    from langchain_core.embeddings import Embeddings
+
+WORD_PATTERN = re.compile(r"\w+")
+
+# Frequent english words which do not help to find relevant passages
+STOP_WORDS = frozenset(
+    "a about an and are as at be but by do does for from how i in is it of on or "
+    "so that the this to was what when where which who why with you".split()
+)
+
+
+def _tokenize(text: str) -> list[str]:
+    """Split text into lower case words without stop words"""
+    return [
+        word for word in WORD_PATTERN.findall(text.lower()) if word not in STOP_WORDS
+    ]
+
+
+class PassageIndex(ABC):
+    """
+    Base class of the passage indexes: the transcript is split into passages of
+    settings.DEEP_DIVE_PASSAGE_TOKENS tokens, subclasses rank the passages by relevance for a question.
+    """
+
+    def __init__(self, transcript: str, model_name: Optional[str] = None):
+        """
+        Split the transcript into passages.
+
+        Args:
+            transcript: The transcript of the YouTube video
+            model_name: OpenAI model name whose tokenizer sizes the passages, defaults to settings.OPENAI_MODEL_NAME
+        """
+        self.passages = tokens.split_text(
+            transcript,
+            max_tokens=settings.DEEP_DIVE_PASSAGE_TOKENS,
+            model_name=model_name or settings.OPENAI_MODEL_NAME,
+        )
+
+    @abstractmethod
+    def scores(self, question: str) -> list[float]:
+        """Return the relevance of every passage for the question"""
+
+    def search(self, question: str, k: int) -> list[int]:
+        """
+        Find the passages most relevant for the question.
+
+        Args:
+            question: The user question
+            k: Number of passages to return
+
+        Returns:
+            Indices of the k most relevant passages in transcript order
+        """
+        scores = self.scores(question)
+        ranked = sorted(range(len(scores)), key=lambda idx: scores[idx], reverse=True)
+        return sorted(ranked[:k])
+
+    def get_excerpt(self, questions: str | list[str], k: int) -> str:
+        """
+        Return the k most relevant passages of every question in transcript order,
+        omitted parts are marked with "[...]".
+
+        Args:
+            questions: The user question or multiple questions
+            k: Number of passages to include per question
+
+        Returns:
+            The transcript excerpt
+        """
+        if isinstance(questions, str):
+            questions = [questions]
+        selected = sorted(
+            {idx for question in questions for idx in self.search(question, k)}
+        )
+
+        parts = []
+        previous = -1
+        for idx in selected:
+            if idx != previous + 1:
+                parts.append("[...]")
+            parts.append(self.passages[idx])
+            previous = idx
+        if previous != len(self.passages) - 1:
+            parts.append("[...]")
+        return "\n".join(parts)
+
+
+class BM25Index(PassageIndex):
+    """Local lexical passage index using the Okapi BM25 ranking function."""
+
+    def __init__(
+        self,
+        transcript: str,
+        k1: float = 1.5,
+        b: float = 0.75,
+        model_name: Optional[str] = None,
+    ):
+        """
+        Split the transcript into passages and count the word frequencies.
+
+        Args:
+            transcript: The transcript of the YouTube video
+            k1: Term frequency saturation
+            b: Strength of the passage length normalization
+            model_name: OpenAI model name whose tokenizer sizes the passages, defaults to settings.OPENAI_MODEL_NAME
+        """
+        super().__init__(transcript, model_name=model_name)
+        self.k1 = k1
+        self.b = b
+        self.term_frequencies = [Counter(_tokenize(p)) for p in self.passages]
+        self.lengths = [sum(tf.values()) for tf in self.term_frequencies]
+        self.average_length = sum(self.lengths) / max(1, len(self.lengths))
+
+        document_frequencies = Counter(
+            word for tf in self.term_frequencies for word in tf
+        )
+        number_of_passages = len(self.passages)
+        self.idf = {
+            word: math.log(1 + (number_of_passages - df + 0.5) / (df + 0.5))
+            for word, df in document_frequencies.items()
+        }
+
+    def scores(self, question: str) -> list[float]:
+        words = set(_tokenize(question))
+        scores = []
+        for tf, length in zip(self.term_frequencies, self.lengths):
+            normalization = self.k1 * (
+                1 - self.b + self.b * length / max(1.0, self.average_length)
+            )
+            scores.append(
+                sum(
+                    self.idf[word]
+                    * tf[word]
+                    * (self.k1 + 1)
+                    / (tf[word] + normalization)
+                    for word in words
+                    if word in tf
+                )
+            )
+        return scores
+
+
+class EmbeddingIndex(PassageIndex):
+    """Semantic passage index using any LangChain embedding model, e.g. OpenAIEmbeddings."""
+
+    def __init__(
+        self,
+        transcript: str,
+        embeddings: "Embeddings",
+        model_name: Optional[str] = None,
+    ):
+        """
+        Split the transcript into passages and embed them.
+
+        Args:
+            transcript: The transcript of the YouTube video
+            embeddings: LangChain embedding model
+            model_name: OpenAI model name whose tokenizer sizes the passages, defaults to settings.OPENAI_MODEL_NAME
+        """
+        super().__init__(transcript, model_name=model_name)
+        self.embeddings = embeddings
+        self.vectors = embeddings.embed_documents(self.passages)
+
+    @staticmethod
+    def _cosine_similarity(a: list[float], b: list[float]) -> float:
+        norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+        return sum(x * y for x, y in zip(a, b)) / norm if norm else 0.0
+
+    def scores(self, question: str) -> list[float]:
+        query = self.embeddings.embed_query(question)
+        return [self._cosine_similarity(query, vector) for vector in self.vectors]
+
+
+@lru_cache(maxsize=32)
+def get_bm25_index(transcript: str, model_name: Optional[str] = None) -> BM25Index:
+    """
+    Return the BM25 index of a transcript, the index is built once per transcript and model and reused
+    for all follow-up questions.
+
+    Args:
+        transcript: The transcript of the YouTube video
+        model_name: OpenAI model name whose tokenizer sizes the passages, defaults to settings.OPENAI_MODEL_NAME
+
+    Returns:
+        The BM25 index
+    """
+    return BM25Index(transcript, model_name=model_name)
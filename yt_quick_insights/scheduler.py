@@ -0,0 +1,211 @@
+import asyncio
+import random
+import threading
+import time
+from functools import lru_cache
+from typing import Awaitable, Callable, Iterator, Optional, TypeVar
+
+from yt_quick_insights.config import settings
+
+T = TypeVar("T")
+
+
+@lru_cache(maxsize=1)
+def retryable_errors() -> tuple[type[Exception], ...]:
+    """
+    Return the errors worth another attempt: rate limits, timeouts, connection problems and server errors.
+    APITimeoutError is a subclass of APIConnectionError. openai is imported on first use.
+    """
+    from openai import (
+        APIConnectionError,
+        ConflictError,
+        InternalServerError,
+        RateLimitError,
+    )
+
+    return RateLimitError, APIConnectionError, InternalServerError, ConflictError
+
+
+class _TokenBucket:
+    """
+    Token bucket refilled continuously with limit_per_minute / 60 units per second.
+    Reservations are taken immediately and the bucket may go negative,
+    the returned delay tells the caller how long to wait until its reservation is covered.
+    """
+
+    def __init__(self, limit_per_minute: int):
+        self.capacity = float(limit_per_minute)
+        self.rate = limit_per_minute / 60
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def reserve(self, amount: float, now: float) -> float:
+        """Take the amount from the bucket and return the delay in seconds until it is available"""
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+        # A single request larger than the bucket can never be covered, it only has to wait for a full bucket
+        self.level -= min(amount, self.capacity)
+        return max(0.0, -self.level / self.rate)
+
+
+class RequestScheduler:
+    """
+    Gate in front of all LLM requests: paces them to stay within the requests-per-minute
+    and tokens-per-minute limits of the account and retries transient errors with jittered exponential backoff.
+    A scheduler is shared by all threads and event loops of the process.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+        max_retries: int = 5,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+    ):
+        """
+        Args:
+            requests_per_minute: Maximum number of requests per minute, None for no limit
+            tokens_per_minute: Maximum number of tokens (prompt and completion) per minute, None for no limit
+            max_retries: Number of retries after a transient error
+            base_delay: Backoff delay of the first retry in seconds, doubled for every further retry
+            max_delay: Upper bound of the backoff delay in seconds
+        """
+        self.requests = (
+            _TokenBucket(requests_per_minute) if requests_per_minute else None
+        )
+        self.tokens = _TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._lock = threading.Lock()
+
+    @property
+    def limits_tokens(self) -> bool:
+        """Whether requests need a token estimate"""
+        return self.tokens is not None
+
+    def _reserve(self, estimated_tokens: int) -> float:
+        """Reserve a request and its tokens, returns the delay in seconds before it may be sent"""
+        with self._lock:
+            now = time.monotonic()
+            delay = 0.0
+            if self.requests is not None:
+                delay = max(delay, self.requests.reserve(1, now))
+            if self.tokens is not None:
+                delay = max(delay, self.tokens.reserve(estimated_tokens, now))
+            return delay
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        """
+        Return the delay before the next attempt: "full jitter" exponential backoff,
+        but at least the delay requested by the API in the Retry-After header.
+        """
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+        response = getattr(error, "response", None)
+        if response is not None:
+            try:
+                delay = max(delay, float(response.headers.get("retry-after", 0)))
+            except (TypeError, ValueError):
+                pass
+        return delay
+
+    def _should_retry(self, attempt: int, error: Exception) -> bool:
+        return isinstance(error, retryable_errors()) and attempt < self.max_retries
+
+    def run(self, func: Callable[[], T], estimated_tokens: int = 0) -> T:
+        """
+        Call func once the limits allow it, retry it on transient errors.
+
+        Args:
+            func: Sends the request
+            estimated_tokens: Expected prompt and completion tokens of the request
+
+        Returns:
+            The result of func
+
+        Raises:
+            Exception: The error of the last attempt or any non-transient error
+        """
+        attempt = 0
+        while True:
+            time.sleep(self._reserve(estimated_tokens))
+            try:
+                return func()
+            except Exception as e:
+                if not self._should_retry(attempt, e):
+                    raise
+                time.sleep(self._backoff(attempt, e))
+                attempt += 1
+
+    async def arun(
+        self, func: Callable[[], Awaitable[T]], estimated_tokens: int = 0
+    ) -> T:
+        """Async version of run, waiting does not block the event loop"""
+        attempt = 0
+        while True:
+            await asyncio.sleep(self._reserve(estimated_tokens))
+            try:
+                return await func()
+            except Exception as e:
+                if not self._should_retry(attempt, e):
+                    raise
+                await asyncio.sleep(self._backoff(attempt, e))
+                attempt += 1
+
+    def stream(
+        self, func: Callable[[], Iterator[T]], estimated_tokens: int = 0
+    ) -> Iterator[T]:
+        """
+        Streaming version of run. A request is only retried if it failed before the first part was yielded,
+        afterward the error is raised to avoid yielding parts twice.
+
+        Args:
+            func: Sends the request and returns an iterator over the parts of the response
+            estimated_tokens: Expected prompt and completion tokens of the request
+
+        Yields:
+            The parts of the response
+        """
+        attempt = 0
+        while True:
+            time.sleep(self._reserve(estimated_tokens))
+            started = False
+            try:
+                for part in func():
+                    started = True
+                    yield part
+                return
+            except Exception as e:
+                if started or not self._should_retry(attempt, e):
+                    raise
+                time.sleep(self._backoff(attempt, e))
+                attempt += 1
+
+
+@lru_cache(maxsize=1)
+def _get_scheduler(
+    requests_per_minute: Optional[int],
+    tokens_per_minute: Optional[int],
+    max_retries: int,
+    base_delay: float,
+    max_delay: float,
+) -> RequestScheduler:
+    return RequestScheduler(
+        requests_per_minute=requests_per_minute,
+        tokens_per_minute=tokens_per_minute,
+        max_retries=max_retries,
+        base_delay=base_delay,
+        max_delay=max_delay,
+    )
+
+
+def get_scheduler() -> RequestScheduler:
+    """Return the scheduler shared by all LLM requests, a new one is created when the settings change"""
+    return _get_scheduler(
+        settings.LLM_REQUESTS_PER_MINUTE,
+        settings.LLM_TOKENS_PER_MINUTE,
+        settings.LLM_MAX_RETRIES,
+        settings.LLM_RETRY_BASE_DELAY,
+        settings.LLM_RETRY_MAX_DELAY,
+    )
@@ -0,0 +1,107 @@
+import re
+from array import array
+from bisect import bisect_right
+from typing import Iterable, Optional
+
+# "[Music]" annotations and runs of whitespace (including non-breaking spaces and newlines)
+CLEAN_PATTERN = re.compile(r"(?:\[Music]|\s)+")
+
+
+def clean_text(text: str) -> str:
+    """
+    Replace unwanted annotations and runs of whitespace with a single space in one pass.
+
+    Args:
+        text: The text to clean
+
+    Returns:
+        The cleaned text
+    """
+    return CLEAN_PATTERN.sub(" ", text)
+
+
+def _as_array(typecode: str, values: Optional[Iterable]) -> Optional[array]:
+    """Convert the values into an array, arrays of the right type are used without copying"""
+    if values is None or (isinstance(values, array) and values.typecode == typecode):
+        return values
+    return array(typecode, values)
+
+
+class Transcript(str):
+    """
+    The cleaned transcript text, optionally with the start time of every segment.
+    Start times are kept in compact parallel arrays: the segment beginning at character offsets[i]
+    starts starts[i] seconds into the video. Everywhere else a Transcript behaves like a plain string.
+    """
+
+    offsets: Optional[array]
+    starts: Optional[array]
+
+    def __new__(
+        cls,
+        text: str,
+        offsets: Optional[Iterable[int]] = None,
+        starts: Optional[Iterable[float]] = None,
+    ) -> "Transcript":
+        """
+        Args:
+            text: The cleaned transcript text
+            offsets: Character offset of every segment in the text
+            starts: Start time of every segment in seconds
+        """
+        transcript = super().__new__(cls, text)
+        transcript.offsets = _as_array("L", offsets)
+        transcript.starts = _as_array("d", starts)
+        return transcript
+
+    @property
+    def has_timestamps(self) -> bool:
+        """Whether the segment start times are available"""
+        return self.starts is not None
+
+    def start_time(self, position: int) -> Optional[float]:
+        """
+        Return the start time of the segment containing a character, e.g. to cite a passage.
+
+        Args:
+            position: Index of the character in the text
+
+        Returns:
+            The start time in seconds or None if the transcript has no timestamps
+        """
+        if not self.starts:
+            return None
+        return self.starts[max(bisect_right(self.offsets, position) - 1, 0)]
+
+
+def normalize_segments(
+    segments: Iterable[tuple[str, float]], keep_timestamps: bool = False
+) -> Transcript:
+    """
+    Clean the raw transcript segments and join them into a single transcript.
+    Every segment is cleaned once and the text is built with a single join.
+
+    Args:
+        segments: Text and start time in seconds of every segment, in video order
+        keep_timestamps: Whether to keep the segment start times in the transcript
+
+    Returns:
+        The cleaned transcript, segments without text are dropped
+    """
+    parts = []
+    offsets = array("L") if keep_timestamps else None
+    starts = array("d") if keep_timestamps else None
+    position = 0
+
+    for text, start in segments:
+        cleaned = CLEAN_PATTERN.sub(" ", text).strip()
+        if not cleaned:
+            continue
+        if keep_timestamps:
+            offsets.append(position)
+            starts.append(start)
+        parts.append(cleaned)
+        # +1 for the joining space
+        position += len(cleaned) + 1
+
+    return Transcript(" ".join(parts), offsets=offsets, starts=starts)
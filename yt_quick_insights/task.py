@@ -1,14 +1,16 @@
+import threading
 from enum import Enum
-from typing import Type
+from typing import Optional, Type
 
-from yt_quick_insights import utils
 from yt_quick_insights.config import settings
+from yt_quick_insights.templates import YamlFileCache
 
 
 class TaskManager:
     """
     This class provides functionality to load and merge the default and user-defined extraction_methods.
     Additionally, it creates an Enum object for all available_extraction_methods.
+    Both files are parsed once, the user-defined file is parsed again when it changes.
     """
 
     def __init__(self, file_name: str = "extraction_methods.yml"):
@@ -19,7 +21,9 @@ class TaskManager:
             file_name: The name of the YAML file containing the default and user extraction_methods.
         """
         self.file_name = file_name
-        self.default_tasks = utils.load_yaml_file(
+        self.files = YamlFileCache()
+        self._lock = threading.Lock()
+        self.default_tasks = self.files.load(
             file_name=self.file_name, directory=settings.PROJECT_DIR / "data"
         )
         self.user_tasks = self._load_user_tasks()
@@ -33,7 +37,9 @@ class TaskManager:
             A dictionary of user-defined available_extraction_methods.
         """
         try:
-            return utils.load_yaml_file(self.file_name, settings.HOME_DIR / ".insights")
+            return self.files.load(
+                self.file_name, settings.HOME_DIR / ".insights", watch=True
+            )
         except FileNotFoundError:
             return {}
 
@@ -47,6 +53,30 @@ class TaskManager:
         """
         return dict(sorted({**self.default_tasks, **self.user_tasks}.items()))
 
+    def get_task(self, name: str) -> Optional[str]:
+        """
+        Return the instructions of an extraction method, safe to call from multiple threads.
+        Changes of the user-defined extraction_methods are applied to the existing methods,
+        new methods only become available after a restart (the Enum is created once).
+
+        Args:
+            name: The name of the extraction method
+
+        Returns:
+            The instructions or None if the extraction method does not exist
+        """
+        with self._lock:
+            user_tasks = self._load_user_tasks()
+            if user_tasks != self.user_tasks:
+                self.user_tasks = user_tasks
+                merged_tasks = self._merge_tasks()
+                # Update in place without emptying the dictionary in between,
+                # available_extraction_methods refers to the same dictionary and is read without the lock
+                self.tasks.update(merged_tasks)
+                for removed in self.tasks.keys() - merged_tasks.keys():
+                    del self.tasks[removed]
+            return self.tasks.get(name)
+
     def create_task_enum(self) -> Type[Enum]:
         """
         Create an Enum object with the keys of the available_extraction_methods dictionary.
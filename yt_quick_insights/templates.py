@@ -0,0 +1,121 @@
+import threading
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+
+from yt_quick_insights import utils
+from yt_quick_insights.config import settings
+
+if TYPE_CHECKING:
+    from langchain_core.prompts import PromptTemplate
+
+
+class YamlFileCache:
+    """
+    Parse YAML files once and keep their content in memory.
+    Watched files (e.g. the user's extraction methods) are checked for changes with a single stat call
+    and parsed again when their modification time changed, all other files are never read again.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Path -> (modification time or None if the file is missing, content or the error raised while loading)
+        self._files: dict[Path, tuple[Optional[int], dict | Exception]] = {}
+
+    @staticmethod
+    def _mtime(path: Path) -> Optional[int]:
+        try:
+            return path.stat().st_mtime_ns
+        except OSError:
+            return None
+
+    def load(self, file_name: str, directory: Path, watch: bool = False) -> dict:
+        """
+        Return the content of a YAML file, it is only parsed on first use or after it changed.
+
+        Args:
+            file_name: The name of the YAML file
+            directory: The directory where the YAML file is located
+            watch: Whether to reload the file when its modification time changes
+
+        Returns:
+            The content of the YAML file as a dictionary
+
+        Raises:
+            FileNotFoundError: If the file does not exist
+            yaml.YAMLError: If there is an error parsing the YAML file
+        """
+        path = directory / file_name
+        with self._lock:
+            cached = self._files.get(path)
+            mtime = self._mtime(path) if watch or cached is None else cached[0]
+            if cached is None or cached[0] != mtime:
+                try:
+                    content = utils.load_yaml_file(file_name, directory)
+                except FileNotFoundError as e:
+                    content = e
+                cached = (mtime, content)
+                self._files[path] = cached
+
+        if isinstance(cached[1], Exception):
+            raise cached[1]
+        return cached[1]
+
+    def clear(self) -> None:
+        """Forget all files, they are parsed again on next use"""
+        with self._lock:
+            self._files.clear()
+
+
+class TemplateRegistry:
+    """
+    Process-wide store of the prompt templates shipped in the data directory.
+    Every template is built once and shared by all QuickInsights, DeepDive and PlaylistInsights instances,
+    so creating them does not touch the disk.
+    """
+
+    def __init__(self, directory: Optional[Path] = None):
+        """
+        Args:
+            directory: Location of the prompt files, defaults to the data directory of the package
+        """
+        self.directory = directory or settings.PROJECT_DIR / "data"
+        self.files = YamlFileCache()
+        self._lock = threading.Lock()
+        self._templates: dict[tuple, "PromptTemplate"] = {}
+
+    def get(
+        self, file_name: str, prompt_name: str, input_variables: list[str]
+    ) -> "PromptTemplate":
+        """
+        Return the prompt template, it is loaded from the YAML file on first use.
+
+        Args:
+            file_name: The name of the YAML file, e.g. "prompt.yml"
+            prompt_name: The key of the prompt in the YAML file
+            input_variables: The variables of the prompt
+
+        Returns:
+            The shared PromptTemplate
+        """
+        from langchain_core.prompts import PromptTemplate
+
+        key = (file_name, prompt_name, tuple(input_variables))
+        with self._lock:
+            template = self._templates.get(key)
+            if template is None:
+                content = self.files.load(file_name, self.directory)
+                template = PromptTemplate(
+                    template=content.get(prompt_name),
+                    input_variables=list(input_variables),
+                )
+                self._templates[key] = template
+            return template
+
+    def clear(self) -> None:
+        """Forget all templates, e.g. after the prompt files were edited"""
+        with self._lock:
+            self._templates.clear()
+            self.files.clear()
+
+
+registry = TemplateRegistry()
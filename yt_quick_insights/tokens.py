@@ -0,0 +1,194 @@
+import bisect
+import math
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import TYPE_CHECKING, Optional
+
+from yt_quick_insights import metrics
+
+if TYPE_CHECKING:
+    import tiktoken
+
+# Rough average for English text, used if no tiktoken encoding is available
+CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=None)
+def _get_encoding(model_name: str) -> Optional["tiktoken.Encoding"]:
+    """
+    Return the tiktoken encoding for the model.
+
+    Args:
+        model_name: OpenAI model name
+
+    Returns:
+        The encoding or None if tiktoken or the encoding files are not available
+    """
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+
+    try:
+        try:
+            return tiktoken.encoding_for_model(model_name)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        # tiktoken downloads the encoding files on first use, which fails offline
+        return None
+
+
+def count_tokens(text: str, model_name: str) -> int:
+    """
+    Count the tokens of a text for the given model.
+    Falls back to an estimate based on the number of characters if no tokenizer is available.
+
+    Args:
+        text: The text to count
+        model_name: OpenAI model name
+
+    Returns:
+        The number of tokens
+    """
+    encoding = _get_encoding(model_name)
+    if encoding is None:
+        return math.ceil(len(text) / CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def _token_offsets(text: str, model_name: str) -> list[int]:
+    """
+    Return the start position of every token in the text.
+    Falls back to one token per CHARS_PER_TOKEN characters if no tokenizer is available.
+    """
+    encoding = _get_encoding(model_name)
+    if encoding is None:
+        return list(range(0, len(text), CHARS_PER_TOKEN))
+    _, offsets = encoding.decode_with_offsets(
+        encoding.encode(text, disallowed_special=())
+    )
+    return offsets
+
+
+def split_text(text: str, max_tokens: int, model_name: str) -> list[str]:
+    """
+    Split a text on word boundaries into evenly sized chunks of at most max_tokens tokens.
+    The text is tokenized once and cut at token positions, so chunks stay within the budget
+    even if the number of characters per token varies (numbers, code, other languages).
+
+    Args:
+        text: The text to split
+        max_tokens: Maximum number of tokens per chunk
+        model_name: OpenAI model name
+
+    Returns:
+        The chunks, a single chunk if the text fits into the budget
+    """
+    offsets = _token_offsets(text, model_name)
+    total_tokens = len(offsets)
+    if total_tokens <= max_tokens:
+        return [text]
+
+    number_of_chunks = math.ceil(total_tokens / max_tokens)
+
+    chunks = []
+    start = 0
+    # Index of the token containing the start of the current chunk
+    first_token = 0
+    idx = 0
+    while total_tokens - first_token > max_tokens:
+        idx += 1
+        # First token of the next chunk: evenly spaced, but never more than max_tokens after the chunk start
+        boundary = min(
+            round(idx * total_tokens / number_of_chunks), first_token + max_tokens
+        )
+        end = max(offsets[max(boundary, first_token + 1)], start + 1)
+        # Cut at the last whitespace before it, mid-word only if there is none
+        cut = text.rfind(" ", start, end + 1)
+        if cut <= start:
+            chunks.append(text[start:end])
+            start = end
+        else:
+            chunks.append(text[start:cut])
+            start = cut + 1
+        first_token = bisect.bisect_right(offsets, start) - 1
+
+    chunks.append(text[start:])
+
+    if _get_encoding(model_name) is None:
+        return chunks
+    # A chunk is tokenized on its own, which rarely yields a token more at its boundaries
+    return [
+        part
+        for chunk in chunks
+        for part in (
+            split_text(chunk, max_tokens, model_name)
+            if count_tokens(chunk, model_name) > max_tokens
+            else [chunk]
+        )
+    ]
+
+
+@dataclass
+class Estimate:
+    """Expected token usage and cost of LLM requests, computed locally before they are sent"""
+
+    model_name: str
+    prompt_tokens: int
+    completion_tokens: int
+    requests: int = 1
+
+    @property
+    def cost(self) -> float:
+        """The estimated cost in USD"""
+        return metrics.get_cost(
+            self.model_name, self.prompt_tokens, self.completion_tokens
+        )
+
+
+class BudgetExceededError(Exception):
+    """Raised before any request is sent, if the estimated cost exceeds the budget"""
+
+
+class VideoBudgetExceededError(BudgetExceededError):
+    """Raised if the estimated cost of a single video exceeds settings.MAX_COST_PER_VIDEO"""
+
+
+class Budget:
+    """
+    Cost budget shared by multiple tasks, e.g. all videos of a playlist.
+    Every task reserves its estimated cost before sending requests, reservations are thread-safe.
+    """
+
+    def __init__(self, max_cost: Optional[float]):
+        """
+        Args:
+            max_cost: Maximum estimated cost in USD, None for an unlimited budget
+        """
+        self.max_cost = max_cost
+        self.reserved = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self, estimate: Estimate) -> None:
+        """
+        Add the estimated cost to the budget.
+
+        Args:
+            estimate: The estimate of the upcoming requests
+
+        Raises:
+            BudgetExceededError: If the estimated cost exceeds the remaining budget
+        """
+        if self.max_cost is None:
+            return
+
+        with self._lock:
+            remaining = self.max_cost - self.reserved
+            if estimate.cost > remaining:
+                raise BudgetExceededError(
+                    f"The estimated cost of ${estimate.cost:.4f} ({estimate.prompt_tokens} prompt tokens, "
+                    f"{estimate.requests} requests) exceeds the remaining budget of ${remaining:.4f}."
+                )
+            self.reserved += estimate.cost
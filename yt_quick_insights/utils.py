@@ -1,13 +1,43 @@
+import asyncio
+import contextvars
+import hashlib
 import re
+import threading
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ThreadPoolExecutor,
+    as_completed,
+    wait,
+)
+from functools import lru_cache
 from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    AsyncIterable,
+    Awaitable,
+    Callable,
+    Iterable,
+    Iterator,
+    Optional,
+    TypeVar,
+)
+from urllib.parse import parse_qs, urlparse
 
-import yaml
-from langchain_openai import ChatOpenAI
-from rich.console import Console
-from rich.markdown import Markdown
-
+from yt_quick_insights import clients, metrics, scheduler, tokens
+from yt_quick_insights.cache import ResponseCache
 from yt_quick_insights.config import settings
 
+# Imported on first use, they are not needed by the lightweight CLI commands
+if TYPE_CHECKING:
+    from langchain_openai import ChatOpenAI
+
+T = TypeVar("T")
+R = TypeVar("R")
+F = TypeVar("F")
+
+VIDEO_ID_PATTERN = re.compile(r"[0-9A-Za-z_-]+")
+
 
 def clean_youtube_video_title(video_title: str) -> str:
     """
@@ -23,6 +53,81 @@ def clean_youtube_video_title(video_title: str) -> str:
     return re.sub(r"\s+", " ", allowed_chars).replace(" ", "_")[0:200]
 
 
+def extract_video_id(video_url: str) -> str:
+    """
+    Extract the video ID from the common YouTube URL formats, e.g.
+    "https://www.youtube.com/watch?v=VIDEO_ID", "https://youtu.be/VIDEO_ID" or "https://www.youtube.com/shorts/VIDEO_ID"
+
+    Args:
+        video_url: The URL of the YouTube video
+
+    Returns:
+        The video ID
+
+    Raises:
+        ValueError: If the URL is not a valid YouTube video URL
+    """
+    parsed_url = urlparse(video_url.strip())
+    host = parsed_url.netloc.lower().removeprefix("www.").removeprefix("m.")
+    path_parts = parsed_url.path.strip("/").split("/")
+
+    video_id = ""
+    if host == "youtu.be":
+        video_id = path_parts[0]
+    elif host in ("youtube.com", "music.youtube.com", "youtube-nocookie.com"):
+        if parsed_url.path == "/watch":
+            video_id = parse_qs(parsed_url.query).get("v", [""])[0]
+        elif path_parts[0] in ("shorts", "embed", "live", "v") and len(path_parts) > 1:
+            video_id = path_parts[1]
+
+    if not VIDEO_ID_PATTERN.fullmatch(video_id):
+        raise ValueError(f'Could not determine the video ID for the URL "{video_url}".')
+    return video_id
+
+
+def canonical_video_url(video_url: str) -> str:
+    """
+    Return the canonical URL of a video, so that all URL forms of a video
+    ("youtu.be/VIDEO_ID", "watch?v=VIDEO_ID&t=42s", shorts, ...) share the same cache keys.
+
+    Args:
+        video_url: The URL of the YouTube video
+
+    Returns:
+        "https://www.youtube.com/watch?v=VIDEO_ID"
+
+    Raises:
+        ValueError: If the URL is not a valid YouTube video URL
+    """
+    return f"https://www.youtube.com/watch?v={extract_video_id(video_url)}"
+
+
+def content_hash(text: str) -> str:
+    """Return the SHA-256 hex digest of a text, e.g. to find identical transcripts of different videos"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def extract_playlist_id(playlist_url: str) -> str:
+    """
+    Extract the playlist ID from a YouTube playlist URL, e.g. "https://www.youtube.com/playlist?list=PLAYLIST_ID"
+
+    Args:
+        playlist_url: The URL of the YouTube playlist
+
+    Returns:
+        The playlist ID
+
+    Raises:
+        ValueError: If the URL does not contain a playlist ID
+    """
+    playlist_id = parse_qs(urlparse(playlist_url.strip()).query).get("list", [""])[0]
+    if not VIDEO_ID_PATTERN.fullmatch(playlist_id):
+        raise ValueError(
+            f'Could not determine the playlist ID for the URL "{playlist_url}".'
+        )
+    return playlist_id
+
+
 def load_yaml_file(file_name: str, directory: Path) -> dict[str, str]:
     """
     Load a YAML file from either the project directory or the user's home directory
@@ -37,6 +142,8 @@ def load_yaml_file(file_name: str, directory: Path) -> dict[str, str]:
     Raises:
         yaml.YAMLError: If there is an error parsing the YAML file
     """
+    import yaml
+
     yaml_file = directory / file_name
 
     try:
@@ -47,9 +154,9 @@ def load_yaml_file(file_name: str, directory: Path) -> dict[str, str]:
         raise yaml.YAMLError(f"Error parsing YAML file {yaml_file}: {e}")
 
 
-def initialize_llm(model_name: str, api_key: str) -> ChatOpenAI:
+def initialize_llm(model_name: str, api_key: str) -> "ChatOpenAI":
     """
-    Return an LLM instance
+    Return an LLM instance, instances and their HTTP connections are reused across calls (see clients.registry)
 
     Args:
         model_name: The name of the model to use
@@ -58,13 +165,479 @@ def initialize_llm(model_name: str, api_key: str) -> ChatOpenAI:
     Returns:
         LLM instance
     """
-    return ChatOpenAI(
+    return clients.registry.get(
         model_name=model_name,
         api_key=api_key,
         temperature=0,
+        # Report token usage for streamed responses as well
+        stream_usage=True,
+        # Retries are handled by the request scheduler
+        max_retries=0,
+    )
+
+
+@lru_cache(maxsize=4)
+def _open_response_cache(path: Path, max_size: int) -> ResponseCache:
+    return ResponseCache(path=path, max_size=max_size)
+
+
+def _get_response_cache(use_cache: bool) -> Optional[ResponseCache]:
+    """Return the response cache if it is enabled, it is opened once per location and size"""
+    if not use_cache or not settings.LLM_CACHE_ENABLED:
+        return None
+    return _open_response_cache(
+        settings.CACHE_DIR / "responses.sqlite", settings.LLM_CACHE_MAX_SIZE
+    )
+
+
+def _estimate_tokens(
+    request_scheduler: scheduler.RequestScheduler, llm: "ChatOpenAI", prompt: str
+) -> int:
+    """Return the expected prompt and completion tokens of a request, if the scheduler limits tokens"""
+    if not request_scheduler.limits_tokens:
+        return 0
+    return (
+        tokens.count_tokens(prompt, llm.model_name)
+        + settings.ESTIMATED_COMPLETION_TOKENS
     )
 
 
+def invoke_llm(
+    llm: "ChatOpenAI", prompt: str, use_cache: bool = True, stage: str = "llm"
+) -> str:
+    """
+    Send the rendered prompt to the LLM and return the content of the response.
+    Responses are stored in the persistent response cache, identical requests do not call the model again.
+    Requests are paced and retried on transient errors by the request scheduler (see scheduler.get_scheduler).
+
+    Args:
+        llm: LLM instance
+        prompt: The rendered prompt
+        use_cache: Whether to read and write the response cache,
+            ignored if settings.LLM_CACHE_ENABLED is False
+        stage: Name of the request in the recorded metrics, see metrics.track
+
+    Returns:
+        The content of the LLM response
+    """
+    with metrics.measure(stage, model=llm.model_name) as stage_metrics:
+        cache = _get_response_cache(use_cache)
+        if cache is not None:
+            key = cache.make_key(prompt, llm.model_name, llm.temperature)
+            cached = cache.get(key)
+            if cached is not None:
+                stage_metrics.cache_hit = True
+                return cached
+
+        request_scheduler = scheduler.get_scheduler()
+        response = request_scheduler.run(
+            lambda: llm.invoke(prompt),
+            _estimate_tokens(request_scheduler, llm, prompt),
+        )
+        stage_metrics.add_usage(response.usage_metadata)
+
+        if cache is not None:
+            cache.set(key, response.content)
+        return response.content
+
+
+async def ainvoke_llm(
+    llm: "ChatOpenAI", prompt: str, use_cache: bool = True, stage: str = "llm"
+) -> str:
+    """
+    Async version of invoke_llm, the request and the cache lookup do not block the event loop
+
+    Args:
+        llm: LLM instance
+        prompt: The rendered prompt
+        use_cache: Whether to read and write the response cache,
+            ignored if settings.LLM_CACHE_ENABLED is False
+        stage: Name of the request in the recorded metrics, see metrics.track
+
+    Returns:
+        The content of the LLM response
+    """
+    with metrics.measure(stage, model=llm.model_name) as stage_metrics:
+        cache = _get_response_cache(use_cache)
+        if cache is not None:
+            key = cache.make_key(prompt, llm.model_name, llm.temperature)
+            cached = await asyncio.to_thread(cache.get, key)
+            if cached is not None:
+                stage_metrics.cache_hit = True
+                return cached
+
+        request_scheduler = scheduler.get_scheduler()
+        response = await request_scheduler.arun(
+            lambda: llm.ainvoke(prompt),
+            _estimate_tokens(request_scheduler, llm, prompt),
+        )
+        stage_metrics.add_usage(response.usage_metadata)
+
+        if cache is not None:
+            await asyncio.to_thread(cache.set, key, response.content)
+        return response.content
+
+
+def stream_llm(
+    llm: "ChatOpenAI", prompt: str, use_cache: bool = True, stage: str = "llm"
+) -> Iterator[str]:
+    """
+    Send the rendered prompt to the LLM and yield the content of the response while it is generated.
+    A cached response is yielded at once, a completely streamed response is stored in the cache.
+
+    Args:
+        llm: LLM instance
+        prompt: The rendered prompt
+        use_cache: Whether to read and write the response cache,
+            ignored if settings.LLM_CACHE_ENABLED is False
+        stage: Name of the request in the recorded metrics, see metrics.track.
+            The recorded duration includes the time the caller spends between the parts.
+
+    Yields:
+        Consecutive parts of the LLM response
+    """
+    with metrics.measure(stage, model=llm.model_name) as stage_metrics:
+        cache = _get_response_cache(use_cache)
+        if cache is not None:
+            key = cache.make_key(prompt, llm.model_name, llm.temperature)
+            cached = cache.get(key)
+            if cached is not None:
+                stage_metrics.cache_hit = True
+                yield cached
+                return
+
+        parts = []
+        request_scheduler = scheduler.get_scheduler()
+        for chunk in request_scheduler.stream(
+            lambda: llm.stream(prompt),
+            _estimate_tokens(request_scheduler, llm, prompt),
+        ):
+            # With stream_usage=True the token usage arrives with the last chunk
+            stage_metrics.add_usage(chunk.usage_metadata)
+            parts.append(chunk.content)
+            yield chunk.content
+
+        if cache is not None:
+            cache.set(key, "".join(parts))
+
+
+def map_concurrently(
+    func: Callable[[T], R],
+    items: Iterable[T],
+    max_workers: int,
+    on_done: Optional[Callable[[int], None]] = None,
+) -> list[R]:
+    """
+    Apply a function to every item using a thread pool and return the results in input order.
+
+    Every call runs in a copy of the caller's context, so context variables
+    (e.g. LangChain's OpenAI callback used for cost tracking) are visible in the worker threads.
+
+    Args:
+        func: Function to apply to each item
+        items: Items to process
+        max_workers: Maximum number of threads running at the same time
+        on_done: Called from the calling thread with the number of finished items after each completion
+
+    Returns:
+        The results in the same order as the input items
+    """
+    items = list(items)
+    results: list[Optional[R]] = [None] * len(items)
+
+    executor = ThreadPoolExecutor(max_workers=max(1, max_workers))
+    try:
+        futures = {
+            executor.submit(contextvars.copy_context().run, func, item): idx
+            for idx, item in enumerate(items)
+        }
+        for completed, future in enumerate(as_completed(futures), start=1):
+            results[futures[future]] = future.result()
+            if on_done is not None:
+                on_done(completed)
+    finally:
+        # Do not start pending items if one of them failed
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    return results
+
+
+async def amap_concurrently(
+    func: Callable[[T], Awaitable[R]],
+    items: Iterable[T],
+    max_concurrency: int,
+    on_done: Optional[Callable[[int], None]] = None,
+) -> list[R]:
+    """
+    Async version of map_concurrently: await a coroutine for every item and return the results in input order.
+
+    Args:
+        func: Coroutine function to apply to each item
+        items: Items to process
+        max_concurrency: Maximum number of coroutines running at the same time
+        on_done: Called with the number of finished items after each completion
+
+    Returns:
+        The results in the same order as the input items
+    """
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    completed = 0
+
+    async def run(item: T) -> R:
+        nonlocal completed
+        async with semaphore:
+            result = await func(item)
+        completed += 1
+        if on_done is not None:
+            on_done(completed)
+        return result
+
+    return await _gather_or_cancel([asyncio.create_task(run(item)) for item in items])
+
+
+async def _gather_or_cancel(tasks: list["asyncio.Task[R]"]) -> list[R]:
+    """
+    Await the tasks and return their results in order.
+    If one of them fails, the others are cancelled (pending items never start) before the error is raised.
+    """
+    try:
+        return list(await asyncio.gather(*tasks))
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+def map_pipeline(
+    fetch: Callable[[T], F],
+    process: Callable[[T, F], R],
+    items: Iterable[T],
+    fetch_workers: int,
+    process_workers: int,
+    max_prefetch: int,
+    on_done: Optional[Callable[[int], None]] = None,
+) -> list[R]:
+    """
+    Apply two functions to every item in a producer/consumer pipeline and return the results in input order.
+    The fetch stage (e.g. transcript downloads) runs ahead of the process stage (e.g. LLM requests),
+    so the I/O of later items overlaps with the processing of earlier ones.
+    Items are drawn from the iterable only when there is room in the pipeline, so it may be a lazy generator.
+    Each stage has its own thread pool, calls run in a copy of the caller's context like in map_concurrently.
+
+    Args:
+        fetch: First stage, called with the item
+        process: Second stage, called with the item and the result of fetch
+        items: Items to process, consumed lazily from the calling thread
+        fetch_workers: Maximum number of fetch calls running at the same time
+        process_workers: Maximum number of process calls running at the same time
+        max_prefetch: Maximum number of fetched items waiting for a free process worker,
+            bounds the memory used by fetched results
+        on_done: Called from the calling thread with the number of finished items after each completion
+
+    Returns:
+        The results of process in the same order as the input items
+    """
+    iterator = iter(items)
+    exhausted = False
+    pending: dict[int, T] = {}
+    results: list[Optional[R]] = []
+    # Items fetched or being fetched, which have not been processed yet
+    max_in_flight = max(1, process_workers) + max(0, max_prefetch)
+
+    fetch_executor = ThreadPoolExecutor(max_workers=max(1, fetch_workers))
+    process_executor = ThreadPoolExecutor(max_workers=max(1, process_workers))
+    fetching: dict[Future, int] = {}
+    processing: dict[Future, int] = {}
+    completed = 0
+    try:
+        while True:
+            # Items are drawn lazily, e.g. video URLs arriving page by page
+            while not exhausted and len(pending) < max_in_flight:
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    exhausted = True
+                    break
+                idx = len(results)
+                results.append(None)
+                pending[idx] = item
+                future = fetch_executor.submit(
+                    contextvars.copy_context().run, fetch, item
+                )
+                fetching[future] = idx
+
+            if not pending:
+                break
+
+            done, _ = wait([*fetching, *processing], return_when=FIRST_COMPLETED)
+            for future in done:
+                if future in fetching:
+                    idx = fetching.pop(future)
+                    processed = process_executor.submit(
+                        contextvars.copy_context().run,
+                        process,
+                        pending[idx],
+                        future.result(),
+                    )
+                    processing[processed] = idx
+                else:
+                    idx = processing.pop(future)
+                    results[idx] = future.result()
+                    del pending[idx]
+                    completed += 1
+                    if on_done is not None:
+                        on_done(completed)
+    finally:
+        # Do not start pending items if one of them failed
+        fetch_executor.shutdown(wait=True, cancel_futures=True)
+        process_executor.shutdown(wait=True, cancel_futures=True)
+
+    return results
+
+
+async def amap_pipeline(
+    fetch: Callable[[T], Awaitable[F]],
+    process: Callable[[T, F], Awaitable[R]],
+    items: Iterable[T] | AsyncIterable[T],
+    fetch_concurrency: int,
+    process_concurrency: int,
+    max_prefetch: int,
+    on_done: Optional[Callable[[int], None]] = None,
+) -> list[R]:
+    """
+    Async version of map_pipeline, both stages run as coroutines on the event loop.
+
+    Args:
+        fetch: First stage, called with the item
+        process: Second stage, called with the item and the result of fetch
+        items: Items to process, items of an async iterable are started as they arrive
+        fetch_concurrency: Maximum number of fetch coroutines running at the same time
+        process_concurrency: Maximum number of process coroutines running at the same time
+        max_prefetch: Maximum number of fetched items waiting for a free process slot
+        on_done: Called with the number of finished items after each completion
+
+    Returns:
+        The results of process in the same order as the input items
+    """
+    fetch_semaphore = asyncio.Semaphore(max(1, fetch_concurrency))
+    process_semaphore = asyncio.Semaphore(max(1, process_concurrency))
+    # Items are admitted in input order, so earlier items are fetched first
+    in_flight = asyncio.Semaphore(max(1, process_concurrency) + max(0, max_prefetch))
+    completed = 0
+
+    async def run(item: T) -> R:
+        nonlocal completed
+        async with in_flight:
+            async with fetch_semaphore:
+                fetched = await fetch(item)
+            async with process_semaphore:
+                result = await process(item, fetched)
+        completed += 1
+        if on_done is not None:
+            on_done(completed)
+        return result
+
+    tasks = []
+    failed = False
+
+    def on_task_done(task: asyncio.Task) -> None:
+        nonlocal failed
+        if task.cancelled() or task.exception() is not None:
+            failed = True
+
+    def start(item: T) -> None:
+        task = asyncio.create_task(run(item))
+        task.add_done_callback(on_task_done)
+        tasks.append(task)
+
+    try:
+        if isinstance(items, AsyncIterable):
+            # Start the items as they arrive, e.g. video URLs arriving page by page,
+            # and stop pulling items once one of them failed
+            async for item in items:
+                if failed:
+                    break
+                start(item)
+        else:
+            for item in items:
+                start(item)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+    return await _gather_or_cancel(tasks)
+
+
+class SharedCalls:
+    """
+    Run a call only once per key at a time: callers which arrive while a call with the same key is running
+    wait for it and share its result (or error). Finished calls are forgotten, so results are not kept in memory
+    and a failure is not replayed to later callers, they run the call again.
+    Used to extract identical transcripts (re-uploads, mirrors) only once.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._futures: dict[str, Future] = {}
+        self._async_futures: dict[str, asyncio.Future] = {}
+
+    def run(self, key: str, func: Callable[[], R]) -> R:
+        """
+        Call func, unless a call with the same key is running.
+
+        Args:
+            key: Identifies calls with the same result
+            func: The call
+
+        Returns:
+            The result of func or of the running call with the key
+        """
+        with self._lock:
+            future = self._futures.get(key)
+            owner = future is None
+            if owner:
+                future = self._futures[key] = Future()
+        if not owner:
+            return future.result()
+
+        try:
+            result = func()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+        finally:
+            with self._lock:
+                del self._futures[key]
+        return result
+
+    async def arun(self, key: str, func: Callable[[], Awaitable[R]]) -> R:
+        """Async version of run, all callers have to use the same event loop"""
+        future = self._async_futures.get(key)
+        if future is not None:
+            return await asyncio.shield(future)
+
+        future = self._async_futures[key] = asyncio.get_running_loop().create_future()
+        try:
+            result = await func()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved, it is raised to the other callers only if there are any
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+        finally:
+            del self._async_futures[key]
+        return result
+
+
 def save_to_file(file_name: str, content: str) -> None:
     """
     Save the given result to a file with the given file name.
@@ -104,5 +677,8 @@ def show_markdown_output(output: str) -> None:
     Args
         output: The markdown output
     """
+    from rich.console import Console
+    from rich.markdown import Markdown
+
     console = Console()
     console.print(Markdown(output))
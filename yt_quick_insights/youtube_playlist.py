@@ -1,11 +1,40 @@
-import streamlit as st
+import asyncio
+import math
+from functools import partial
+from typing import AsyncIterator, Callable, Iterable, Iterator, Optional, Union
+
+import typer
 from langchain_core.prompts import PromptTemplate
 from pytube import Playlist
 
-from yt_quick_insights import get_quick_insights
-from yt_quick_insights import utils
+from yt_quick_insights import QuickInsights, aget_quick_insights, get_quick_insights
+from yt_quick_insights import clients, templates, tokens, utils
+from yt_quick_insights.cache import PlaylistCache, SummaryCache
 from yt_quick_insights.config import settings
-from yt_quick_insights.task import ExtractionMethods
+from yt_quick_insights.task import ExtractionMethods, task_manager
+
+# Result of the download stage of a video: the cached summary, the transcript ready for extraction or None on failure
+VideoSource = Union[str, QuickInsights, None]
+
+
+class PlaylistProgress:
+    """
+    Receives the progress events of a PlaylistInsights run.
+    All methods do nothing by default, user interfaces override the events they want to display.
+    Events are always emitted from the thread that called PlaylistInsights.extract.
+    """
+
+    def on_start(self, total_videos: int) -> None:
+        """Called before the insights of the individual videos are extracted"""
+
+    def on_video_done(self, completed: int, total_videos: int) -> None:
+        """Called after the insights of a video were extracted"""
+
+    def on_consolidate(self) -> None:
+        """Called before the summaries of all videos are consolidated"""
+
+    def on_finish(self) -> None:
+        """Called after the consolidated summary was created or the run failed"""
 
 
 class PlaylistInsights:
@@ -31,74 +60,613 @@ class PlaylistInsights:
             api_key: OpenAI API key
             extraction_method: Method used to extract insights from individual videos
         """
+        self.playlist_url = playlist_url
+        # No request is sent until the video URLs are enumerated
         self.playlist = Playlist(playlist_url)
-        self.playlist_length = self.playlist.length
         self.model_name = model_name
         self.api_key = api_key
         self.summary_collection: list[str] = list()
+        self.failed_videos: dict[str, str] = dict()
+        self._shared_extractions = utils.SharedCalls()
+        self.budget = tokens.Budget(settings.MAX_COST_PER_PLAYLIST)
         self.prompt_template = self._load_prompt_template()
         self.extraction_method = extraction_method
+        self.summary_cache = SummaryCache() if settings.SUMMARY_CACHE_ENABLED else None
+        self.playlist_cache = (
+            PlaylistCache() if settings.PLAYLIST_CACHE_ENABLED else None
+        )
+
+    @property
+    def playlist_length(self) -> int:
+        """
+        Number of videos in the playlist, taken from the cached video URLs if available.
+        Duplicates are only excluded if the video URLs are cached.
+        """
+        return self._video_urls_and_total()[1]
+
+    def _get_cached_video_urls(self, use_cache: bool = True) -> Optional[list[str]]:
+        """Return the video URLs stored by a previous run, if they did not expire yet"""
+        if not use_cache or self.playlist_cache is None:
+            return None
+        try:
+            playlist_id = utils.extract_playlist_id(self.playlist_url)
+        except ValueError:
+            return None
+        return self.playlist_cache.get_video_urls(playlist_id)
+
+    def _store_video_urls(self, video_urls: list[str]) -> None:
+        """Store the complete list of video URLs for the next runs"""
+        if self.playlist_cache is None:
+            return
+        try:
+            playlist_id = utils.extract_playlist_id(self.playlist_url)
+        except ValueError:
+            return
+        self.playlist_cache.set_video_urls(playlist_id, video_urls)
+
+    def _iter_video_urls(self, use_cache: bool = True) -> Iterator[str]:
+        """
+        Yield the video URLs of the playlist in playlist order.
+        YouTube returns up to 100 videos per page, the URLs are yielded as soon as their page arrived,
+        so the extraction starts before the whole playlist is enumerated.
+        After a complete enumeration the URLs are cached (see settings.PLAYLIST_CACHE_TTL),
+        runs within the time to live skip the enumeration entirely.
+
+        Args:
+            use_cache: Whether to use the cached video URLs
+
+        Yields:
+            The video URLs
+        """
+        yield from self._video_urls_and_total(use_cache)[0]
+
+    def _video_urls_and_total(
+        self, use_cache: bool = True
+    ) -> tuple[Iterator[str], int]:
+        """
+        Return the video URLs of the playlist (see _iter_video_urls) and their number for the progress events.
+        Both come from the same source: the cached URLs are read once, without them the number is the length
+        reported by YouTube, which includes videos listed more than once.
+
+        Args:
+            use_cache: Whether to use the cached video URLs
+
+        Returns:
+            The iterator over the video URLs and the number of videos
+        """
+        cached = self._get_cached_video_urls(use_cache)
+        if cached is not None:
+            video_urls = list(self._unique_videos(cached))
+            return iter(video_urls), len(video_urls)
+        return self._enumerate_video_urls(), self.playlist.length
+
+    def _enumerate_video_urls(self) -> Iterator[str]:
+        """Yield the video URLs page by page from YouTube and cache them after a complete enumeration"""
+        video_urls = []
+
+        def enumerate_playlist() -> Iterator[str]:
+            for video_url in self.playlist.url_generator():
+                video_urls.append(video_url)
+                yield video_url
+
+        yield from self._unique_videos(enumerate_playlist())
+        self._store_video_urls(video_urls)
 
     @staticmethod
-    def _load_prompt_template() -> PromptTemplate:
-        """Load template from YAML file and convert into PromptTemplate"""
-        template = utils.load_yaml_file(
-            file_name="playlist_prompt.yml", directory=settings.PROJECT_DIR / "data"
-        )
+    def _unique_videos(video_urls: Iterable[str]) -> Iterator[str]:
+        """Yield the first URL of every video, videos listed more than once are summarized only once"""
+        seen = set()
+        for video_url in video_urls:
+            try:
+                video_id = utils.extract_video_id(video_url)
+            except ValueError:
+                # Fails later with a useful error message
+                video_id = video_url
+            if video_id not in seen:
+                seen.add(video_id)
+                yield video_url
+
+    @staticmethod
+    async def _aiter_video_urls(video_urls: Iterator[str]) -> AsyncIterator[str]:
+        """Async version of _iter_video_urls, the page requests do not block the event loop"""
+        while (
+            video_url := await asyncio.to_thread(next, video_urls, None)
+        ) is not None:
+            yield video_url
 
-        return PromptTemplate(
-            template=template.get("playlist_prompt"),
+    @staticmethod
+    def _load_prompt_template() -> PromptTemplate:
+        """Return the shared template of the prompt from playlist_prompt.yml"""
+        return templates.registry.get(
+            file_name="playlist_prompt.yml",
+            prompt_name="playlist_prompt",
             input_variables=[
                 "additional_instructions",
                 "summaries",
             ],
         )
 
-    def _collect_summaries(self):
+    def _record_failure(self, url: str, error: Exception) -> None:
         """
-        Collect summary from each video in the playlist and store it in the summary_collection list.
+        Remember a video which could not be summarized, the playlist continues with the other videos.
+        Invalid API keys, missing models and an exhausted playlist budget affect all videos and are raised instead,
+        a video exceeding settings.MAX_COST_PER_VIDEO is skipped like any other failed video.
+        """
+        if isinstance(error, tokens.VideoBudgetExceededError):
+            self.failed_videos[url] = str(error)
+            return
+        if isinstance(error, (typer.Abort, tokens.BudgetExceededError)):
+            raise error
+        self.failed_videos[url] = str(error) or type(error).__name__
+
+    def _summary_key(self, url: str) -> str:
+        """Return the key of the video summary in the summary cache"""
+        return SummaryCache.make_key(
+            video_id=utils.extract_video_id(url),
+            extraction_method=self.extraction_method.value,
+            model_name=self.model_name,
+            instructions=task_manager.get_task(self.extraction_method.value) or "",
+        )
+
+    def _transcript_key(self, source: QuickInsights) -> str:
+        """Return the key of the summary of a transcript, shared by all videos with an identical transcript"""
+        return SummaryCache.make_transcript_key(
+            transcript_hash=utils.content_hash(str(source.transcript)),
+            extraction_method=self.extraction_method.value,
+            model_name=self.model_name,
+            instructions=task_manager.get_task(self.extraction_method.value) or "",
+        )
+
+    def _get_cached_summary(self, key: str, use_cache: bool) -> Optional[str]:
+        """Return the stored summary of a video or transcript, if it was summarized before"""
+        if not use_cache or self.summary_cache is None:
+            return None
+        return self.summary_cache.get(key)
+
+    def _store_summary(self, key: str, summary: Optional[str]) -> None:
+        """Store the summary of a video or transcript for the next run of the playlist"""
+        if self.summary_cache is not None and isinstance(summary, str):
+            self.summary_cache.set(key, summary)
+
+    def _fetch_video(self, url: str, use_cache: bool = True) -> VideoSource:
+        """
+        First stage of the playlist pipeline: download the transcript of a video.
+        Videos summarized in a previous run are taken from the summary cache without any download.
+
+        Args:
+            url: YouTube video url
+            use_cache: Whether to use the persistent summary cache
+
+        Returns:
+            The cached summary, the QuickInsights object with the transcript or None if it failed (see failed_videos)
         """
-        info = st.info(f"{self.playlist_length} videos were found in the playlist.")
-        progress_bar = st.progress(0, text="Downloading Videos")
-        for idx, url in enumerate(self.playlist.video_urls, start=1):  # type: str
-            progress_bar.progress(
-                idx * int(100 / self.playlist_length),
-                text=f"Extracting Insights from Video {idx} of {self.playlist_length}",
+        try:
+            summary = self._get_cached_summary(self._summary_key(url), use_cache)
+            if summary is not None:
+                return summary
+            return get_quick_insights(
+                url=url,
+                task_details=self.extraction_method,
+                video_language=settings.DEFAULT_LANGUAGES,
             )
-            summary = get_quick_insights(
+        except Exception as e:
+            self._record_failure(url, e)
+            return None
+
+    def _summarize_video(
+        self, url: str, source: VideoSource, use_cache: bool = True
+    ) -> Optional[str]:
+        """
+        Second stage of the playlist pipeline: extract insights from the transcript of a video.
+
+        Args:
+            url: YouTube video url
+            source: Result of _fetch_video
+            use_cache: Whether to use the persistent summary and LLM response caches
+
+        Returns:
+            The summary of the video or None if it failed (see failed_videos)
+        """
+        if source is None or isinstance(source, str):
+            return source
+        transcript_key = self._transcript_key(source)
+
+        def extract() -> str:
+            # Identical transcripts (re-uploads, mirrors) are summarized once
+            summary = self._get_cached_summary(transcript_key, use_cache)
+            if summary is None:
+                summary = source.extract(
+                    model_name=self.model_name,
+                    api_key=self.api_key,
+                    use_cache=use_cache,
+                    budget=self.budget,
+                )
+                self._store_summary(transcript_key, summary)
+            return summary
+
+        try:
+            # Videos with the same transcript in progress at the same time wait for the first one
+            summary = self._shared_extractions.run(transcript_key, extract)
+            self._store_summary(self._summary_key(url), summary)
+            return summary
+        except Exception as e:
+            self._record_failure(url, e)
+            return None
+
+    async def _afetch_video(self, url: str, use_cache: bool = True) -> VideoSource:
+        """Async version of _fetch_video"""
+        try:
+            summary = await asyncio.to_thread(
+                self._get_cached_summary, self._summary_key(url), use_cache
+            )
+            if summary is not None:
+                return summary
+            return await aget_quick_insights(
                 url=url,
                 task_details=self.extraction_method,
                 video_language=settings.DEFAULT_LANGUAGES,
-            ).extract(model_name=self.model_name, api_key=self.api_key)
+            )
+        except Exception as e:
+            self._record_failure(url, e)
+            return None
+
+    async def _asummarize_video(
+        self, url: str, source: VideoSource, use_cache: bool = True
+    ) -> Optional[str]:
+        """Async version of _summarize_video"""
+        if source is None or isinstance(source, str):
+            return source
+        transcript_key = self._transcript_key(source)
+
+        async def aextract() -> str:
+            summary = await asyncio.to_thread(
+                self._get_cached_summary, transcript_key, use_cache
+            )
+            if summary is None:
+                summary = await source.aextract(
+                    model_name=self.model_name,
+                    api_key=self.api_key,
+                    use_cache=use_cache,
+                    budget=self.budget,
+                )
+                await asyncio.to_thread(self._store_summary, transcript_key, summary)
+            return summary
+
+        try:
+            summary = await self._shared_extractions.arun(transcript_key, aextract)
+            await asyncio.to_thread(
+                self._store_summary, self._summary_key(url), summary
+            )
+            return summary
+        except Exception as e:
+            self._record_failure(url, e)
+            return None
+
+    def _keep_successful(self, summaries: list[Optional[str]]) -> list[str]:
+        """
+        Drop the summaries of failed videos and repeated summaries of identical videos,
+        the others keep the playlist order.
+
+        Raises:
+            RuntimeError: If no video of the playlist could be summarized
+        """
+        successful = list(
+            dict.fromkeys(summary for summary in summaries if summary is not None)
+        )
+        if not successful and self.failed_videos:
+            raise RuntimeError(
+                f"None of the {len(self.failed_videos)} videos could be summarized: "
+                + "; ".join(
+                    f"{url}: {error}" for url, error in self.failed_videos.items()
+                )
+            )
+        return successful
+
+    def _collect_summaries(
+        self, use_cache: bool = True, progress: Optional[PlaylistProgress] = None
+    ):
+        """
+        Collect summary from each video in the playlist and store it in the summary_collection list.
+        Transcripts are downloaded ahead of the LLM requests in a pipeline, both stages run concurrently
+        (see settings.TRANSCRIPT_FETCH_CONCURRENCY, settings.TRANSCRIPT_PREFETCH and settings.MAX_CONCURRENCY),
+        the summaries keep the playlist order.
+        Videos which fail, e.g. after the retries of the request scheduler are exhausted, are skipped
+        and recorded in failed_videos, so the finished summaries are not lost.
 
-            self.summary_collection.append(summary)
+        Args:
+            use_cache: Whether to use the cached video URLs, summaries and LLM responses
+            progress: Receives the progress events
+        """
+        progress = progress or PlaylistProgress()
+        video_urls, total = self._video_urls_and_total(use_cache)
+
+        progress.on_start(total)
+        self.failed_videos = dict()
+        self._shared_extractions = utils.SharedCalls()
+        summaries = utils.map_pipeline(
+            partial(self._fetch_video, use_cache=use_cache),
+            partial(self._summarize_video, use_cache=use_cache),
+            video_urls,
+            fetch_workers=settings.TRANSCRIPT_FETCH_CONCURRENCY,
+            process_workers=settings.MAX_CONCURRENCY,
+            max_prefetch=settings.TRANSCRIPT_PREFETCH,
+            on_done=self._progress_callback(progress, total),
+        )
+        self._finish_progress(progress, len(summaries), total)
+        self.summary_collection = self._keep_successful(summaries)
+
+    async def _acollect_summaries(
+        self, use_cache: bool = True, progress: Optional[PlaylistProgress] = None
+    ):
+        """Async version of _collect_summaries"""
+        progress = progress or PlaylistProgress()
+        video_urls, total = await asyncio.to_thread(
+            self._video_urls_and_total, use_cache
+        )
+
+        progress.on_start(total)
+        self.failed_videos = dict()
+        self._shared_extractions = utils.SharedCalls()
+        summaries = await utils.amap_pipeline(
+            partial(self._afetch_video, use_cache=use_cache),
+            partial(self._asummarize_video, use_cache=use_cache),
+            self._aiter_video_urls(video_urls),
+            fetch_concurrency=settings.TRANSCRIPT_FETCH_CONCURRENCY,
+            process_concurrency=settings.MAX_CONCURRENCY,
+            max_prefetch=settings.TRANSCRIPT_PREFETCH,
+            on_done=self._progress_callback(progress, total),
+        )
+        self._finish_progress(progress, len(summaries), total)
+        self.summary_collection = self._keep_successful(summaries)
+
+    @staticmethod
+    def _progress_callback(
+        progress: PlaylistProgress, total: int
+    ) -> Callable[[int], None]:
+        """
+        Return the on_done callback of the pipeline.
+        The total reported by YouTube is only an estimate, completed never exceeds the reported total.
+        """
+        return lambda completed: progress.on_video_done(
+            completed, max(total, completed)
+        )
+
+    @staticmethod
+    def _finish_progress(
+        progress: PlaylistProgress, completed: int, total: int
+    ) -> None:
+        """Complete the progress if fewer videos than estimated were processed, e.g. duplicates were skipped"""
+        if 0 < completed < total:
+            progress.on_video_done(completed, completed)
+
+    def _get_consolidation_prompt(
+        self, summaries: list[str], additional_instructions: str
+    ) -> str:
+        """
+        Return the prompt to consolidate a group of summaries and reserve its estimated cost in the playlist budget.
+
+        Args:
+            summaries: The summaries to consolidate
+            additional_instructions: Additional instructions for the summary
+
+        Returns:
+            The rendered prompt
+
+        Raises:
+            tokens.BudgetExceededError: If the estimated cost exceeds the remaining playlist budget
+        """
+        joined_summaries = "\n\n\n --- Next Summary --- \n\n\n".join(summaries)
+
+        prompt = self.prompt_template.invoke(
+            {
+                "additional_instructions": additional_instructions,
+                "summaries": joined_summaries,
+            }
+        ).text
+        self.budget.reserve(
+            tokens.Estimate(
+                model_name=self.model_name,
+                prompt_tokens=tokens.count_tokens(prompt, self.model_name),
+                completion_tokens=settings.ESTIMATED_COMPLETION_TOKENS,
+            )
+        )
+        return prompt
+
+    @staticmethod
+    def _split_into_groups(summaries: list[str]) -> list[list[str]]:
+        """
+        Split the summaries into the fewest groups of at most settings.PLAYLIST_GROUP_SIZE summaries,
+        the group sizes differ by at most one. No group holds a single summary (unless there is only one),
+        it would get the same weight as a whole group in the next level. For this reason a group size of 2
+        and an odd number of summaries yields one group of 3.
+        """
+        group_size = max(2, settings.PLAYLIST_GROUP_SIZE)
+        number_of_groups = max(
+            1, min(math.ceil(len(summaries) / group_size), len(summaries) // 2)
+        )
+        size, remainder = divmod(len(summaries), number_of_groups)
+
+        groups = []
+        start = 0
+        for idx in range(number_of_groups):
+            end = start + size + (1 if idx < remainder else 0)
+            groups.append(summaries[start:end])
+            start = end
+        return groups
+
+    def _consolidate_group(
+        self,
+        summaries: list[str],
+        additional_instructions: str,
+        use_cache: bool = True,
+    ) -> str:
+        """
+        Consolidate a group of summaries into a single summary using the LLM.
+
+        Args:
+            summaries: The summaries to consolidate
+            additional_instructions: Additional instructions for the summary
+            use_cache: Whether to use the persistent LLM response cache
+
+        Returns:
+            The consolidated summary
+        """
+        prompt = self._get_consolidation_prompt(summaries, additional_instructions)
+        llm = utils.initialize_llm(model_name=self.model_name, api_key=self.api_key)
+        return utils.invoke_llm(llm, prompt, use_cache=use_cache, stage="consolidate")
 
-        info.empty()
-        progress_bar.empty()
+    async def _aconsolidate_group(
+        self,
+        summaries: list[str],
+        additional_instructions: str,
+        use_cache: bool = True,
+    ) -> str:
+        """Async version of _consolidate_group"""
+        prompt = self._get_consolidation_prompt(summaries, additional_instructions)
+        llm = utils.initialize_llm(model_name=self.model_name, api_key=self.api_key)
+        return await utils.ainvoke_llm(
+            llm, prompt, use_cache=use_cache, stage="consolidate"
+        )
 
-    def extract(self, additional_instructions: str) -> str:
+    def _consolidate(
+        self,
+        summaries: list[str],
+        additional_instructions: str,
+        use_cache: bool = True,
+    ) -> str:
+        """
+        Consolidate all summaries with a tree reduction: summaries are consolidated in groups of
+        settings.PLAYLIST_GROUP_SIZE, level by level, until a single group is left for the final summary.
+        The groups of one level are processed concurrently.
+
+        Args:
+            summaries: The summaries to consolidate
+            additional_instructions: Additional instructions for the summary
+            use_cache: Whether to use the persistent LLM response cache
+
+        Returns:
+            The consolidated summary
+        """
+
+        def consolidate_group(group: list[str]) -> str:
+            if len(group) == 1:
+                return group[0]
+            return self._consolidate_group(
+                group, additional_instructions, use_cache=use_cache
+            )
+
+        groups = self._split_into_groups(summaries)
+        while len(groups) > 1:
+            summaries = utils.map_concurrently(
+                consolidate_group, groups, max_workers=settings.MAX_CONCURRENCY
+            )
+            groups = self._split_into_groups(summaries)
+
+        return self._consolidate_group(
+            summaries, additional_instructions, use_cache=use_cache
+        )
+
+    async def _aconsolidate(
+        self,
+        summaries: list[str],
+        additional_instructions: str,
+        use_cache: bool = True,
+    ) -> str:
+        """Async version of _consolidate"""
+
+        async def consolidate_group(group: list[str]) -> str:
+            if len(group) == 1:
+                return group[0]
+            return await self._aconsolidate_group(
+                group, additional_instructions, use_cache=use_cache
+            )
+
+        groups = self._split_into_groups(summaries)
+        while len(groups) > 1:
+            summaries = await utils.amap_concurrently(
+                consolidate_group, groups, max_concurrency=settings.MAX_CONCURRENCY
+            )
+            groups = self._split_into_groups(summaries)
+
+        return await self._aconsolidate_group(
+            summaries, additional_instructions, use_cache=use_cache
+        )
+
+    def extract(
+        self,
+        additional_instructions: str,
+        use_cache: bool = True,
+        progress: Optional[PlaylistProgress] = None,
+        max_cost: Optional[float] = None,
+    ) -> str:
         """
         Extract insights from all videos in the playlist
         and consolidate them into a single cohesive summary.
 
         Args:
             additional_instructions: Additional instructions for the summary
+            use_cache: Whether to use the persistent LLM response cache
+            progress: Receives the progress events, e.g. to display a progress bar
+            max_cost: Maximum estimated cost of the playlist in USD, defaults to settings.MAX_COST_PER_PLAYLIST
 
         Returns:
-            Consolidated insights from all videos in the playlist
+            Consolidated insights from all videos in the playlist, videos which failed are listed in failed_videos
+
+        Raises:
+            tokens.BudgetExceededError: If the estimated cost exceeds the budget, pending videos are not processed
+            RuntimeError: If none of the videos could be summarized
         """
-        self._collect_summaries()
+        progress = progress or PlaylistProgress()
+        self.budget = tokens.Budget(
+            settings.MAX_COST_PER_PLAYLIST if max_cost is None else max_cost
+        )
+        try:
+            self._collect_summaries(use_cache=use_cache, progress=progress)
 
-        with st.spinner("Consolidate insights from all videos ..."):
-            joined_summaries = "\n\n\n --- Next Summary --- \n\n\n".join(
-                self.summary_collection
+            progress.on_consolidate()
+            return self._consolidate(
+                self.summary_collection, additional_instructions, use_cache=use_cache
             )
+        finally:
+            progress.on_finish()
+
+    async def aextract(
+        self,
+        additional_instructions: str,
+        use_cache: bool = True,
+        progress: Optional[PlaylistProgress] = None,
+        max_cost: Optional[float] = None,
+    ) -> str:
+        """
+        Async version of extract, videos are processed concurrently on the event loop.
+
+        Args:
+            additional_instructions: Additional instructions for the summary
+            use_cache: Whether to use the persistent LLM response cache
+            progress: Receives the progress events, e.g. to display a progress bar
+            max_cost: Maximum estimated cost of the playlist in USD, defaults to settings.MAX_COST_PER_PLAYLIST
+
+        Returns:
+            Consolidated insights from all videos in the playlist, videos which failed are listed in failed_videos
+
+        Raises:
+            tokens.BudgetExceededError: If the estimated cost exceeds the budget, pending videos are not processed
+            RuntimeError: If none of the videos could be summarized
+        """
+        progress = progress or PlaylistProgress()
+        self.budget = tokens.Budget(
+            settings.MAX_COST_PER_PLAYLIST if max_cost is None else max_cost
+        )
+        try:
+            # One session keeps the connections open for all videos and the consolidation
+            async with clients.registry.session():
+                await self._acollect_summaries(use_cache=use_cache, progress=progress)
 
-            llm = utils.initialize_llm(model_name=self.model_name, api_key=self.api_key)
-            chain = self.prompt_template | llm
-            return chain.invoke(
-                {
-                    "additional_instructions": additional_instructions,
-                    "summaries": joined_summaries,
-                }
-            ).content
+                progress.on_consolidate()
+                return await self._aconsolidate(
+                    self.summary_collection,
+                    additional_instructions,
+                    use_cache=use_cache,
+                )
+        finally:
+            progress.on_finish()
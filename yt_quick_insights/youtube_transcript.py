@@ -1,91 +1,211 @@
-import re
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
 from typing import Tuple
-from urllib.error import HTTPError
 
-from langchain_community.document_loaders import YoutubeLoader
-from langchain_core.documents import Document
-from pytube.exceptions import PytubeError
+from pytube import YouTube
+from youtube_transcript_api import (
+    CouldNotRetrieveTranscript,
+    NoTranscriptFound,
+    YouTubeTranscriptApi,
+)
+
+from yt_quick_insights import metrics, utils
+from yt_quick_insights.cache import TranscriptCache
+from yt_quick_insights.config import settings
+from yt_quick_insights.segments import Transcript, clean_text, normalize_segments
+
+
+@lru_cache(maxsize=4)
+def _open_transcript_cache(path: Path, max_size: int, ttl: int) -> TranscriptCache:
+    return TranscriptCache(path=path, max_size=max_size, ttl=ttl)
 
 
 class YoutubeTranscript:
     """
     This class provides functionality to retrieve the transcript and title
     of a YouTube video given its URL, and clean the text for further processing.
+    Downloaded transcripts are stored in a persistent cache and reused across runs.
     """
 
+    TITLE_NOT_AVAILABLE = "YouTube Video Title could not be retrieved"
+
+    def __init__(self, use_cache: bool = True):
+        """
+        Initialize the class and open the transcript cache.
+
+        Args:
+            use_cache: Whether to read and write the persistent transcript cache,
+                ignored if settings.TRANSCRIPT_CACHE_ENABLED is False
+        """
+        # The cache is opened once per location, size and time to live and shared by all instances
+        self.cache = (
+            _open_transcript_cache(
+                settings.CACHE_DIR / "transcripts.sqlite",
+                settings.TRANSCRIPT_CACHE_MAX_SIZE,
+                settings.TRANSCRIPT_CACHE_TTL,
+            )
+            if use_cache and settings.TRANSCRIPT_CACHE_ENABLED
+            else None
+        )
+
     def download_from_url(
-        self, video_url: str, video_language: str | list[str]
-    ) -> Tuple[str, str]:
+        self,
+        video_url: str,
+        video_language: str | list[str],
+        keep_timestamps: bool = False,
+    ) -> Tuple[str, Transcript]:
         """
-        Download the transcript and title of a YouTube video, based on the URL.
+        Return the transcript and title of a YouTube video, based on the URL.
+        The cache is consulted first, the transcript is only downloaded on a cache miss.
 
         Args:
             video_url: The URL of the YouTube video. Example: "https://www.youtube.com/watch?v=VIDEO_ID"
             video_language: The language of the transcript. Example: "en" or ["en", "de"]
+            keep_timestamps: Whether the transcript has to include the segment start times
 
         Returns:
-            The title and transcript of the YouTube video.
+            The title and transcript of the YouTube video. The transcript is a string,
+            which additionally carries the segment start times (see segments.Transcript).
 
         Raises:
             ValueError: If the URL is not valid.
             IndexError: If the video does not have a transcript.
         """
         try:
-            # Try loading the transcript from the YouTube URL - not all videos have transcripts
-            yt_document = self._load(
-                video_url=video_url,
-                video_language=video_language,
-                add_video_info=True,
-            )
-        except (PytubeError, HTTPError) as e:
-            # Common error, when YouTube makes changes to their API structure and "pytube" has not yet adjusted
-            # pytube is used by langchain's YoutubeLoader to fetch video details
-            yt_document = self._load(
-                video_url=video_url,
-                video_language=video_language,
-                add_video_info=False,
-            )
-            return (
-                "YouTube Video Title could not be retrieved",
-                self._clean_text(yt_document.page_content),
-            )
+            video_id = utils.extract_video_id(video_url)
         except ValueError:
             raise ValueError(
                 "Please provide a valid YouTube URL "
                 'in the form of "https://www.youtube.com/watch?v=VIDEO_ID".'
             )
-        except IndexError:
-            raise IndexError(
-                "Video does not have a transcript. Please try another video."
-            )
 
-        return (
-            self._clean_text(yt_document.metadata.get("title")),
-            self._clean_text(yt_document.page_content),
+        with metrics.measure("transcript") as stage_metrics:
+            if self.cache is not None:
+                cached = self.cache.get_transcript(video_id, video_language)
+                if cached is not None and (
+                    cached[1].has_timestamps or not keep_timestamps
+                ):
+                    stage_metrics.cache_hit = True
+                    return cached
+
+            title, transcript = self._download(video_id, video_language)
+
+            if self.cache is not None:
+                self.cache.set_transcript(video_id, video_language, title, transcript)
+            return title, transcript
+
+    async def adownload_from_url(
+        self,
+        video_url: str,
+        video_language: str | list[str],
+        keep_timestamps: bool = False,
+    ) -> Tuple[str, Transcript]:
+        """
+        Async version of download_from_url.
+        The transcript libraries only offer blocking requests, so the download runs in a worker thread.
+
+        Args:
+            video_url: The URL of the YouTube video. Example: "https://www.youtube.com/watch?v=VIDEO_ID"
+            video_language: The language of the transcript. Example: "en" or ["en", "de"]
+            keep_timestamps: Whether the transcript has to include the segment start times
+
+        Returns:
+            The title and transcript of the YouTube video.
+
+        Raises:
+            ValueError: If the URL is not valid.
+            IndexError: If the video does not have a transcript.
+        """
+        return await asyncio.to_thread(
+            self.download_from_url,
+            video_url=video_url,
+            video_language=video_language,
+            keep_timestamps=keep_timestamps,
         )
 
+    def _download(
+        self, video_id: str, video_language: str | list[str]
+    ) -> Tuple[str, Transcript]:
+        """
+        Download the transcript and title of a YouTube video.
+        The title is requested in a worker thread while the transcript is downloaded,
+        a failing title request never causes the transcript to be downloaded again.
+
+        Args:
+            video_id: The YouTube video ID
+            video_language: The language of the transcript. Example: "en" or ["en", "de"]
+
+        Returns:
+            The title and transcript (including the segment start times) of the YouTube video.
+
+        Raises:
+            IndexError: If the video does not have a transcript.
+        """
+        executor = ThreadPoolExecutor(max_workers=1)
+        try:
+            title = executor.submit(self._fetch_title, video_id)
+            transcript = self._fetch_transcript(video_id, video_language)
+            return title.result(), transcript
+        finally:
+            # Do not wait for the title if the transcript is not available
+            executor.shutdown(wait=False)
+
     @staticmethod
-    def _load(
-        video_url: str, video_language: str | list[str], add_video_info: bool
-    ) -> Document:
+    def _fetch_transcript(video_id: str, video_language: str | list[str]) -> Transcript:
         """
-        Load the transcript from the YouTube URL with the option to add video info.
+        Download the transcript segments with youtube-transcript-api and normalize them.
+        Falls back to the English transcript if none of the requested languages is available.
 
         Args:
-            video_url: The URL of the YouTube video. Example: "https://www.youtube.com/watch?v=VIDEO_ID"
+            video_id: The YouTube video ID
             video_language: The language of the transcript. Example: "en" or ["en", "de"]
-            add_video_info: Whether to add video info to the transcript. Example: True or False
 
         Returns:
-            A Document object containing the transcript of the YouTube video and metadata.
+            The cleaned transcript including the segment start times
 
+        Raises:
+            IndexError: If the video does not have a transcript.
         """
-        loader = YoutubeLoader.from_youtube_url(
-            youtube_url=video_url,
-            language=video_language,
-            add_video_info=add_video_info,
+        languages = (
+            [video_language] if isinstance(video_language, str) else video_language
+        )
+
+        try:
+            transcript_list = YouTubeTranscriptApi().list(video_id)
+            try:
+                transcript = transcript_list.find_transcript(languages)
+            except NoTranscriptFound:
+                transcript = transcript_list.find_transcript(["en"])
+            fetched_transcript = transcript.fetch()
+        except CouldNotRetrieveTranscript:
+            raise IndexError(
+                "Video does not have a transcript. Please try another video."
+            )
+
+        return normalize_segments(
+            ((snippet.text, snippet.start) for snippet in fetched_transcript.snippets),
+            keep_timestamps=True,
         )
-        return loader.load()[0]
+
+    def _fetch_title(self, video_id: str) -> str:
+        """
+        Return the title of the video using pytube.
+
+        Args:
+            video_id: The YouTube video ID
+
+        Returns:
+            The cleaned title or a placeholder if it could not be retrieved
+        """
+        try:
+            title = YouTube(f"https://www.youtube.com/watch?v={video_id}").title
+        except Exception:
+            # pytube breaks regularly when YouTube changes its page structure (PytubeError, HTTPError, KeyError, ...),
+            # the title is not essential, so any failure falls back to the placeholder
+            return self.TITLE_NOT_AVAILABLE
+        return self._clean_text(title or self.TITLE_NOT_AVAILABLE)
 
     @staticmethod
     def _clean_text(text: str) -> str:
@@ -98,7 +218,4 @@ class YoutubeTranscript:
         Returns:
             The cleaned text.
         """
-        # Remove unwanted characters
-        cleaned = re.sub(r"(\xa0|\n|\[Music])", " ", text)
-        # Replace multiple whitespaces with single whitespace
-        return re.sub(r"\s+", " ", cleaned)
+        return clean_text(text)